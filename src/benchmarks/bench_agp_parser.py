@@ -0,0 +1,73 @@
+"""
+Compares `extract_coating_location` + `extract_coating_diameter` + `calculate_drill_diameters`, which read
+and search every AGP report twice, with the single scan of `load_agp_reports`, first without its cache
+and then with the cache of a previous run.
+
+The synthetic reports have the well name and casing lines of the AGP text reports among filler lines.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_agp_parser --reports 2000 --lines 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from preprocess_dlis import COATING_DRILL_DIAMETERS_MAPPING
+from utils.agp import load_agp_reports
+from utils.data_preprocessing import calculate_drill_diameters, extract_coating_diameter, extract_coating_location
+
+
+def write_reports(base_path, n_reports, n_lines, seed=0):
+    rng = np.random.default_rng(seed)
+    filler = "PROF. {:9.2f}  LITOLOGIA: ARENITO FINO, CINZA CLARO, COM INTERCALACOES DE FOLHELHO\n"
+
+    for report in range(n_reports):
+        lines = [f"POÇO : 3-BRSA-{report}-SE\n"]
+        lines += [filler.format(depth) for depth in rng.uniform(0, 5000, n_lines // 2)]
+        lines.append(f"REV. SUPERFICIE   {rng.uniform(300, 800):.1f}  (SAPATA)  13 3/8\n")
+        lines.append(f"REV. INTERMED.   {rng.uniform(1200, 2500):.1f}  (SAPATA)  9 5/8\n")
+        lines += [filler.format(depth) for depth in rng.uniform(0, 5000, n_lines - n_lines // 2)]
+
+        folder = os.path.join(base_path, f"bacia_{report % 10}", f"3-BRSA-{report}-SE")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "agp.txt"), "w") as f:
+            f.writelines(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the single-scan AGP report parser")
+    parser.add_argument("--reports", type=int, default=2000, help="Number of AGP reports.")
+    parser.add_argument("--lines", type=int, default=2000, help="Filler lines per report.")
+    parser.add_argument("--workers", type=int, default=8, help="Threads of the single scan.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_path:
+        agp_path = os.path.join(base_path, 'agp')
+        cache_path = os.path.join(base_path, 'agp_reports.json')
+        write_reports(agp_path, args.reports, args.lines)
+
+        start = time.perf_counter()
+        locations = extract_coating_location(agp_path)
+        diameters = extract_coating_diameter(agp_path)
+        drills = calculate_drill_diameters(diameters, COATING_DRILL_DIAMETERS_MAPPING)
+        two_pass_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = load_agp_reports(agp_path, COATING_DRILL_DIAMETERS_MAPPING, args.workers, cache_path)
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = load_agp_reports(agp_path, COATING_DRILL_DIAMETERS_MAPPING, args.workers, cache_path)
+        cached_seconds = time.perf_counter() - start
+
+        assert expected == (locations, diameters, drills)
+        assert cached == expected
+
+        print(f"two passes + drill diameters:  {two_pass_seconds:7.3f} s")
+        print(f"load_agp_reports, no cache:    {cold_seconds:7.3f} s  (same tables)")
+        print(f"load_agp_reports, cached:      {cached_seconds:7.3f} s  ({len(expected[0])} wells)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares the line by line selection of data_selection/select_wells.py (wells with AGP and UBI or CAST),
+which reads every catalog again for each selection, with the catalog index: one scan of the catalogs into
+the index, then selections answered from it.
+
+The synthetic catalogs have '<size> <path>' lines in the directory layout of the basin catalogs, with
+a few AGP and DLIS files among many other files of each well.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_catalog_index --catalogs 4 --wells 5000 --files 60
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from utils.catalog_index import build_catalog_index, load_well_table, select_wells
+
+OTHER_FILES = ['relatorio.pdf', 'perfil.las', 'amostra.jpg', 'lito.tif', 'dados.xls']
+DLIS_NAMES = ['brsa_fmi1', 'ubi', 'cast_xrmi', 'obmi', 'emi-gri', 'gr_rhob', 'dt']
+
+
+def write_catalogs(catalog_dir, n_catalogs, n_wells, n_files, seed=0):
+    rng = np.random.default_rng(seed)
+    os.makedirs(catalog_dir, exist_ok=True)
+
+    for catalog in range(n_catalogs):
+        lines = []
+        for well in range(n_wells):
+            category = f"Categoria-{well % 7}/Categoria-{well % 7}_parte{well % 3}" if well % 2 else f"Categoria-{well % 7}"
+            base = f"./{catalog}-Bacia/POCO/{category}/{catalog}-BRSA-{well}-SE"
+            for _ in range(n_files):
+                lines.append(f"{rng.integers(1, 10 ** 8)} {base}/Outros/{rng.choice(OTHER_FILES)}\n")
+            if rng.random() < 0.5:
+                lines.append(f"{rng.integers(1, 10 ** 5)} {base}/AGP/agp.txt\n")
+            for name in rng.choice(DLIS_NAMES, rng.integers(0, 3)):
+                lines.append(f"{rng.integers(1, 10 ** 9)} {base}/Perfil Convencional/well_{name}.dlis\n")
+
+        with open(os.path.join(catalog_dir, f"catalogo_{catalog}.txt"), "w") as f:
+            f.writelines(lines)
+
+
+def line_by_line_selection(catalog_dir):
+    selected = {}
+    for catalog in sorted(os.listdir(catalog_dir)):
+        wells_with_agp, wells_with_ubi_or_cast = set(), set()
+
+        with open(os.path.join(catalog_dir, catalog), "r", encoding="utf-8", errors="ignore") as file:
+            for line in file:
+                if "/AGP/" in line:
+                    tokens = line.strip().split(maxsplit=1)[1].split("/")
+                    wells_with_agp.add(f"{tokens[4]}/{tokens[5]}" if "parte" in line else f"{tokens[3]}/{tokens[4]}")
+
+                lower_line = line.lower()
+                if ".dlis" in lower_line and ("ubi" in lower_line or "cast" in lower_line):
+                    tokens = line.strip().split(maxsplit=1)[1].split("/")
+                    wells_with_ubi_or_cast.add(f"{tokens[4]}/{tokens[5]}" if "parte" in line else f"{tokens[3]}/{tokens[4]}")
+
+        selected[catalog[:-4]] = wells_with_agp & wells_with_ubi_or_cast
+
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the catalog index")
+    parser.add_argument("--catalogs", type=int, default=4, help="Number of catalogs.")
+    parser.add_argument("--wells", type=int, default=5000, help="Wells per catalog.")
+    parser.add_argument("--files", type=int, default=60, help="Other files per well.")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes of the index build.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_path:
+        catalog_dir, index_dir = os.path.join(base_path, 'catalogs'), os.path.join(base_path, 'index')
+        write_catalogs(catalog_dir, args.catalogs, args.wells, args.files)
+        size = sum(os.path.getsize(os.path.join(catalog_dir, name)) for name in os.listdir(catalog_dir))
+
+        start = time.perf_counter()
+        expected = line_by_line_selection(catalog_dir)
+        line_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = build_catalog_index(catalog_dir, index_dir, args.workers)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_catalog_index(catalog_dir, index_dir, args.workers)
+        check_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wells = select_wells(load_well_table(index_dir), "AGP ∧ (UBI ∨ CAST)")
+        query_seconds = time.perf_counter() - start
+
+        for catalog, wells_of_catalog in expected.items():
+            assert wells_of_catalog == set(wells.loc[wells['catalog'] == catalog, 'well'])
+
+        print(f"catalogs: {size / 2 ** 20:.1f} MiB, {summary['files']} AGP/DLIS files of {summary['wells']} wells")
+        print(f"line by line, per selection:   {line_seconds:7.3f} s")
+        print(f"build_catalog_index:           {build_seconds:7.3f} s  (once)")
+        print(f"unchanged catalogs check:      {check_seconds:7.3f} s")
+        print(f"select_wells from the index:   {query_seconds * 1000:7.1f} ms  ({len(wells)} wells, same selection)")
+
+
+if __name__ == "__main__":
+    main()
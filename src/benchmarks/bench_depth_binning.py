@@ -0,0 +1,87 @@
+"""
+Compares the streaming depth binning of `bin_by_depth` with the floor + round + groupby of the texture
+features in resolution_preprocess_02.ipynb.
+
+The synthetic features are sampled at the 0.00254 m spacing of the CAST images and binned to the 0.01 m
+resolution of the logs. The notebook keys are floats, so some depths on a bin edge land in the previous
+bin; the benchmark counts them and compares the means of the bins on which both keys agree.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_depth_binning --rows 2000000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from utils.depth_binning import bin_by_depth, depth_bin_keys
+from utils.texture import TEXTURE_PROPERTIES
+
+
+def notebook_binning(texture_df, step=0.01):
+    texture_df = texture_df.copy()
+    texture_df['TDEP'] = (texture_df['Profundidade'] // step) * step
+    texture_df = texture_df.drop(columns=['Profundidade']).round(4)
+
+    stats = {prop: 'mean' for prop in TEXTURE_PROPERTIES}
+    results = texture_df.groupby('TDEP').agg(stats).reset_index()
+    results['TDEP'] = results['TDEP'].round(2)
+    return results
+
+
+def make_features(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({'Profundidade': np.round(1500 + np.arange(rows) * 0.00254, 5)})
+    for prop in TEXTURE_PROPERTIES:
+        features[prop] = rng.random(rows)
+    return features
+
+
+def measure(function, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming depth binning")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows of texture features.")
+    parser.add_argument("--chunk", type=int, default=65536, help="Rows reduced at a time by bin_by_depth.")
+    args = parser.parse_args()
+
+    features = make_features(args.rows)
+    print(f"{args.rows} feature rows")
+
+    expected, notebook_seconds, notebook_peak = measure(notebook_binning, features)
+    result, stream_seconds, stream_peak = measure(
+        bin_by_depth, features, TEXTURE_PROPERTIES, 0.01, 'Profundidade', statistics=['mean'], chunk_rows=args.chunk
+    )
+
+    # A depth on a bin edge stays in its bin, and one just above the edge is not rounded up to the next
+    assert depth_bin_keys([400.03, 400.02996], 0.01).tolist() == [40003, 40002]
+
+    float_keys = np.round((features['Profundidade'] // 0.01) * 0.01, 2)
+    bin_keys = np.round(depth_bin_keys(features['Profundidade'], 0.01) * 0.01, 2)
+    drifted = int((float_keys != bin_keys).sum())
+
+    # The notebook rounds the features to 4 decimals before averaging
+    merged = expected.merge(result, on='TDEP')
+    moved = float_keys != bin_keys
+    agree = ~merged['TDEP'].isin(np.union1d(bin_keys[moved], float_keys[moved]))
+    for prop in TEXTURE_PROPERTIES:
+        np.testing.assert_allclose(merged.loc[agree, f"{prop}_mean"], merged.loc[agree, prop], atol=1e-4)
+
+    print(f"floor + round + groupby:  {notebook_seconds:7.3f} s  peak {notebook_peak:8.1f} MiB  {len(expected)} bins")
+    print(f"bin_by_depth (mean):      {stream_seconds:7.3f} s  peak {stream_peak:8.1f} MiB  {len(result)} bins")
+    print(f"rows put in the previous bin by the float keys: {drifted}")
+
+    _, seconds, peak = measure(bin_by_depth, features, TEXTURE_PROPERTIES, 0.01, 'Profundidade', chunk_rows=args.chunk)
+    print(f"bin_by_depth (all stats): {seconds:7.3f} s  peak {peak:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the `pd.merge(..., on='TDEP')` of the notebooks, on rounded float depths, with the sorted merge
+on integer depth keys of `merge_on_depth_key`.
+
+The left frame is the 0.01 m grid of the resampled logs (`depth_grid`). The right frame has the same
+depths built as in resolution_preprocess_02.ipynb, `(depth // step) * step` without the final round, and
+is shuffled, so the float join both hashes floats and loses the rows whose depths carry float error.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_depth_key_merge --rows 2000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.data_preprocessing import depth_grid
+from utils.depth_keys import add_depth_key, merge_on_depth_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the joins on integer depth keys")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Depths of the 0.01 m grid.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    grid = depth_grid(400, 400 + (args.rows - 1) * 0.01)
+    logs = pd.DataFrame({'TDEP': grid, 'GR': rng.random(len(grid)), 'RHOB': rng.random(len(grid))})
+
+    binned = (np.arange(len(grid)) + 40000) * 0.01
+    textures = pd.DataFrame({'TDEP': binned, 'contrast': rng.random(len(grid)), 'energy': rng.random(len(grid))})
+    textures = textures.sample(frac=1, random_state=0).reset_index(drop=True)
+    print(f"{len(logs)} log depths, {len(textures)} texture depths")
+
+    start = time.perf_counter()
+    float_merged = pd.merge(logs, textures, on='TDEP')
+    float_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    logs_keyed, textures_keyed = add_depth_key(logs), add_depth_key(textures)
+    key_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    key_merged = merge_on_depth_key(logs_keyed, textures_keyed)
+    merge_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pandas_key_merged = pd.merge(logs_keyed.drop(columns=['TDEP']), textures_keyed.drop(columns=['TDEP']),
+                                 on='DEPTH_KEY', sort=True)
+    pandas_key_seconds = time.perf_counter() - start
+
+    # Frames coming out of the pipeline are already in depth order, and the sorted merge skips the sort
+    textures_sorted = textures_keyed.sort_values('DEPTH_KEY').reset_index(drop=True)
+    start = time.perf_counter()
+    merge_on_depth_key(logs_keyed, textures_sorted)
+    sorted_seconds = time.perf_counter() - start
+
+    assert len(pandas_key_merged) == len(key_merged)
+    np.testing.assert_array_equal(pandas_key_merged['contrast'].to_numpy(), key_merged['contrast'].to_numpy())
+
+    print(f"pd.merge on float TDEP:      {float_seconds:7.3f} s  {len(float_merged)} rows "
+          f"({len(logs) - len(float_merged)} lost to float error)")
+    print(f"pd.merge on DEPTH_KEY:       {pandas_key_seconds:7.3f} s  {len(pandas_key_merged)} rows")
+    print(f"merge_on_depth_key:          {merge_seconds:7.3f} s  {len(key_merged)} rows "
+          f"(+ {key_seconds:.3f} s to add the keys)")
+    print(f"merge_on_depth_key, sorted:  {sorted_seconds:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Runs `download_files` against the `LocalShareServer` stand-in with a per-request latency, as a distant
+share: one connection at a time (as the single browser session of data_collection_bot.py) against a
+pool of connections, then a run with the files already present, and one with faults injected (503
+answers and responses cut midway) that the retries and the range requests must recover from, and one
+with complete partial files left by a run stopped before their rename.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_downloads --files 40 --size-kb 512 --latency 0.05
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from utils.downloads import download_files, file_checksum
+from utils.share_server import LocalShareServer
+
+
+def write_share(share_dir, n_files, size):
+    rng = np.random.default_rng(0)
+    items = []
+    for i in range(n_files):
+        path = f"./1-Bacia_de_Sergipe/POCO/Categoria-1/1-BRSA-{i}-SE/Perfil Convencional/1-brsa-{i}-se_fmi.dlis"
+        file_path = os.path.join(share_dir, *path.split('/')[2:])
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(rng.bytes(size))
+        items.append({'path': path, 'checksum': None})
+    return items
+
+
+def run(items, output_dir, server, workers):
+    start = time.perf_counter()
+    reports = download_files(items, output_dir, server.share_url, workers, retries=10, backoff=0.01, timeout=10)
+    return reports, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent download manager")
+    parser.add_argument("--files", type=int, default=40, help="Number of files.")
+    parser.add_argument("--size-kb", type=int, default=512, help="Size of each file, in KiB.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latency of each request, in seconds.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent connections of the pool.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_path:
+        share_dir, output_dir = os.path.join(base_path, 'share'), os.path.join(base_path, 'output')
+        items = write_share(share_dir, args.files, args.size_kb * 1024)
+        results = []
+
+        with LocalShareServer(share_dir, latency=args.latency) as server:
+            for workers in (1, args.workers):
+                shutil.rmtree(output_dir, ignore_errors=True)
+                results.append((f"{workers} connection(s)", *run(items, output_dir, server, workers)))
+            results.append(("files already present", *run(items, output_dir, server, args.workers)))
+
+        shutil.rmtree(output_dir, ignore_errors=True)
+        with LocalShareServer(share_dir, latency=args.latency, fail_every=7, drop_after=args.size_kb * 1024 // 2 + 1) as server:
+            results.append(("faults injected", *run(items, output_dir, server, args.workers)))
+
+        # Complete partial files, as left by a run stopped before the rename, only need their checks
+        for item in items[::4]:
+            path = os.path.join(output_dir, *item['path'].split('/')[2:])
+            os.replace(path, f"{path}.part")
+        with LocalShareServer(share_dir, latency=args.latency) as server:
+            results.append(("complete partial files", *run(items, output_dir, server, args.workers)))
+        assert (results[-1][1]['status'] != 'failed').all() and results[-1][1]['bytes'].sum() == 0
+
+        for item in items:
+            path = os.path.join(*item['path'].split('/')[2:])
+            assert file_checksum(os.path.join(output_dir, path)) == file_checksum(os.path.join(share_dir, path))
+
+        for name, reports, seconds in results:
+            counts = reports['status'].value_counts().to_dict()
+            print(f"{name:24} {seconds:7.3f} s  {reports['bytes'].sum() / 2 ** 20:6.1f} MiB  "
+                  f"{reports['attempts'].sum():4} attempts  {counts}")
+
+
+if __name__ == "__main__":
+    main()
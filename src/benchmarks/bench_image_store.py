@@ -0,0 +1,93 @@
+"""
+Compares the peak memory (RSS) of the texture extraction of cast_test_01.ipynb, which loads the whole
+amplitude CSV in pandas, with the extraction from an image log store read one block at a time.
+
+Each path runs in its own process, so its peak RSS is not mixed with the other's.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_image_store --rows 26000 --samples 180
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_image_log
+from utils.image_store import ImageLogStore, convert_image_csv
+from utils.texture import extract_store_textures, extract_textures
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def notebook_textures(csv_path: str) -> pd.DataFrame:
+    cast_df = pd.read_csv(csv_path)
+    depth = cast_df['MD']
+    amp_cols = [col for col in cast_df.columns if col.startswith('3')]
+    amps = cast_df[amp_cols].values
+
+    amp_min, amp_max = amps.min(), amps.max()
+    amps_normalized = ((amps - amp_min) / (amp_max - amp_min) * 255).astype(np.uint8)
+
+    return extract_textures(amps_normalized, depth)
+
+
+def store_textures(store_path: str) -> pd.DataFrame:
+    return extract_store_textures(ImageLogStore(store_path), block_windows=1024)
+
+
+def measure(function, path, queue):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    textures = function(path)
+    queue.put((time.perf_counter() - start, peak_rss_mb() - baseline, textures.to_numpy()))
+
+
+def run_isolated(function, path):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(function, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory of the texture extraction from an image log store")
+    parser.add_argument("--rows", type=int, default=26_000, help="Depth samples of the image.")
+    parser.add_argument("--samples", type=int, default=180, help="Azimuthal samples of the image.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        csv_path = os.path.join(base_dir, '3-BRSA-778-SE_AMP [NONE].csv')
+        store_path = os.path.join(base_dir, 'AMP')
+
+        amplitudes = pd.DataFrame(make_image_log(args.rows, args.samples), columns=[f"3_{i}" for i in range(args.samples)])
+        amplitudes.insert(0, 'MD', 400 + np.arange(args.rows) * 0.00254)
+        amplitudes.to_csv(csv_path, index=False)
+        del amplitudes
+
+        start = time.perf_counter()
+        convert_image_csv(csv_path, store_path)
+        print(f"{args.rows} x {args.samples} image: CSV {os.path.getsize(csv_path) / 1e6:.1f} MB, "
+              f"store {os.path.getsize(os.path.join(store_path, 'image.bin')) / 1e6:.1f} MB, "
+              f"converted in {time.perf_counter() - start:.1f} s")
+
+        notebook_seconds, notebook_rss, expected = run_isolated(notebook_textures, csv_path)
+        store_seconds, store_rss, result = run_isolated(store_textures, store_path)
+
+    # The CSV holds float64 amplitudes and the store float32, so a few gray levels can differ
+    same = "same features" if np.allclose(result, expected, rtol=1e-2, atol=1e-2) else "FEATURES DIFFER"
+
+    print(f"CSV + pandas:  {notebook_seconds:6.1f} s, peak RSS +{notebook_rss:7.1f} MB")
+    print(f"image store:   {store_seconds:6.1f} s, peak RSS +{store_rss:7.1f} MB  ({same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Checks `resample_lithology` against the loop of lithology_resolution_preprocess.ipynb and compares their speed.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_lithology_resampling --lithology lithology_3_BRSA_778_SE.csv
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.data_preprocessing import depth_grid, resample_lithology
+
+
+def notebook_loop(df_lithology: pd.DataFrame, new_tdep: np.ndarray) -> pd.DataFrame:
+    """
+    The resampling loop of lithology_resolution_preprocess.ipynb.
+    """
+    results = []
+
+    for depth in new_tdep:
+        if depth in df_lithology['TDEP'].values:
+            lithology = df_lithology[df_lithology['TDEP'] == depth]['LITOLOGIA'].values[0]
+        else:
+            below = df_lithology[df_lithology['TDEP'] < depth].tail(1)
+            above = df_lithology[df_lithology['TDEP'] > depth].head(1)
+
+            if below.empty or above.empty:
+                lithology = np.nan
+            else:
+                mid = round((below['TDEP'].values[0] + above['TDEP'].values[0]) / 2, 2)
+
+                if depth < mid:
+                    lithology = below['LITOLOGIA'].values[0]
+                else:
+                    lithology = above['LITOLOGIA'].values[0]
+
+        results.append([depth, lithology])
+
+    return pd.DataFrame(results, columns=['TDEP', 'Lithology'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lithology resampling to the 0.01 m grid")
+    parser.add_argument("--lithology", type=str, default='lithology_3_BRSA_778_SE.csv',
+                        help="CSV with the TDEP and LITOLOGIA columns.")
+    parser.add_argument("--max-rows", type=int, default=1500,
+                        help="Described depths used, since the notebook loop is O(N*M).")
+    args = parser.parse_args()
+
+    df_lithology = pd.read_csv(args.lithology).iloc[:args.max_rows]
+    new_tdep = depth_grid(df_lithology['TDEP'].min(), df_lithology['TDEP'].max())
+    # Depths outside of the described range must get NaN
+    new_tdep = np.concatenate([[new_tdep[0] - 1.0], new_tdep, [new_tdep[-1] + 1.0]])
+    print(f"{len(df_lithology)} described depths, {len(new_tdep)} target depths")
+
+    start = time.perf_counter()
+    expected = notebook_loop(df_lithology, new_tdep)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = resample_lithology(df_lithology, new_tdep)
+    vectorized_seconds = time.perf_counter() - start
+
+    same = expected['Lithology'].astype(object).fillna('<NaN>').to_numpy() == result['Lithology'].astype(object).fillna('<NaN>').to_numpy()
+    assert same.all(), f"{(~same).sum()} depths differ, first at {expected['TDEP'][~same].iloc[0]}"
+    np.testing.assert_array_equal(expected['TDEP'].to_numpy(), result['TDEP'].to_numpy())
+
+    print(f"notebook loop:      {loop_seconds:8.3f} s")
+    print(f"resample_lithology: {vectorized_seconds:8.3f} s  (identical output)")
+    print(f"speedup:            {loop_seconds / vectorized_seconds:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
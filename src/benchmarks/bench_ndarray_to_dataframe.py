@@ -0,0 +1,79 @@
+"""
+Compares the vectorized `ndarray_to_dataframe` with the previous row-by-row implementation.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_ndarray_to_dataframe --rows 100000 --channels 40 --image-samples 192
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_frame_curves
+from utils.data_preprocessing import ndarray_to_dataframe
+
+
+def legacy_ndarray_to_dataframe(logical_files_dict):
+    """
+    Previous implementation, which extracts every column with a list comprehension over the records.
+    """
+    logical_files_df_dict = {}
+
+    for logical_file_index, logical_file in enumerate(logical_files_dict.values()):
+        dataframe_dict = {}
+
+        for frame_index, frame in enumerate(logical_file.values()):
+            frame_dict = {}
+
+            for i, channel_name in enumerate(frame.dtype.names):
+                frame_dict[channel_name] = [t[i] for t in frame]
+
+            dataframe_dict[frame_index] = pd.DataFrame(frame_dict)
+
+        logical_files_df_dict[logical_file_index] = dataframe_dict
+
+    return logical_files_df_dict
+
+
+def best_of(func, arg, repeat):
+    """
+    Returns the best wall time of `repeat` calls and the result of the last call.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the frame to DataFrame conversion")
+    parser.add_argument("--rows", type=int, default=100_000, help="Depth samples per frame.")
+    parser.add_argument("--channels", type=int, default=40, help="Scalar curves per frame.")
+    parser.add_argument("--image-samples", type=int, default=192, help="Samples of the image channel (0 to disable).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs; the best one is reported.")
+    args = parser.parse_args()
+
+    curves = make_frame_curves(args.rows, args.channels, args.image_samples)
+    logical_files_dict = {0: {0: curves}}
+    print(f"Frame: {args.rows} rows, {len(curves.dtype.names)} channels, {curves.nbytes / 1e6:.1f} MB")
+
+    legacy_time, legacy = best_of(legacy_ndarray_to_dataframe, logical_files_dict, args.repeat)
+    vectorized_time, vectorized = best_of(ndarray_to_dataframe, logical_files_dict, args.repeat)
+
+    # Scalar channels must be identical; the image channel is now a block of columns
+    legacy_df, vectorized_df = legacy[0][0], vectorized[0][0]
+    for channel_name in curves.dtype.names:
+        if curves[channel_name].ndim == 1:
+            np.testing.assert_array_equal(legacy_df[channel_name].to_numpy(), vectorized_df[channel_name].to_numpy())
+    if args.image_samples:
+        np.testing.assert_array_equal(np.stack(legacy_df['IMAGE'].to_numpy()),
+                                      vectorized_df.filter(like='IMAGE[').to_numpy())
+
+    print(f"legacy:     {legacy_time:8.3f} s")
+    print(f"vectorized: {vectorized_time:8.3f} s")
+    print(f"speedup:    {legacy_time / vectorized_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures the speedup of the process pool used by `ingest_dlis_files` on synthetic DLIS-like frames.
+
+Each task decodes a big-endian raw frame (as stored in DLIS), converts it to a DataFrame and writes it
+as CSV, which is the CPU-bound part of the ingestion. The output of every worker count is hashed to check
+that it does not depend on the number of workers.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_parallel_ingestion --wells 8 --logical-files 2 --rows 50000 --workers 1 2 4
+"""
+import argparse
+import hashlib
+import glob
+import os
+import tempfile
+import time
+from functools import partial
+import numpy as np
+from benchmarks.synthetic import make_frame_curves
+from utils.data_preprocessing import frame_to_dataframe
+from utils.dlis_ingestion import map_isolated, write_frame
+
+
+def make_raw_frame(seed: int, rows: int, channels: int, image_samples: int) -> bytes:
+    """
+    Creates the big-endian bytes of a synthetic frame, as they would be read from a DLIS file.
+    """
+    curves = make_frame_curves(rows, channels, image_samples, seed=seed)
+    return curves.astype(curves.dtype.newbyteorder('>')).tobytes()
+
+
+def decode_synthetic_frame(task, base_dir: str) -> int:
+    """
+    Decodes one raw frame and writes it with the ingestion writer. Returns the number of rows.
+    """
+    well, logical_file_index, raw, native_dtype = task
+    curves = np.frombuffer(raw, dtype=native_dtype.newbyteorder('>')).astype(native_dtype)
+
+    write_frame(frame_to_dataframe(curves), base_dir, well, logical_file_index, 0)
+    return len(curves)
+
+
+def digest(base_dir: str) -> str:
+    """
+    Hashes the relative paths and the contents of the files written in the base directory.
+    """
+    md5 = hashlib.md5()
+    for file in sorted(glob.glob(os.path.join(base_dir, '**', '*.csv'), recursive=True)):
+        md5.update(os.path.relpath(file, base_dir).encode())
+        with open(file, 'rb') as f:
+            md5.update(f.read())
+    return md5.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel DLIS ingestion on synthetic frames")
+    parser.add_argument("--wells", type=int, default=8, help="Number of synthetic wells.")
+    parser.add_argument("--logical-files", type=int, default=2, help="Logical files per well.")
+    parser.add_argument("--rows", type=int, default=50_000, help="Depth samples per frame.")
+    parser.add_argument("--channels", type=int, default=20, help="Scalar curves per frame.")
+    parser.add_argument("--image-samples", type=int, default=0, help="Samples of the image channel (0 to disable).")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4], help="Worker counts to compare.")
+    args = parser.parse_args()
+
+    native_dtype = make_frame_curves(1, args.channels, args.image_samples).dtype
+    tasks = [
+        (f"WELL_{w}", lf, make_raw_frame(w * args.logical_files + lf, args.rows, args.channels, args.image_samples),
+         native_dtype)
+        for w in range(args.wells)
+        for lf in range(args.logical_files)
+    ]
+    print(f"{len(tasks)} frames of {args.rows} rows ({sum(len(t[2]) for t in tasks) / 1e6:.1f} MB raw), "
+          f"{os.cpu_count()} CPUs")
+
+    baseline = None
+    reference_digest = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as base_dir:
+            start = time.perf_counter()
+            results = map_isolated(partial(decode_synthetic_frame, base_dir=base_dir), tasks, workers)
+            seconds = time.perf_counter() - start
+
+            failures = [r for r in results if isinstance(r, Exception)]
+            output_digest = digest(base_dir)
+
+        baseline = baseline or seconds
+        reference_digest = reference_digest or output_digest
+        deterministic = "same output" if output_digest == reference_digest else "OUTPUT DIFFERS"
+        print(f"workers={workers:2d}: {seconds:7.2f} s  speedup {baseline / seconds:5.2f}x  "
+              f"failures={len(failures)}  {deterministic}")
+
+
+if __name__ == "__main__":
+    main()
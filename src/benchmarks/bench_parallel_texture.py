@@ -0,0 +1,45 @@
+"""
+Measures the throughput of the tiled, multi-process texture extraction on a synthetic image log.
+
+The time and output of every worker count are compared with those of a serial run (workers=1), which
+is always timed first and must be matched bit for bit.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_parallel_texture --rows 26000 --samples 180 --workers 1 2 4
+"""
+import argparse
+import os
+import time
+import numpy as np
+from benchmarks.synthetic import make_image_log
+from utils.texture import extract_textures, normalize_gray_levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tiled parallel texture extraction")
+    parser.add_argument("--rows", type=int, default=26_000, help="Depth samples of the image.")
+    parser.add_argument("--samples", type=int, default=180, help="Azimuthal samples of the image.")
+    parser.add_argument("--window", type=int, default=11, help="Rows of the sliding window.")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4], help="Worker counts to compare.")
+    args = parser.parse_args()
+
+    image = normalize_gray_levels(make_image_log(args.rows, args.samples))
+    print(f"{args.rows} x {args.samples} image, window of {args.window} rows, {os.cpu_count()} CPUs")
+
+    def run(workers):
+        start = time.perf_counter()
+        textures = extract_textures(image, window_size=args.window, workers=workers)
+        return textures, time.perf_counter() - start
+
+    # The serial run is the baseline and the reference, whatever the worker counts compared
+    reference, baseline = run(1)
+
+    for workers in args.workers:
+        textures, seconds = (reference, baseline) if workers == 1 else run(workers)
+        identical = "bit-identical" if np.array_equal(textures.to_numpy(), reference.to_numpy()) else "OUTPUT DIFFERS"
+
+        print(f"workers={workers:2d}: {seconds:7.2f} s  {len(textures) / seconds:9.0f} windows/s  "
+              f"speedup {baseline / seconds:5.2f}x  {identical}")
+
+if __name__ == "__main__":
+    main()
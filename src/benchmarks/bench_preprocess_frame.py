@@ -0,0 +1,89 @@
+"""
+Compares the fused `preprocess_frame` with the six passes of preprocess_dlis.ipynb.
+
+Reports the wall time and, with tracemalloc, the peak and total memory allocated by each approach
+on a synthetic raw frame with null values.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_preprocess_frame --rows 200000 --channels 40
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_frame_curves
+from utils.data_preprocessing import frame_to_dataframe, preprocess_frame
+
+CASING = {
+    'surface_coating': 450.0,
+    'intermediary_coating': 1200.0,
+    'surface_drill': 17.5,
+    'intermediary_drill': 12.25
+}
+
+
+def notebook_passes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The cells of preprocess_dlis.ipynb applied to a single frame.
+    """
+    df = df.drop('FRAMENO', axis=1)
+    df = df.rename(columns=lambda col: 'TDEP' if col.startswith('INDEX') else col)
+    df['TDEP'] = df['TDEP'].round(1)
+    df.replace([-999.25], [None], inplace=True)
+
+    for coating in (CASING['surface_coating'], CASING['intermediary_coating']):
+        if abs(df['TDEP'].min() - coating) < 20:
+            df = df.loc[df['TDEP'] >= coating + 5].reset_index(drop=True)
+
+    bins = [0, CASING['surface_coating'], CASING['intermediary_coating'], float('inf')]
+    labels = [CASING['surface_drill'], CASING['intermediary_drill'], 8.5]
+    df['BS'] = pd.cut(df['TDEP'], bins=bins, labels=labels, right=False)
+    return df
+
+
+def measure(func, df):
+    """
+    Returns the wall time, the peak and the total allocated bytes of one call, and its result.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(df)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    total = sum(stat.size for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return seconds, peak, total, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fused frame preprocessing")
+    parser.add_argument("--rows", type=int, default=200_000, help="Depth samples of the frame.")
+    parser.add_argument("--channels", type=int, default=40, help="Scalar curves of the frame.")
+    parser.add_argument("--null-fraction", type=float, default=0.05, help="Fraction of null samples.")
+    args = parser.parse_args()
+
+    df = frame_to_dataframe(make_frame_curves(args.rows, args.channels)).copy()
+    curves = [col for col in df.columns if col.startswith('CURVE')]
+    rng = np.random.default_rng(0)
+    for col in curves:
+        df.loc[rng.random(args.rows) < args.null_fraction, col] = -999.25
+    print(f"Frame: {df.shape[0]} rows x {df.shape[1]} columns, {df.memory_usage().sum() / 1e6:.1f} MB")
+
+    notebook_seconds, notebook_peak, _, notebook = measure(notebook_passes, df)
+    fused_seconds, fused_peak, fused_total, fused = measure(lambda frame: preprocess_frame(frame, **CASING), df)
+
+    # Same values; the notebook leaves object columns and a categorical BS
+    object_columns = int((notebook.dtypes == object).sum())
+    np.testing.assert_allclose(notebook[curves].to_numpy(dtype=np.float64), fused[curves].to_numpy())
+    np.testing.assert_allclose(notebook['BS'].astype(float).to_numpy(), fused['BS'].to_numpy())
+
+    print(f"notebook passes: {notebook_seconds:7.3f} s  peak {notebook_peak / 1e6:8.1f} MB  "
+          f"({object_columns} object columns)")
+    print(f"preprocess_frame: {fused_seconds:6.3f} s  peak {fused_peak / 1e6:8.1f} MB  "
+          f"retained {fused_total / 1e6:.1f} MB")
+    print(f"speedup {notebook_seconds / fused_seconds:.1f}x, peak memory {notebook_peak / fused_peak:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
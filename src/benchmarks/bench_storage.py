@@ -0,0 +1,69 @@
+"""
+Compares the CSV and columnar storage backends on the `_BRSA_*_final.csv` tables.
+
+For each backend the tables are written, read in full and read with a projection of two columns
+(TDEP and GR). The plain `pd.read_csv` used by `load_csv_files` is reported as the baseline.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_storage --tile 4
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+import pandas as pd
+from utils.storage import STORAGE_BACKENDS, frame_file_name, load_frame, save_frame
+
+PROJECTED_COLUMNS = ['TDEP', 'GR']
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CSV and columnar storage backends")
+    parser.add_argument("--tables", type=str, default='_BRSA_*_final.csv', help="Glob of the CSV tables to use.")
+    parser.add_argument("--tile", type=int, default=1, help="Repeat the rows of each table this many times.")
+    args = parser.parse_args()
+
+    tables = {os.path.basename(path): pd.concat([pd.read_csv(path)] * args.tile, ignore_index=True)
+              for path in sorted(glob.glob(args.tables))}
+    print(f"{len(tables)} tables, {sum(len(df) for df in tables.values())} rows")
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        # Baseline: the tables as they are read today
+        paths = []
+        for name, df in tables.items():
+            path = os.path.join(base_dir, 'baseline', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_csv(path, index=False)
+            paths.append(path)
+        baseline = sum(timed(pd.read_csv, path)[0] for path in paths)
+        print(f"{'backend':10s} {'write s':>9s} {'read s':>9s} {'read 2 cols s':>14s} {'MB':>7s} {'vs read_csv':>12s}")
+        print(f"{'read_csv':10s} {'':>9s} {baseline:9.3f}")
+
+        for backend in STORAGE_BACKENDS:
+            write_seconds = read_seconds = projected_seconds = 0.0
+            size = 0
+
+            for name, df in tables.items():
+                path = os.path.join(base_dir, backend, frame_file_name(name, backend))
+
+                write_seconds += timed(save_frame, df, path, backend)[0]
+                seconds, loaded = timed(load_frame, path)
+                read_seconds += seconds
+                projected_seconds += timed(load_frame, path, PROJECTED_COLUMNS)[0]
+                size += os.path.getsize(path)
+
+                pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+
+            print(f"{backend:10s} {write_seconds:9.3f} {read_seconds:9.3f} {projected_seconds:14.3f} "
+                  f"{size / 1e6:7.2f} {baseline / read_seconds:11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
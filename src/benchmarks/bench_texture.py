@@ -0,0 +1,73 @@
+"""
+Compares the incremental sliding-window GLCM of `extract_textures` and its sparse per-window mode with
+the per-window graycomatrix + graycoprops loop of cast_test_01.ipynb.
+
+The per-window methods are only run on the first `--reference-rows` rows and their time for the whole
+image is extrapolated from them. The memory of one window is the peak traced by tracemalloc.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_texture --rows 26000 --samples 180
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from benchmarks.synthetic import make_image_log
+from utils.texture import extract_textures, normalize_gray_levels
+
+
+def window_peak_bytes(image, window_size, method):
+    """
+    Peak memory allocated while computing the features of one window.
+    """
+    tracemalloc.start()
+    extract_textures(image[:window_size], window_size=window_size, method=method)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sliding-window GLCM texture extraction")
+    parser.add_argument("--rows", type=int, default=26_000, help="Depth samples of the image.")
+    parser.add_argument("--samples", type=int, default=180, help="Azimuthal samples of the image.")
+    parser.add_argument("--window", type=int, default=11, help="Rows of the sliding window.")
+    parser.add_argument("--reference-rows", type=int, default=300, help="Rows processed by the per-window methods.")
+    args = parser.parse_args()
+
+    amplitudes = make_image_log(args.rows, args.samples)
+    image = normalize_gray_levels(amplitudes)
+    # Same gray levels as the min-max normalization of cast_test_01.ipynb
+    notebook = (amplitudes - amplitudes.min()) / (amplitudes.max() - amplitudes.min()) * 255
+    assert np.array_equal(image, notebook.astype(np.uint8))
+    print(f"{args.rows} x {args.samples} image, window of {args.window} rows")
+
+    start = time.perf_counter()
+    textures = extract_textures(image, window_size=args.window)
+    incremental_seconds = time.perf_counter() - start
+
+    reference_rows = min(args.reference_rows, args.rows)
+    per_window = {}
+    for method in ('skimage', 'sparse'):
+        start = time.perf_counter()
+        expected = extract_textures(image[:reference_rows], window_size=args.window, method=method)
+        per_window[method] = (time.perf_counter() - start) / max(len(expected), 1)
+
+        np.testing.assert_allclose(
+            textures.iloc[:len(expected)].to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12
+        )
+
+    skimage_seconds = per_window['skimage'] * len(textures)
+    sparse_seconds = per_window['sparse'] * len(textures)
+
+    print(f"skimage per window:  {skimage_seconds:8.1f} s (extrapolated from {len(expected)} windows), "
+          f"{window_peak_bytes(image, args.window, 'skimage') / 1024:7.0f} KiB per window")
+    print(f"sparse per window:   {sparse_seconds:8.1f} s (extrapolated), "
+          f"{window_peak_bytes(image, args.window, 'sparse') / 1024:7.0f} KiB per window")
+    print(f"incremental:         {incremental_seconds:8.1f} s")
+    print(f"speedup:             {skimage_seconds / sparse_seconds:8.1f}x sparse, "
+          f"{skimage_seconds / incremental_seconds:.1f}x incremental")
+
+
+if __name__ == "__main__":
+    main()
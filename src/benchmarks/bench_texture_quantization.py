@@ -0,0 +1,85 @@
+"""
+Measures the cost of the texture extraction and the drift of its features when the image log is
+quantized to fewer gray levels than the 256 of cast_test_01.ipynb.
+
+The drift of each feature is measured against the 256-level features as the Pearson correlation of
+the two depth series: 1 means the same shape, whatever the scale (the contrast, for instance, scales
+with the square of the number of levels). The median and the worst feature are reported.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_texture_quantization --rows 6000 --levels 64 32 16
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.synthetic import make_image_log
+from utils.texture import DEFAULT_ANGLES, DEFAULT_DISTANCES, extract_textures, normalize_gray_levels, quantize_gray_levels
+
+
+def timed_textures(image, levels, reference_rows):
+    start = time.perf_counter()
+    textures = extract_textures(image, levels=levels)
+    incremental_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = extract_textures(image[:reference_rows], levels=levels, method='skimage')
+    skimage_per_window = (time.perf_counter() - start) / len(reference)
+
+    return textures, incremental_seconds, skimage_per_window
+
+
+def drift(textures, baseline):
+    """
+    Median and worst correlation of the features with the baseline, and the name of the worst feature.
+    """
+    correlations = {}
+    for column in baseline.columns[1:]:
+        x, y = textures[column].to_numpy(), baseline[column].to_numpy()
+        if x.std() > 0 and y.std() > 0:
+            correlations[column] = np.corrcoef(x, y)[0, 1]
+
+    worst = min(correlations, key=correlations.get)
+    return np.median(list(correlations.values())), correlations[worst], worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gray-level quantization of the texture features")
+    parser.add_argument("--rows", type=int, default=6_000, help="Depth samples of the image.")
+    parser.add_argument("--samples", type=int, default=180, help="Azimuthal samples of the image.")
+    parser.add_argument("--levels", type=int, nargs='+', default=[64, 32, 16], help="Gray levels to compare.")
+    parser.add_argument("--clip", type=float, nargs=2, default=[1.0, 99.0], help="Clipping percentiles.")
+    parser.add_argument("--reference-rows", type=int, default=150, help="Rows processed by the skimage loop.")
+    args = parser.parse_args()
+
+    # Amplitudes outside a fixed range go to the first or last level instead of wrapping around
+    assert normalize_gray_levels([[-1, 0, 5, 10, 12]], 256, (0, 10)).tolist() == [[0, 0, 127, 255, 255]]
+    # A constant image has a single level, the same whatever the quantization
+    for method in ('equal_width', 'equal_frequency'):
+        assert quantize_gray_levels(np.full((4, 4), 3.0), 16, method).max() == 0
+
+    amplitudes = make_image_log(args.rows, args.samples)
+    n_offsets = len(DEFAULT_DISTANCES) * len(DEFAULT_ANGLES)
+    print(f"{args.rows} x {args.samples} image, {n_offsets} offsets")
+
+    baseline, baseline_seconds, baseline_skimage = timed_textures(
+        normalize_gray_levels(amplitudes, 256), 256, args.reference_rows
+    )
+    print(f"{'quantization':38s} {'GLCM KiB':>9s} {'skimage ms/win':>15s} {'incremental s':>14s} "
+          f"{'median corr':>12s} {'worst corr':>11s}  worst feature")
+    print(f"{'256 levels, min-max (baseline)':38s} {256 ** 2 * n_offsets * 8 / 1024:9.0f} "
+          f"{baseline_skimage * 1e3:15.2f} {baseline_seconds:14.2f}")
+
+    for levels in args.levels:
+        for method in ('equal_width', 'equal_frequency'):
+            for clip in (None, tuple(args.clip)):
+                image = quantize_gray_levels(amplitudes, levels, method, clip)
+                textures, seconds, skimage_per_window = timed_textures(image, levels, args.reference_rows)
+                median, worst_correlation, worst = drift(textures, baseline)
+
+                label = f"{levels} levels, {method}" + (f", clip {clip[0]:g}-{clip[1]:g}%" if clip else "")
+                print(f"{label:38s} {levels ** 2 * n_offsets * 8 / 1024:9.0f} {skimage_per_window * 1e3:15.2f} "
+                      f"{seconds:14.2f} {median:12.4f} {worst_correlation:11.4f}  {worst}")
+
+
+if __name__ == "__main__":
+    main()
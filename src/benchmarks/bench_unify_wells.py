@@ -0,0 +1,79 @@
+"""
+Compares the chained `pd.merge(..., how='inner')` of unifies_dfs.ipynb with the N-way sorted merge of
+`merge_sorted_frames` on the spliced curves of a well.
+
+Each synthetic curve is on the 0.1524 m grid of the conventional logs, with its own top and bottom. The
+depths are built the same way for every curve, so the float join loses no rows here; the comparison is
+of speed only, with and without the DEPTH_KEY column already in the frames (preprocess_dlis.py --depth-key).
+The curves are also joined with a random tenth of their samples dropped, so they are no longer slices of
+one grid and `merge_sorted_frames` falls back to linear merges of the keys.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_unify_wells --rows 500000 --curves 6
+"""
+import argparse
+import time
+from functools import reduce
+import numpy as np
+import pandas as pd
+from utils.depth_keys import add_depth_key, merge_sorted_frames
+
+
+def make_curves(rows, n_curves, seed=0, dropped=0.0):
+    rng = np.random.default_rng(seed)
+    curves = []
+    for i in range(n_curves):
+        first = int(rng.integers(0, rows // 10))
+        depth = np.round(400 + (first + np.arange(rows - first - int(rng.integers(0, rows // 10)))) * 0.1524, 4)
+        depth = depth[rng.random(len(depth)) >= dropped]
+        curves.append(pd.DataFrame({'TDEP': depth, f"CURVE_{i}": rng.random(len(depth))}))
+    return curves
+
+
+def compare(curves, names, grid):
+    keyed_curves = [add_depth_key(curve) for curve in curves]
+
+    for how in ('inner', 'outer'):
+        start = time.perf_counter()
+        chained = reduce(lambda left, right: pd.merge(left, right, on='TDEP', how=how), curves)
+        chained = chained.sort_values('TDEP').reset_index(drop=True)
+        chained_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        merged = merge_sorted_frames(curves, how)
+        merged_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        keyed = merge_sorted_frames(keyed_curves, how)
+        keyed_seconds = time.perf_counter() - start
+
+        np.testing.assert_array_equal(chained[names].to_numpy(), merged[names].to_numpy())
+        np.testing.assert_array_equal(chained[names].to_numpy(), keyed[names].to_numpy())
+        print(f"{how:5}  {grid:9}  chained pd.merge: {chained_seconds:7.3f} s   merge_sorted_frames: "
+              f"{merged_seconds:7.3f} s   with keys: {keyed_seconds:7.3f} s   {len(merged)} rows (same values)")
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the N-way sorted merge of the well curves")
+    parser.add_argument("--rows", type=int, default=500_000, help="Depths of the longest curve.")
+    parser.add_argument("--curves", type=int, default=6, help="Number of curves.")
+    args = parser.parse_args()
+
+    names = [f"CURVE_{i}" for i in range(args.curves)]
+    for grid, dropped in (('same grid', 0.0), ('gaps', 0.1)):
+        compare(make_curves(args.rows, args.curves, dropped=dropped), names, grid)
+
+    curves = make_curves(args.rows, args.curves)
+    start = time.perf_counter()
+    merged = merge_sorted_frames(curves, 'asof', tolerance=0.1)
+    print(f"asof   merge_sorted_frames: {time.perf_counter() - start:7.3f} s   {len(merged)} rows")
+
+    # Repeated depths are not multiplied: the frame gives its first row at each of them
+    repeated = merge_sorted_frames([pd.DataFrame({'TDEP': [5.0, 5.0, 4.0], 'A': [1.0, 2.0, 3.0]}),
+                                    pd.DataFrame({'TDEP': [4.0, 5.0], 'B': [1.0, 2.0]})])
+    assert repeated['A'].tolist() == [3.0, 1.0]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compares the NaN handling of splice_logs.ipynb, where each curve request subsets every frame with
+`create_df_subset` and drops its NaN rows with `remove_nan_values`, with validity masks built once per
+frame and `valid_frames`, which gathers only the kept rows and columns of each frame.
+
+The synthetic frames have several curves with NaN gaps of their own, and two curves (GR and RHOB) are
+requested separately, as when they are spliced one at a time.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_validity_masks --frames 40 --rows 100000 --curves 12
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from utils.data_preprocessing import create_df_subset, remove_nan_values
+from utils.validity import frame_masks, valid_frames
+
+
+def make_frames(n_frames, rows, n_curves, seed=0):
+    rng = np.random.default_rng(seed)
+    curves = ['GR', 'RHOB'] + [f"CURVE_{i}" for i in range(n_curves - 2)]
+
+    frames = {}
+    for frame in range(n_frames):
+        data = {'TDEP': 400 + np.arange(rows) * 0.1524}
+        for curve in curves:
+            values = rng.normal(100, 20, rows)
+            # A NaN gap at the top and bottom of each curve and some scattered NaN samples
+            values[:rng.integers(0, rows // 10)] = np.nan
+            values[rows - rng.integers(1, rows // 10):] = np.nan
+            values[rng.random(rows) < 0.01] = np.nan
+            data[curve] = values
+        frames[f"frame_{frame}.csv"] = pd.DataFrame(data)
+
+    return {'WELL': {'logical_file_0': frames}}
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def notebook_requests(well_df_dict, requests):
+    results = {}
+    for curve in requests:
+        subset = create_df_subset(well_df_dict, [curve])
+        remove_nan_values(subset)
+        results[curve] = subset
+    return results
+
+
+def mask_requests(well_df_dict, masks, requests):
+    return {curve: valid_frames(well_df_dict, [curve], masks) for curve in requests}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-curve validity masks")
+    parser.add_argument("--frames", type=int, default=40, help="Number of frames.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per frame.")
+    parser.add_argument("--curves", type=int, default=12, help="Curves per frame.")
+    args = parser.parse_args()
+
+    well_df_dict = make_frames(args.frames, args.rows, args.curves)
+    requests = ['GR', 'RHOB']
+
+    expected, notebook_seconds, notebook_peak = measure(lambda: notebook_requests(well_df_dict, requests))
+    # The masks of every curve are built once, as FrameCatalog does when it reads a frame
+    masks, build_seconds, _ = measure(lambda: frame_masks(well_df_dict))
+    masked, mask_seconds, mask_peak = measure(lambda: mask_requests(well_df_dict, masks, requests))
+
+    for curve in requests:
+        for frame, df in expected[curve]['WELL']['logical_file_0'].items():
+            pd.testing.assert_frame_equal(df.reset_index(drop=True), masked[curve]['WELL']['logical_file_0'][frame])
+
+    # A mask no longer matches its frame once a curve is changed in place, even with the same rows
+    df = well_df_dict['WELL']['logical_file_0']['frame_0.csv']
+    mask = masks['WELL']['logical_file_0']['frame_0.csv']
+    assert mask.matches(df)
+    df.loc[df.index[0], 'GR'] = np.nan
+    assert not mask.matches(df) and mask.matches(df, ['RHOB'])
+
+    mask_bytes = sum(mask.nbytes for mask in masks['WELL']['logical_file_0'].values())
+    print(f"create_df_subset + remove_nan_values: {notebook_seconds:7.3f} s  peak {notebook_peak / 2 ** 20:7.1f} MiB")
+    print(f"valid_frames with the masks:          {mask_seconds:7.3f} s  peak {mask_peak / 2 ** 20:7.1f} MiB  (same frames)")
+    print(f"masks of every curve, built once:     {build_seconds:7.3f} s  {mask_bytes / 2 ** 20:12.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the per-frame casing trimming and `pd.cut` bit size of preprocess_dlis.ipynb with
+`apply_casing_table`, which processes the frames of each well at once.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_well_casing --wells 30 --frames 12 --rows 20000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.data_preprocessing import apply_casing_table, assign_bit_size, trim_casing
+
+
+def make_wells(n_wells, n_frames, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    wells, coating_locations, drill_diameters = {}, {}, {}
+
+    for well in range(n_wells):
+        name = f"WELL_{well}"
+        surface, intermediary = rng.uniform(300, 800), rng.uniform(1200, 2500)
+        coating_locations[name] = {'Surface Coating': surface, 'Intermediary Coating': intermediary}
+        drill_diameters[name] = {'Surface Drill': 17.5, 'Intermediary Drill': 12.25}
+
+        frames = {}
+        for frame in range(n_frames):
+            # Some frames start right at a casing shoe
+            top = rng.choice([surface, intermediary]) + rng.uniform(-5, 5) if frame % 3 == 0 else rng.uniform(100, 3000)
+            depth = np.round(top + np.arange(rows) * 0.1524, 1)
+            frames[f"logical_file_{frame}/frame_0.csv"] = pd.DataFrame({'TDEP': depth, 'GR': rng.random(rows)})
+        wells[name] = frames
+
+    return wells, coating_locations, drill_diameters
+
+
+def notebook_casing(wells, coating_locations, drill_diameters):
+    processed = {}
+    for well, frames in wells.items():
+        processed[well] = {}
+        for name, df in frames.items():
+            try:
+                location, drill = coating_locations[well], drill_diameters[well]
+                df = trim_casing(df, location['Surface Coating'], location['Intermediary Coating'])
+                df = assign_bit_size(df, location['Surface Coating'], location['Intermediary Coating'],
+                                     drill['Surface Drill'], drill['Intermediary Drill'])
+            except Exception:
+                pass
+            processed[well][name] = df
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the whole-well casing trimming and bit size")
+    parser.add_argument("--wells", type=int, default=30, help="Number of wells.")
+    parser.add_argument("--frames", type=int, default=12, help="Frames per well.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows per frame.")
+    args = parser.parse_args()
+
+    wells, coating_locations, drill_diameters = make_wells(args.wells, args.frames, args.rows)
+
+    start = time.perf_counter()
+    expected = notebook_casing(wells, coating_locations, drill_diameters)
+    notebook_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processed, stats = apply_casing_table(wells, coating_locations, drill_diameters)
+    table_seconds = time.perf_counter() - start
+
+    for well, frames in expected.items():
+        for name, df in frames.items():
+            np.testing.assert_array_equal(df['TDEP'].to_numpy(), processed[well][name]['TDEP'].to_numpy())
+            np.testing.assert_array_equal(df['BS'].astype(float).to_numpy(), processed[well][name]['BS'].to_numpy())
+
+    bs_bytes = sum(df['BS'].memory_usage(index=False, deep=True) for frames in expected.values() for df in frames.values())
+    new_bs_bytes = sum(df['BS'].memory_usage(index=False) for frames in processed.values() for df in frames.values())
+
+    # The categorical has float labels, so any arithmetic on BS first turns it into float64
+    print(f"per-frame trim + pd.cut:  {notebook_seconds:7.3f} s  BS {bs_bytes / 2 ** 20:6.1f} MiB categorical, "
+          f"{2 * new_bs_bytes / 2 ** 20:.1f} MiB as float64")
+    print(f"apply_casing_table:       {table_seconds:7.3f} s  BS {new_bs_bytes / 2 ** 20:6.1f} MiB float32  (same rows and values)")
+    print(f"trimmed rows: {stats['trimmed_rows'].sum()} in {stats['trimmed_frames'].sum()} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Synthetic well log data used by the benchmarks.
+
+The arrays mimic what dlisio returns from `frame.curves()`: a structured array with a FRAMENO
+counter, a depth index, scalar curves and optional multi-dimensional image channels.
+"""
+from typing import Optional
+import numpy as np
+
+
+def make_frame_curves(
+    n_rows: int,
+    n_channels: int,
+    image_samples: int = 0,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Creates a structured array shaped like the output of `frame.curves()`.
+
+    Args:
+        n_rows (int): Number of depth samples in the frame.
+        n_channels (int): Number of scalar float32 curves besides FRAMENO and the depth index.
+        image_samples (int): Number of azimuthal samples of the image channel. 0 means no image channel.
+        seed (Optional[int]): Seed for the random generator.
+
+    Returns:
+        np.ndarray: Structured array with the fields FRAMENO, INDEX, CURVE_0..CURVE_{n-1} and, optionally, IMAGE.
+    """
+    rng = np.random.default_rng(seed)
+
+    fields = [('FRAMENO', np.int32), ('INDEX', np.float64)]
+    fields += [(f"CURVE_{i}", np.float32) for i in range(n_channels)]
+    if image_samples:
+        fields.append(('IMAGE', np.float32, (image_samples,)))
+
+    curves = np.empty(n_rows, dtype=np.dtype(fields))
+    curves['FRAMENO'] = np.arange(1, n_rows + 1)
+    curves['INDEX'] = 400.0 + np.arange(n_rows) * 0.1524
+
+    for i in range(n_channels):
+        curves[f"CURVE_{i}"] = rng.normal(100.0, 25.0, n_rows)
+
+    if image_samples:
+        curves['IMAGE'] = rng.random((n_rows, image_samples), dtype=np.float32)
+
+    return curves
+
+
+def make_image_log(n_rows: int, n_samples: int = 180, seed: Optional[int] = 0) -> np.ndarray:
+    """
+    Creates an amplitude image shaped like a CAST/FMI image log (depth x azimuth).
+
+    Dipping beds show up as sinusoids across the azimuth, with noise on top.
+
+    Args:
+        n_rows (int): Number of depth samples.
+        n_samples (int): Number of azimuthal samples.
+        seed (Optional[int]): Seed for the random generator.
+
+    Returns:
+        np.ndarray: float32 amplitude array of shape (n_rows, n_samples).
+    """
+    rng = np.random.default_rng(seed)
+
+    rows = np.arange(n_rows)[:, None]
+    azimuth = np.linspace(0, 2 * np.pi, n_samples, endpoint=False)[None, :]
+    beds = np.sin((rows + 8 * np.sin(azimuth + 0.3)) / 15.0) + 0.5 * np.sin(rows / 170.0)
+
+    return (beds + rng.normal(0.0, 0.35, (n_rows, n_samples))).astype(np.float32)
@@ -0,0 +1,43 @@
+import os
+import time
+import argparse
+from utils.downloads import SHARE_URL, download_files, read_path_list
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Download the files of a path list from the public share over HTTP")
+    parser.add_argument("paths", type=str,
+                        help="File with the paths to download, one per line (index_catalogs.py --paths).")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'downloads'),
+                        help="Directory where the files are saved, in the directories of the share.")
+    parser.add_argument("--share", type=str, default=SHARE_URL, help="Public share link.")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum number of concurrent downloads.")
+    parser.add_argument("--strip-components", type=int, default=2,
+                        help="Leading directories of the paths that are not in the share.")
+    parser.add_argument("--retries", type=int, default=5, help="Retries of each file after the first attempt.")
+    parser.add_argument("--backoff", type=float, default=1.0,
+                        help="Wait before the first retry, in seconds, doubled at each retry.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout of each connection, in seconds.")
+    parser.add_argument("--report", type=str, default=None,
+                        help="Optional CSV file where the per-file download report is saved.")
+    args = parser.parse_args()
+
+    items = read_path_list(args.paths)
+    print(f"{len(items)} arquivos em {args.paths}.")
+
+    start = time.perf_counter()
+    reports = download_files(items, args.output, args.share, args.workers, args.strip_components,
+                             retries=args.retries, backoff=args.backoff, timeout=args.timeout)
+    seconds = time.perf_counter() - start
+
+    if len(reports):
+        counts = reports['status'].value_counts().to_dict()
+        print(f"{counts} em {seconds:.1f} s, {reports['bytes'].sum() / 2 ** 20:.1f} MiB recebidos.")
+    if args.report:
+        reports.to_csv(args.report, index=False)
+        print(f"Report saved in {args.report}.")
+
+
+if __name__ == "__main__":
+    main()
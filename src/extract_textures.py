@@ -0,0 +1,59 @@
+import os
+import argparse
+import numpy as np
+from utils.image_store import ImageLogStore, find_image_stores
+from utils.texture import DEFAULT_ANGLES, DEFAULT_DISTANCES, QUANTIZATION_METHODS, TEXTURE_METHODS
+from utils.texture_store import TextureFeatureStore
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Extract the GLCM texture features of the image log stores, "
+                                                 "computing only the depths that are new or changed")
+    parser.add_argument("--images", type=str, default=os.path.join('..', 'data', 'image_logs'),
+                        help="Directory searched recursively for image log stores.")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'texture_features'),
+                        help="Directory of the texture feature stores, with the same hierarchy as the images.")
+    parser.add_argument("--window", type=int, default=11, help="Rows of the sliding window.")
+    parser.add_argument("--levels", type=int, default=256, help="Number of gray levels.")
+    parser.add_argument("--distances", type=int, nargs='+', default=DEFAULT_DISTANCES, help="Pixel pair distances.")
+    parser.add_argument("--angles", type=float, nargs='+', default=list(np.degrees(DEFAULT_ANGLES)),
+                        help="Pixel pair angles, in degrees.")
+    parser.add_argument("--value-range", type=float, nargs=2, default=None,
+                        help="Amplitude range mapped to the gray levels. Defaults to the range of each image. "
+                             "A fixed range makes appends cheap, but amplitudes outside it are clipped.")
+    parser.add_argument("--method", type=str, choices=sorted(TEXTURE_METHODS), default='incremental',
+                        help="Method used to compute the GLCM of the windows.")
+    parser.add_argument("--quantization", type=str, choices=QUANTIZATION_METHODS, default='min_max',
+                        help="Mapping of the amplitudes to the gray levels.")
+    parser.add_argument("--clip-percentiles", type=float, nargs=2, default=None,
+                        help="Percentiles of the amplitudes used as the range when --value-range is not given.")
+    parser.add_argument("--bin-step", type=float, default=0.01,
+                        help="Width of the depth bins kept with the features, as in resolution_preprocess_02.ipynb. "
+                             "0 keeps no bins.")
+    parser.add_argument("--keep-superseded", action='store_true',
+                        help="Keep the features computed with an earlier amplitude range of the same image.")
+    args = parser.parse_args()
+
+    for store_path in find_image_stores(args.images):
+        image = ImageLogStore(store_path)
+        features_store = TextureFeatureStore(os.path.join(args.output, os.path.relpath(store_path, args.images)))
+
+        try:
+            features, report = features_store.update(
+                image, args.window, args.distances, list(np.radians(args.angles)), args.levels,
+                args.value_range, args.method, quantization=args.quantization,
+                clip_percentiles=args.clip_percentiles, bin_step=args.bin_step or None,
+                prune=not args.keep_superseded
+            )
+        except Exception as e:
+            print(f"Exception with {store_path}: {e}")
+            continue
+
+        print(f"{store_path}: {report['windows']} windows, {report['computed']} computed, "
+              f"{report['reused']} reused, {report['clipped']} samples clipped, {report['bins']} bins "
+              f"({report['binned']} aggregated), {report['pruned']} superseded sets removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import argparse
+from utils.catalog_index import (
+    build_catalog_index, load_catalog_files, load_well_table, select_wells, selected_files
+)
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Index the basin catalogs and select wells by file kind and tool")
+    parser.add_argument("query", type=str, nargs='?', default=None,
+                        help="Selection of file kinds and tools, e.g. \"AGP & FMI\" or \"AGP ∧ (CAST ∨ UBI)\".")
+    parser.add_argument("--catalogs", type=str, default=os.path.join('..', 'data', 'catalogs'),
+                        help="Directory with the catalogs (.txt) of each basin.")
+    parser.add_argument("--index", type=str, default=os.path.join('..', 'data', 'catalog_index'),
+                        help="Directory of the catalog index.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes scanning catalogs.")
+    parser.add_argument("--rebuild", action='store_true', help="Scan every catalog again, even the unchanged ones.")
+    parser.add_argument("--no-scan", action='store_true',
+                        help="Answer the query from the existing index, without checking the catalogs.")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Optional file where the selected wells are saved, grouped by catalog.")
+    parser.add_argument("--paths", type=str, default=None,
+                        help="Optional file where the paths of the files of the selection are saved, one per line.")
+    args = parser.parse_args()
+
+    if not args.no_scan:
+        summary = build_catalog_index(args.catalogs, args.index, args.workers, args.rebuild)
+        print(f"{len(summary['scanned'])} catalogs scanned, {len(summary['reused'])} reused, "
+              f"{len(summary['failed'])} failed: {summary['files']} files of {summary['wells']} wells.")
+
+    if args.query is None:
+        return
+
+    try:
+        wells = select_wells(load_well_table(args.index), args.query)
+    except Exception as e:
+        print(f"Error when selecting '{args.query}': {e}")
+        return
+
+    for catalog, catalog_wells in wells.groupby('catalog', sort=True):
+        print(f"{catalog}: {len(catalog_wells)} poços")
+    print(f"Total de poços com {args.query}: {len(wells)}")
+
+    # Os arquivos de saída são reescritos a cada execução, sem repetir poços
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as output_file:
+            for catalog, catalog_wells in wells.groupby('catalog', sort=True):
+                output_file.write(f"{catalog}:\n")
+                for well in catalog_wells['well']:
+                    output_file.write(f"{well}\n")
+                output_file.write("\n\n")
+        print(f"Poços salvos em {args.output}.")
+
+    if args.paths:
+        files = selected_files(load_catalog_files(args.index, wells['catalog'].unique().tolist()), wells, args.query)
+        with open(args.paths, 'w', encoding="utf-8") as output_file:
+            output_file.writelines(f"{path}\n" for path in files['path'])
+        print(f"{len(files)} caminhos salvos em {args.paths}.")
+
+
+# The pool workers import this module, so the entry point must be guarded
+if __name__ == "__main__":
+    main()
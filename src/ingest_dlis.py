@@ -0,0 +1,47 @@
+import os
+import time
+import argparse
+from functools import partial
+from utils.dlis_ingestion import find_dlis_files, ingest_dlis_files, summarize_reports, write_frame
+from utils.storage import STORAGE_BACKENDS
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Stream DLIS files to per-frame files, one frame at a time")
+    parser.add_argument("--input", type=str, default=os.path.join('..', 'data'),
+                        help="Directory searched recursively for DLIS files.")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'csv_from_dlis_raw'),
+                        help="Directory where the frames are saved as well/logical_file_i/frame_j.")
+    parser.add_argument("--format", type=str, choices=sorted(STORAGE_BACKENDS), default='csv',
+                        help="Storage backend of the frame files.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes decoding at the same time.")
+    parser.add_argument("--by", type=str, choices=['file', 'logical_file'], default='file',
+                        help="Unit of parallel work: a whole DLIS file or a single logical file.")
+    parser.add_argument("--images", type=str, default=None,
+                        help="Optional directory where the image channels are saved as image log stores "
+                             "instead of frame columns.")
+    parser.add_argument("--report", type=str, default=None,
+                        help="Optional CSV file where the per-file timing report is saved.")
+    args = parser.parse_args()
+
+    file_paths = find_dlis_files(args.input)
+    print(f"{len(file_paths)} DLIS files found in {args.input}.")
+
+    start = time.perf_counter()
+    reports = ingest_dlis_files(file_paths, args.output, partial(write_frame, backend=args.format),
+                                args.workers, args.by, image_dir=args.images)
+
+    summary = summarize_reports(reports, time.perf_counter() - start)
+    if summary:
+        print(summary)
+
+    if args.report:
+        reports.to_csv(args.report, index=False)
+        print(f"Report saved in {args.report}.")
+
+
+# The pool workers import this module, so the entry point must be guarded
+if __name__ == "__main__":
+    main()
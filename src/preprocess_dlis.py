@@ -0,0 +1,93 @@
+import os
+import argparse
+import pandas as pd
+from utils.agp import load_agp_reports
+from utils.catalog import build_frame_index
+from utils.data_preprocessing import add_bit_size, preprocess_frame, trim_casing
+from utils.stage_cache import StageCache
+from utils.storage import save_frame
+
+COATING_DRILL_DIAMETERS_MAPPING = {
+    "30": "36",
+    "20": "26",
+    "13 3/8": "17 1/2",
+    "9 5/8": "12 1/4"
+}
+
+
+def preprocessing_stages(coating_location, drill_diameter, depth_key=False):
+    """
+    Builds the stages of preprocess_dlis.ipynb for a well. The steps that only depend on the frame
+    (drop FRAMENO, rename, round, replace the null values) run in the single pass of `preprocess_frame`;
+    the casing trimming and the BS column are stages of their own, keyed on the casing table of the
+    well, so a change in the AGP reports only runs them again.
+    """
+    surface_coating = coating_location.get('Surface Coating')
+    intermediary_coating = coating_location.get('Intermediary Coating')
+
+    return [
+        ('preprocess_frame', preprocess_frame, {'depth_key': depth_key}),
+        ('trim_casing', trim_casing, {
+            'surface_coating': surface_coating,
+            'intermediary_coating': intermediary_coating
+        }),
+        ('add_bit_size', add_bit_size, {
+            'surface_coating': surface_coating,
+            'intermediary_coating': intermediary_coating,
+            'surface_drill': drill_diameter.get('Surface Drill'),
+            'intermediary_drill': drill_diameter.get('Intermediary Drill')
+        }),
+    ]
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Preprocess the raw DLIS frames, reusing the cached stages")
+    parser.add_argument("--input", type=str, default=os.path.join('..', 'data', 'csv_from_dlis_raw'),
+                        help="Directory with the raw frames (well/logical_file/frame.csv).")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'dlis_preprocessed'),
+                        help="Directory where the preprocessed frames are saved.")
+    parser.add_argument("--agp", type=str, default=os.path.join('..', 'data', 'agp'),
+                        help="Directory with the AGP reports.")
+    parser.add_argument("--cache", type=str, default=os.path.join('..', 'data', 'stage_cache'),
+                        help="Directory of the stage cache.")
+    parser.add_argument("--cache-size-gb", type=float, default=2.0, help="Maximum size of the stage cache.")
+    parser.add_argument("--depth-key", action='store_true',
+                        help="Add the integer depth key column (TDEP in 0.1 mm) used by the exact depth joins.")
+    parser.add_argument("--agp-workers", type=int, default=8, help="Threads parsing the AGP reports.")
+    args = parser.parse_args()
+
+    cache = StageCache(args.cache, int(args.cache_size_gb * 1024 ** 3))
+
+    # Relatórios AGP lidos uma única vez; os já analisados vêm do cache enquanto não mudarem
+    coating_locations, _, drill_diameters = load_agp_reports(
+        args.agp, COATING_DRILL_DIAMETERS_MAPPING, args.agp_workers, os.path.join(args.cache, 'agp_reports.json')
+    )
+
+    index = build_frame_index(args.input)
+    recomputed_wells = set()
+
+    for row in index.itertuples():
+        stages = preprocessing_stages(coating_locations.get(row.well, {}), drill_diameters.get(row.well, {}),
+                                      args.depth_key)
+        output_path = os.path.join(args.output, row.well, row.logical_file, row.frame)
+
+        try:
+            df, computed = cache.run_stages(cache.file_hash(row.path), lambda: pd.read_csv(row.path), stages)
+        except Exception as e:
+            print(f"Exception with well={row.well}, logical_file={row.logical_file}, frame={row.frame}: {e}")
+            continue
+
+        # Only rewrite the frames that changed
+        if computed or not os.path.exists(output_path):
+            save_frame(df, output_path, 'csv')
+            recomputed_wells.add(row.well)
+
+    cache.save_file_hashes()
+
+    print(f"{len(index)} frames, {cache.misses} stages computed, {cache.hits} stages reused from the cache.")
+    print(f"Wells written: {sorted(recomputed_wells)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,38 @@
 import os
-import pandas as pd
-from utils.data_preprocessing import load_csv_files, create_df_subset, remove_nan_values, spliced_dfs_to_csv
 import argparse
-
-# Configurar os argumentos de linha de comando
-parser = argparse.ArgumentParser(description="Splice the logs of a given curve")
-parser.add_argument("variable_name", type=str, help="The name of the curve, e.g. RHOB.")
-args = parser.parse_args()
-
-# Substituir RHOB pelo nome da variável fornecida pelo usuário
-variable_name = args.variable_name
-
-base_path = os.path.join('..', 'data', 'dlis_preprocessed')
-csv_data = load_csv_files(base_path)
-
-# Criar um subconjunto do DataFrame baseado na variável fornecida
-logs = create_df_subset(csv_data, [variable_name])
-
-# Remover valores NaN
-remove_nan_values(logs)
-
-spliced_data = {}
-for well, w_dict in logs.items():
-    well_data = []
-
-    for logical_file, lf_dict in w_dict.items():
-        for frame, df in lf_dict.items():
-            if variable_name in df.columns:
-                well_data.append(df)
-
-    try:
-        df_concat = pd.concat(well_data).sort_values(by='TDEP', ascending=True)
-    except Exception as e:
-        print(f"Error when concatenating {well}: {e}")
-        df_concat = None
-
-    spliced_data[well] = df_concat
-
-# Salvar os dados processados em CSV
-output_path = os.path.join('..', 'data', 'dlis_spliced', variable_name)
-spliced_dfs_to_csv(spliced_data, output_path)
-
-print(f"Dados processados e salvos em {output_path}.")
+from utils.data_preprocessing import spliced_dfs_to_csv
+from utils.catalog import FrameCatalog
+from utils.splicing import SPLICE_POLICIES, splice_catalog
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Splice the logs of one or more curves")
+    parser.add_argument("curves", type=str, nargs='+', help="The names of the curves, e.g. RHOB DT GR.")
+    parser.add_argument("--input", type=str, default=os.path.join('..', 'data', 'dlis_preprocessed'),
+                        help="Directory with the preprocessed frames (well/logical_file/frame.csv).")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'dlis_spliced'),
+                        help="Directory where the spliced logs are saved (curve/well.csv).")
+    parser.add_argument("--policy", type=str, choices=SPLICE_POLICIES, default='run',
+                        help="Run that gives the samples where runs overlap: by run order, by finest "
+                             "resolution, or by run order with a linear blend at each change of run.")
+    parser.add_argument("--run-order", type=str, choices=['first', 'last'], default='first',
+                        help="Whether the earlier or the later runs (logical files) have priority.")
+    parser.add_argument("--transition", type=float, default=1.0,
+                        help="Length, in metres, of the transition zone of --policy blend.")
+    args = parser.parse_args()
+
+    # Catálogo lazy: cada frame é lido uma única vez, só com TDEP e as curvas pedidas
+    catalog = FrameCatalog(args.input)
+
+    spliced_data = splice_catalog(catalog, args.curves, args.policy, args.transition, args.run_order)
+
+    # Salvar os dados processados em CSV
+    for curve, well_logs in spliced_data.items():
+        output_path = os.path.join(args.output, curve)
+        spliced_dfs_to_csv(well_logs, output_path)
+        print(f"{curve}: {len(well_logs)} poços salvos em {output_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import argparse
+from utils.data_preprocessing import spliced_dfs_to_csv
+from utils.well_unification import unify_wells
+
+
+def main():
+    # Configurar os argumentos de linha de comando
+    parser = argparse.ArgumentParser(description="Join the spliced logs of several curves of every well")
+    parser.add_argument("curves", type=str, nargs='+', help="The curves to join, e.g. GR DT RHOB.")
+    parser.add_argument("--input", type=str, default=os.path.join('..', 'data', 'dlis_spliced'),
+                        help="Directory of the spliced logs (curve/well.csv).")
+    parser.add_argument("--output", type=str, default=os.path.join('..', 'data', 'dlis_unified'),
+                        help="Directory where the unified logs are saved (well.csv).")
+    parser.add_argument("--how", type=str, choices=['inner', 'outer', 'asof'], default='inner',
+                        help="Depths kept: in every curve, in any curve, or those of the first curve.")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Largest depth distance, in metres, matched by --how asof.")
+    parser.add_argument("--wells", type=str, nargs='+', default=None,
+                        help="Wells to unify. Defaults to every well with the curves.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    args = parser.parse_args()
+
+    unified = unify_wells(args.curves, args.input, args.wells, args.how, args.tolerance, args.workers)
+
+    # Salvar os dados unificados em CSV
+    spliced_dfs_to_csv(unified, args.output)
+
+    for well, df in unified.items():
+        print(f"{well}: {len(df)} depths")
+    print(f"Dados unificados e salvos em {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
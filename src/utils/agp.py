@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import json
+import os
+import re
+from utils.data_preprocessing import calculate_drill_diameters
+
+# Name given to the reports without the well name
+WELL_NAME_NOT_FOUND = "Well name not found"
+
+# Patterns of extract_coating_location and extract_coating_diameter, compiled once. The casing patterns
+# match the depth and, when it follows, the diameter, so each casing is found in a single search
+_WELL_NAME_PATTERN = re.compile(r"PO[ÇC]O\s*:\s*(.*)")
+_CASING_PATTERNS = {
+    'Surface Coating': (
+        re.compile(r"REV\.\s*SUPERFICIE\s+([\d.]+)(?:\s+\([^)]+\)\s+(\d+\s+\d+\/\d+))?"),
+        re.compile(r"REV\.\s*SUPERFICIE\s+[\d.]+\s+\([^)]+\)\s+(\d+\s+\d+\/\d+)"),
+    ),
+    'Intermediary Coating': (
+        re.compile(r"REV\.\s*INTERMED\.\s+([\d.]+)(?:\s+\([^)]+\)\s+(\d+\s+\d+\/\d+))?"),
+        re.compile(r"REV\.\s*INTERMED\.\s+[\d.]+\s+\([^)]+\)\s+(\d+\s+\d+\/\d+)"),
+    ),
+}
+
+
+def parse_agp_text(content: str) -> Dict[str, object]:
+    """
+    Extracts the well name and the depth and diameter of the surface and intermediary casings of an AGP report.
+
+    Args:
+        content (str): Text of the report.
+
+    Returns:
+        Dict[str, object]: 'well', and for 'Surface Coating' and 'Intermediary Coating' a dict with the
+        'location' (float, in metres) and the 'diameter' (str, e.g. "13 3/8"), None when not found.
+    """
+    well_name_match = _WELL_NAME_PATTERN.search(content)
+    report = {'well': well_name_match.group(1).strip() if well_name_match else WELL_NAME_NOT_FOUND}
+
+    for casing, (pattern, diameter_pattern) in _CASING_PATTERNS.items():
+        location, diameter = None, None
+
+        match = pattern.search(content)
+        if match:
+            location, diameter = float(match.group(1)), match.group(2)
+            # The first casing line may have no diameter; as before, it then comes from the next one with it
+            if diameter is None:
+                diameter_match = diameter_pattern.search(content, match.end())
+                diameter = diameter_match.group(1) if diameter_match else None
+
+        report[casing] = {'location': location, 'diameter': diameter}
+
+    return report
+
+
+def parse_agp_file(file_path: str) -> Dict[str, object]:
+    """
+    Reads an AGP report once and parses it with `parse_agp_text`.
+    """
+    with open(file_path, "r") as file:
+        return parse_agp_text(file.read())
+
+
+def _file_stamp(file_path: str) -> Dict[str, int]:
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _load_cache(cache_path: Optional[str]) -> Dict[str, Dict[str, object]]:
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error when reading the AGP cache {cache_path}: {e}")
+        return {}
+
+
+def _save_cache(cache_path: str, cache: Dict[str, Dict[str, object]]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+
+    # Written to a temporary file first, so an interrupted run does not leave a broken cache
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(temp_path, cache_path)
+
+
+def parse_agp_directory(
+    base_path: str,
+    workers: int = 8,
+    cache_path: Optional[str] = None
+) -> List[Dict[str, object]]:
+    """
+    Parses every AGP report (`base_path/**/*.txt`) with a thread pool, reading each file once.
+
+    Args:
+        base_path (str): Directory with the AGP reports.
+        workers (int): Number of threads reading and parsing the reports.
+        cache_path (Optional[str]): JSON file with the reports parsed in previous runs. A report is
+            parsed again only when its size or mtime changed, and the reports that no longer exist
+            are dropped. None disables the cache.
+
+    Returns:
+        List[Dict[str, object]]: The parsed reports (see `parse_agp_text`) with their 'path', in the
+        order of `glob`.
+    """
+    paths = glob.glob(os.path.join(base_path, '**', '*.txt'), recursive=True)
+    cache = _load_cache(cache_path)
+
+    stamps = {path: _file_stamp(path) for path in paths}
+    stale = [
+        path for path in paths
+        if path not in cache or any(cache[path].get(field) != value for field, value in stamps[path].items())
+    ]
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for path, report in zip(stale, executor.map(parse_agp_file, stale)):
+                cache[path] = {**stamps[path], 'report': report}
+
+    reports = [{'path': path, **cache[path]['report']} for path in paths]
+
+    if cache_path is not None and (stale or len(cache) != len(paths)):
+        _save_cache(cache_path, {path: cache[path] for path in paths})
+
+    return reports
+
+
+def agp_tables(
+    reports: List[Dict[str, object]],
+    mapping: Dict[str, str]
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]], Dict[str, Dict[str, float]]]:
+    """
+    Builds the tables of the casings of each well from the parsed AGP reports.
+
+    Args:
+        reports (List[Dict[str, object]]): Reports from `parse_agp_directory`. When several reports
+            have the same well name, the last one is used.
+        mapping (Dict[str, str]): Coating diameters mapped to the drill diameters.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]], Dict[str, Dict[str, float]]]: The
+        coating locations, coating diameters and drill diameters by well, as `extract_coating_location`,
+        `extract_coating_diameter` and `calculate_drill_diameters` give them.
+    """
+    coating_locations, coating_diameters = {}, {}
+
+    for report in reports:
+        coating_locations[report['well']] = {casing: report[casing]['location'] for casing in _CASING_PATTERNS}
+        coating_diameters[report['well']] = {casing: report[casing]['diameter'] for casing in _CASING_PATTERNS}
+
+    return coating_locations, coating_diameters, calculate_drill_diameters(coating_diameters, mapping)
+
+
+def load_agp_reports(
+    base_path: str,
+    mapping: Dict[str, str],
+    workers: int = 8,
+    cache_path: Optional[str] = None
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]], Dict[str, Dict[str, float]]]:
+    """
+    Parses the AGP reports in a single scan and builds the coating locations, coating diameters and
+    drill diameters by well. Replaces `extract_coating_location`, `extract_coating_diameter` and
+    `calculate_drill_diameters`, which read every report twice.
+
+    Args:
+        base_path (str): Directory with the AGP reports.
+        mapping (Dict[str, str]): Coating diameters mapped to the drill diameters.
+        workers (int): Number of threads reading and parsing the reports.
+        cache_path (Optional[str]): JSON cache of the parsed reports, see `parse_agp_directory`.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]], Dict[str, Dict[str, float]]]: See `agp_tables`.
+    """
+    return agp_tables(parse_agp_directory(base_path, workers, cache_path), mapping)
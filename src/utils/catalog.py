@@ -0,0 +1,343 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+import csv
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.depth_keys import DEPTH_KEY_COLUMN
+from utils.storage import STORAGE_BACKENDS, backend_from_path, load_frame
+from utils.validity import ValidityMask
+
+
+def _parse_depth(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _last_line(f) -> bytes:
+    """
+    Reads the last non-empty line of a binary file without reading the rest of it.
+    """
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    block = b''
+
+    while position > 0:
+        step = min(4096, position)
+        position -= step
+        f.seek(position)
+        block = f.read(step) + block
+
+        lines = block.rstrip(b'\r\n').split(b'\n')
+        if len(lines) > 1 or position == 0:
+            return lines[-1]
+
+    return block
+
+
+def read_csv_header(file_path: str, depth_column: str) -> Tuple[List[str], float, float]:
+    """
+    Reads the columns and the depth range of a CSV frame from its header, first and last rows.
+
+    The depth of a frame is monotonic (increasing or decreasing), so the first and last rows bound it.
+
+    Args:
+        file_path (str): Path of the CSV file.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        Tuple[List[str], float, float]: The columns, the minimum and the maximum depth. The depths are
+        NaN when the frame has no depth column or no rows.
+    """
+    with open(file_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode()]))
+        first_row = f.readline().decode()
+        last_row = _last_line(f).decode() if first_row else ''
+
+    if depth_column not in header or not first_row.strip():
+        return header, np.nan, np.nan
+
+    position = header.index(depth_column)
+    depths = [_parse_depth(next(csv.reader([row]))[position]) for row in (first_row, last_row)]
+
+    return header, np.nanmin(depths), np.nanmax(depths)
+
+
+def read_parquet_header(file_path: str, depth_column: str) -> Tuple[List[str], float, float]:
+    """
+    Reads the columns and the depth range of a Parquet frame from its footer statistics.
+
+    Args:
+        file_path (str): Path of the Parquet file.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        Tuple[List[str], float, float]: The columns, the minimum and the maximum depth.
+    """
+    metadata = pq.ParquetFile(file_path).metadata
+    columns = metadata.schema.to_arrow_schema().names
+
+    if depth_column not in columns or metadata.num_rows == 0:
+        return columns, np.nan, np.nan
+
+    position = columns.index(depth_column)
+    mins, maxs = [], []
+    for row_group in range(metadata.num_row_groups):
+        statistics = metadata.row_group(row_group).column(position).statistics
+        if statistics is None or not statistics.has_min_max:
+            # No statistics: fall back to reading the depth column only
+            depths = pq.read_table(file_path, columns=[depth_column])[depth_column].to_numpy()
+            return columns, np.nanmin(depths), np.nanmax(depths)
+        mins.append(statistics.min)
+        maxs.append(statistics.max)
+
+    return columns, min(mins), max(maxs)
+
+
+def read_arrow_header(file_path: str, depth_column: str) -> Tuple[List[str], float, float]:
+    """
+    Reads the columns and the depth range of an Arrow IPC frame, mapping only its depth column.
+
+    Args:
+        file_path (str): Path of the Arrow file.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        Tuple[List[str], float, float]: The columns, the minimum and the maximum depth.
+    """
+    with pa.memory_map(file_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        columns = table.schema.names
+
+        if depth_column not in columns or table.num_rows == 0:
+            return columns, np.nan, np.nan
+
+        depths = table[depth_column].to_numpy()
+        return columns, np.nanmin(depths), np.nanmax(depths)
+
+
+HEADER_READERS = {
+    'csv': read_csv_header,
+    'parquet': read_parquet_header,
+    'arrow': read_arrow_header,
+}
+
+
+def build_frame_index(base_path: str, backend: str = 'csv', depth_column: str = 'TDEP') -> pd.DataFrame:
+    """
+    Builds the index of every frame under the base directory without loading their data.
+
+    Args:
+        base_path (str): The root directory where the frames are stored as well/logical_file/frame.
+        backend (str): Name of the storage backend of the frames.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        pd.DataFrame: One row per frame with the well, logical file and frame names, the path of the file,
+        its columns and its depth range ('depth_min', 'depth_max').
+    """
+    records = []
+    read_header = HEADER_READERS[backend]
+
+    data_path = os.path.join(base_path, '**', '*' + STORAGE_BACKENDS[backend]['extension'])
+
+    for file in sorted(glob.glob(data_path, recursive=True)):
+        parts = os.path.relpath(file, base_path).split(os.sep)
+        if len(parts) != 3:
+            continue
+
+        columns, depth_min, depth_max = read_header(file, depth_column)
+        records.append({
+            'well': parts[0],
+            'logical_file': parts[1],
+            'frame': parts[2],
+            'path': file,
+            'columns': columns,
+            'depth_min': depth_min,
+            'depth_max': depth_max
+        })
+
+    return pd.DataFrame(records, columns=['well', 'logical_file', 'frame', 'path', 'columns', 'depth_min', 'depth_max'])
+
+
+class _LazyFrames(Mapping):
+    """
+    Mapping of frame names to DataFrames that reads each frame the first time it is accessed.
+
+    Args:
+        paths (Dict[str, str]): Path of each frame.
+        columns (Dict[str, Optional[List[str]]]): Columns read from each frame, None for every column.
+        depth_column (str): Name of the depth column.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        columns: Dict[str, Optional[List[str]]],
+        depth_column: str = 'TDEP'
+    ):
+        self._paths = paths
+        self._columns = columns
+        self._depth_column = depth_column
+        self._frames = {}
+        self._masks = {}
+
+    def __getitem__(self, frame: str) -> pd.DataFrame:
+        if frame not in self._frames:
+            self._frames[frame] = load_frame(self._paths[frame], self._columns[frame])
+        return self._frames[frame]
+
+    def validity(self, frame: str) -> ValidityMask:
+        """
+        Gets the validity masks of a frame (see `ValidityMask`), reading the frame if needed. The masks
+        are built the first time they are asked for, and again when the frame was changed since then.
+        """
+        df = self[frame]
+        mask = self._masks.get(frame)
+        if mask is None or not mask.matches(df):
+            mask = ValidityMask.from_frame(df, depth_column=self._depth_column)
+            self._masks[frame] = mask
+        return mask
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._paths)})"
+
+
+class FrameCatalog(Mapping):
+    """
+    Lazy, column-projected view of a well/logical_file/frame tree of frame files.
+
+    The catalog behaves like the nested dictionary returned by `load_csv_files`
+    (catalog[well][logical_file][frame] is a DataFrame), but only the index of the frames is built
+    up front, from their headers. A frame is read the first time it is accessed and only the depth
+    column (with its integer depth key, when the frame has one) and the requested curves are parsed.
+    Loaded frames are kept, so in-place changes such as `remove_nan_values` persist like they do on a
+    dictionary. The validity masks of each frame (see `ValidityMask`) are available from `validity`,
+    which builds them the first time they are asked for, so reading a frame does not build them.
+
+    Args:
+        base_path (str): The root directory where the frames are stored.
+        curves (Optional[List[str]]): Curves to read besides the depth column. None reads every column.
+        require_all (bool): Keep only the frames that have every requested curve. When False, frames
+            with at least one of the curves are kept, as `create_df_subset` does.
+        backend (Optional[str]): Storage backend of the frames. None picks it from the index passed in,
+            or uses 'csv'.
+        depth_column (str): Name of the depth column.
+        index (Optional[pd.DataFrame]): An index built by `build_frame_index`, to avoid scanning the headers again.
+        validity_masks (bool): Whether the validity masks of the frames are used by the consumers of the
+            catalog, such as `splice_catalog`.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        curves: Optional[List[str]] = None,
+        require_all: bool = False,
+        backend: Optional[str] = None,
+        depth_column: str = 'TDEP',
+        index: Optional[pd.DataFrame] = None,
+        validity_masks: bool = True
+    ):
+        self.base_path = base_path
+        self.curves = list(curves) if curves is not None else None
+        self.require_all = require_all
+        self.depth_column = depth_column
+        self.validity_masks = validity_masks
+
+        if index is None:
+            index = build_frame_index(base_path, backend or 'csv', depth_column)
+        self.backend = backend or (backend_from_path(index['path'].iloc[0]) if len(index) else 'csv')
+        self.full_index = index
+
+        self.index = self._filter_index(index)
+        self._wells = self._build_tree()
+
+    def _filter_index(self, index: pd.DataFrame) -> pd.DataFrame:
+        if self.curves is None:
+            return index
+
+        present = index['columns'].map(lambda columns: [curve in columns for curve in self.curves])
+        keep = present.map(all) if self.require_all else present.map(any)
+        return index[keep.astype(bool)].reset_index(drop=True)
+
+    def _build_tree(self) -> Dict[str, Dict[str, _LazyFrames]]:
+        paths, columns = {}, {}
+        for row in self.index.itertuples():
+            paths.setdefault(row.well, {}).setdefault(row.logical_file, {})[row.frame] = row.path
+
+            # The integer depth key goes along with the depth column in the frames that have it
+            frame_columns = None
+            if self.curves is not None:
+                key = [DEPTH_KEY_COLUMN] if DEPTH_KEY_COLUMN in row.columns else []
+                frame_columns = [self.depth_column] + key + self.curves
+            columns.setdefault(row.well, {}).setdefault(row.logical_file, {})[row.frame] = frame_columns
+
+        return {
+            well: {
+                logical_file: _LazyFrames(frames, columns[well][logical_file], self.depth_column)
+                for logical_file, frames in lf_paths.items()
+            }
+            for well, lf_paths in paths.items()
+        }
+
+    def select(self, curves: Optional[List[str]], require_all: bool = False) -> 'FrameCatalog':
+        """
+        Creates a catalog over the same files that reads other curves, reusing the index.
+
+        Args:
+            curves (Optional[List[str]]): Curves to read besides the depth column. None reads every column.
+            require_all (bool): Keep only the frames that have every requested curve.
+
+        Returns:
+            FrameCatalog: The new catalog. Nothing is read from disk.
+        """
+        return FrameCatalog(self.base_path, curves, require_all, self.backend, self.depth_column, self.full_index,
+                            self.validity_masks)
+
+    def validity(self, well: str, logical_file: str, frame: str) -> ValidityMask:
+        """
+        Gets the validity masks of a frame, see `ValidityMask`.
+        """
+        return self._wells[well][logical_file].validity(frame)
+
+    def validity_tree(self) -> Dict[str, Dict[str, Dict[str, ValidityMask]]]:
+        """
+        Gets the validity masks of every frame, reading the frames not read yet, with the structure of
+        the catalog (as `validity.frame_masks` builds them for a dictionary of frames).
+        """
+        return {
+            well: {
+                logical_file: {frame: lf_frames.validity(frame) for frame in lf_frames}
+                for logical_file, lf_frames in w_dict.items()
+            }
+            for well, w_dict in self._wells.items()
+        }
+
+    def frames_in_range(self, top: float, bottom: float) -> pd.DataFrame:
+        """
+        Gets the index rows of the frames whose depth range overlaps [top, bottom].
+        """
+        return self.index[(self.index['depth_max'] >= top) & (self.index['depth_min'] <= bottom)]
+
+    def __getitem__(self, well: str) -> Dict[str, _LazyFrames]:
+        return self._wells[well]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._wells)
+
+    def __len__(self) -> int:
+        return len(self._wells)
+
+    def __repr__(self) -> str:
+        return f"FrameCatalog({self.base_path!r}, curves={self.curves}, frames={len(self.index)})"
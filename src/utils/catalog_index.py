@@ -0,0 +1,350 @@
+from typing import Dict, List, Optional
+import glob
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from utils.dlis_ingestion import map_isolated
+from utils.storage import read_parquet, write_parquet
+
+# Tools of the DLIS files, found in their file names (e.g. 1-brsa-344-al_brsa_fmi1.dlis). A file name can
+# have several tools (1-brsa-1291d-se_cast_xrmi.dlis)
+TOOL_TYPES = ['UBI', 'CAST', 'FMI', 'OBMI', 'EMI', 'XRMI', 'OMRI']
+
+# Bit of each tool in the 'tools' column of the index
+TOOL_BITS = {tool: 1 << i for i, tool in enumerate(TOOL_TYPES)}
+
+# Names usable in the selections of `select_wells`, besides the tools
+FILE_KINDS = ['AGP', 'DLIS']
+
+_SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+_SIZE_PATTERN = re.compile(r"^(\d+(?:[.,]\d+)?)([KMGT])?I?B?$", re.IGNORECASE)
+_NAME_PATTERN = re.compile(r"[A-Za-z_]\w*")
+_QUERY_OPERATORS = {'∧': ' & ', '∨': ' | ', '¬': ' ~ ', '!': ' ~ '}
+
+_FILES_COLUMNS = ['catalog', 'well', 'kind', 'tools', 'size', 'path']
+
+
+def well_id_from_path(path: str) -> Optional[str]:
+    """
+    Gets the well of a catalog path ('category/well', or 'category_partN/well' when the category is
+    split in parts), as select_wells.py does.
+
+    Returns:
+        Optional[str]: The well, or None when the path is too short to have one.
+    """
+    tokens = path.split("/")
+    try:
+        if "parte" in path.lower():
+            return f"{tokens[4]}/{tokens[5]}"
+        return f"{tokens[3]}/{tokens[4]}"
+    except IndexError:
+        return None
+
+
+def parse_size(token: str) -> int:
+    """
+    Converts the size column of a catalog line (bytes, or human readable as 4.0K or 12M) to bytes.
+
+    Returns:
+        int: The size in bytes, or -1 when the token is not a size.
+    """
+    match = _SIZE_PATTERN.match(token)
+    if not match:
+        return -1
+
+    value = float(match.group(1).replace(',', '.'))
+    return int(value * _SIZE_SUFFIXES.get((match.group(2) or '').upper(), 1))
+
+
+def file_tools(file_name: str) -> int:
+    """
+    Gets the tools of a DLIS file from its (lower case) file name, as a bitmask of `TOOL_BITS`.
+    """
+    tools = 0
+    for tool, bit in TOOL_BITS.items():
+        if tool.lower() in file_name:
+            tools |= bit
+    return tools
+
+
+def scan_catalog(catalog_path: str) -> pd.DataFrame:
+    """
+    Streams a basin catalog (one '<size> <path>' line per file) and keeps its AGP and DLIS files.
+
+    Args:
+        catalog_path (str): Path of the catalog.
+
+    Returns:
+        pd.DataFrame: One row per file, with the 'catalog' (file name without extension), the 'well',
+        the 'kind' ('AGP' or 'DLIS'), the 'tools' bitmask of the DLIS files, the 'size' in bytes
+        (-1 when unknown) and the 'path'.
+    """
+    wells, kinds, tools, sizes, paths = [], [], [], [], []
+
+    with open(catalog_path, "r", encoding="utf-8", errors="ignore") as file:
+        for line in file:
+            parts = line.strip().split(maxsplit=1)
+            if len(parts) < 2:
+                continue
+
+            path = parts[1]
+            lower_path = path.lower()
+            if "/agp/" in lower_path:
+                kind, file_tool_bits = 'AGP', 0
+            elif ".dlis" in lower_path:
+                kind, file_tool_bits = 'DLIS', file_tools(lower_path.rsplit("/", 1)[-1])
+            else:
+                continue
+
+            well = well_id_from_path(path)
+            if well is None:
+                continue
+
+            wells.append(well)
+            kinds.append(kind)
+            tools.append(file_tool_bits)
+            sizes.append(parse_size(parts[0]))
+            paths.append(path)
+
+    catalog = os.path.splitext(os.path.basename(catalog_path))[0]
+    return _files_frame([catalog] * len(paths), wells, kinds, tools, sizes, paths)
+
+
+def _files_frame(catalogs, wells, kinds, tools, sizes, paths) -> pd.DataFrame:
+    return pd.DataFrame({
+        'catalog': pd.Categorical(catalogs),
+        'well': pd.Categorical(wells),
+        'kind': pd.Categorical(kinds, categories=FILE_KINDS),
+        'tools': np.asarray(tools, dtype=np.uint16),
+        'size': np.asarray(sizes, dtype=np.int64),
+        'path': pd.Series(paths, dtype=object),
+    }, columns=_FILES_COLUMNS)
+
+
+def well_table(files: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarizes the files of the index by well.
+
+    Args:
+        files (pd.DataFrame): Files of the index, from `scan_catalog`.
+
+    Returns:
+        pd.DataFrame: One row per catalog and well, with a boolean column per file kind (AGP, DLIS) and
+        tool, the number of AGP and DLIS files ('agp_files', 'dlis_files') and their bytes ('agp_size',
+        'dlis_size', unknown sizes left out).
+    """
+    keys = files[['catalog', 'well']].astype(str)
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    n_wells = len(uniques)
+
+    is_agp = (files['kind'] == 'AGP').to_numpy()
+    size = np.maximum(files['size'].to_numpy(), 0)
+    tools = np.zeros(n_wells, dtype=np.uint16)
+    np.bitwise_or.at(tools, codes, files['tools'].to_numpy())
+
+    wells = pd.DataFrame({
+        'catalog': uniques.get_level_values(0),
+        'well': uniques.get_level_values(1),
+        'agp_files': np.bincount(codes, weights=is_agp, minlength=n_wells).astype(np.int64),
+        'dlis_files': np.bincount(codes, weights=~is_agp, minlength=n_wells).astype(np.int64),
+        'agp_size': np.bincount(codes, weights=np.where(is_agp, size, 0), minlength=n_wells).astype(np.int64),
+        'dlis_size': np.bincount(codes, weights=np.where(is_agp, 0, size), minlength=n_wells).astype(np.int64),
+    })
+    wells['AGP'] = wells['agp_files'] > 0
+    wells['DLIS'] = wells['dlis_files'] > 0
+    for tool, bit in TOOL_BITS.items():
+        wells[tool] = (tools & bit) != 0
+
+    return wells.sort_values(['catalog', 'well'], ignore_index=True)
+
+
+def _catalog_stamp(catalog_path: str) -> Dict[str, int]:
+    stat = os.stat(catalog_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _index_catalog(task: Dict[str, str]) -> int:
+    """
+    Scans a catalog and saves its files in the index, returning the number of files. Runs in a worker process.
+    """
+    files = scan_catalog(task['catalog_path'])
+    write_parquet(files, task['output_path'])
+    return len(files)
+
+
+def build_catalog_index(
+    catalog_dir: str,
+    index_dir: str,
+    workers: int = 1,
+    rebuild: bool = False
+) -> Dict[str, object]:
+    """
+    Scans the basin catalogs (`catalog_dir/*.txt`), one per process, into an on-disk index of their AGP
+    and DLIS files.
+
+    The index keeps a Parquet file of the files of each catalog (see `scan_catalog`), the table of the
+    wells of every catalog (see `well_table`) in 'wells.parquet', and the size and mtime of each catalog
+    in 'catalogs.json', so only the catalogs that changed are scanned again.
+
+    Args:
+        catalog_dir (str): Directory with the catalogs.
+        index_dir (str): Directory of the index.
+        workers (int): Number of worker processes scanning catalogs at the same time.
+        rebuild (bool): Whether to scan every catalog, even the unchanged ones.
+
+    Returns:
+        Dict[str, object]: 'scanned' and 'reused' catalogs, 'failed' ones with their errors, and the
+        number of 'files' and 'wells' in the index.
+    """
+    files_dir = os.path.join(index_dir, 'files')
+    os.makedirs(files_dir, exist_ok=True)
+    stamps_path = os.path.join(index_dir, 'catalogs.json')
+
+    known = {}
+    if os.path.exists(stamps_path) and not rebuild:
+        with open(stamps_path) as f:
+            known = json.load(f)
+
+    catalogs = {
+        os.path.splitext(os.path.basename(path))[0]: path
+        for path in sorted(glob.glob(os.path.join(catalog_dir, '*.txt')))
+    }
+    stamps = {catalog: _catalog_stamp(path) for catalog, path in catalogs.items()}
+
+    tasks = [
+        {'catalog': catalog, 'catalog_path': path, 'output_path': os.path.join(files_dir, f"{catalog}.parquet")}
+        for catalog, path in catalogs.items()
+        if known.get(catalog) != stamps[catalog] or not os.path.exists(os.path.join(files_dir, f"{catalog}.parquet"))
+    ]
+
+    failed = {}
+    for task, result in zip(tasks, map_isolated(_index_catalog, tasks, workers)):
+        if isinstance(result, Exception):
+            failed[task['catalog']] = repr(result)
+            stamps.pop(task['catalog'])
+            print(f"Error when indexing {task['catalog_path']}: {result}")
+
+    # Catalogs that were removed (or failed) leave the index
+    removed = [
+        path for path in glob.glob(os.path.join(files_dir, '*.parquet'))
+        if os.path.splitext(os.path.basename(path))[0] not in stamps
+    ]
+    for path in removed:
+        os.remove(path)
+
+    wells_path = os.path.join(index_dir, 'wells.parquet')
+    if tasks or removed or not os.path.exists(wells_path):
+        wells = well_table(load_catalog_files(index_dir))
+        write_parquet(wells, wells_path)
+    else:
+        wells = load_well_table(index_dir)
+
+    with open(stamps_path, 'w') as f:
+        json.dump(stamps, f)
+
+    scanned = [task['catalog'] for task in tasks if task['catalog'] not in failed]
+    return {
+        'scanned': scanned,
+        'reused': [catalog for catalog in stamps if catalog not in scanned],
+        'failed': failed,
+        'files': int(wells['agp_files'].sum() + wells['dlis_files'].sum()),
+        'wells': len(wells),
+    }
+
+
+def load_catalog_files(index_dir: str, catalogs: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads the files of the index.
+
+    Args:
+        index_dir (str): Directory of the index.
+        catalogs (Optional[List[str]]): Catalogs to load. None loads every catalog.
+
+    Returns:
+        pd.DataFrame: The files, see `scan_catalog`.
+    """
+    paths = sorted(glob.glob(os.path.join(index_dir, 'files', '*.parquet')))
+    if catalogs is not None:
+        paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in catalogs]
+
+    frames = [read_parquet(path) for path in paths]
+    if not frames:
+        return _files_frame([], [], [], [], [], [])
+
+    files = pd.concat(frames, ignore_index=True)
+    for column in ('catalog', 'well'):
+        files[column] = files[column].astype('category')
+    files['kind'] = pd.Categorical(files['kind'].astype(str), categories=FILE_KINDS)
+    return files
+
+
+def load_well_table(index_dir: str) -> pd.DataFrame:
+    """
+    Loads the table of the wells of the index, see `well_table`.
+    """
+    return read_parquet(os.path.join(index_dir, 'wells.parquet'))
+
+
+def query_names(query: str) -> List[str]:
+    """
+    Gets the file kinds and tools used by a selection, in upper case.
+    """
+    names = [name.upper() for name in _NAME_PATTERN.findall(query) if name.lower() not in ('and', 'or', 'not')]
+    return list(dict.fromkeys(names))
+
+
+def select_wells(wells: pd.DataFrame, query: str) -> pd.DataFrame:
+    """
+    Selects the wells that have a combination of file kinds and tools.
+
+    Args:
+        wells (pd.DataFrame): Table of the wells, from `well_table` or `load_well_table`.
+        query (str): Boolean expression of the names in `FILE_KINDS` and `TOOL_TYPES` (any case), with
+            & (or ∧, and), | (or ∨, or), ~ (or ¬, !, not) and parentheses, e.g. "AGP ∧ FMI" or "CAST | UBI".
+
+    Returns:
+        pd.DataFrame: The selected rows of the table.
+
+    Raises:
+        ValueError: If the query uses an unknown name.
+    """
+    names = query_names(query)
+    unknown = [name for name in names if name not in FILE_KINDS + TOOL_TYPES]
+    if unknown:
+        raise ValueError(f"Expected names in {FILE_KINDS + TOOL_TYPES}, but got '{', '.join(unknown)}'")
+
+    expression = query
+    for operator, replacement in _QUERY_OPERATORS.items():
+        expression = expression.replace(operator, replacement)
+    expression = _NAME_PATTERN.sub(lambda match: match.group(0).upper()
+                                   if match.group(0).upper() in names else match.group(0).lower(), expression)
+
+    return wells[wells.eval(expression)]
+
+
+def selected_files(files: pd.DataFrame, wells: pd.DataFrame, query: str) -> pd.DataFrame:
+    """
+    Gets the files of the selected wells that have one of the file kinds or tools of the selection, e.g.
+    the AGP and FMI files of the wells of "AGP ∧ FMI", as select_wells_with_agp_fmi.py lists them.
+
+    Args:
+        files (pd.DataFrame): Files of the index, from `load_catalog_files`.
+        wells (pd.DataFrame): Selected wells, from `select_wells`.
+        query (str): The selection.
+
+    Returns:
+        pd.DataFrame: The files, sorted by catalog, well and path.
+    """
+    names = query_names(query)
+    bits = np.uint16(sum(TOOL_BITS[name] for name in names if name in TOOL_BITS))
+
+    keys = pd.MultiIndex.from_frame(files[['catalog', 'well']].astype(str))
+    in_wells = keys.isin(pd.MultiIndex.from_frame(wells[['catalog', 'well']].astype(str)))
+
+    kind = files['kind'].astype(str).to_numpy()
+    matches = np.isin(kind, [name for name in names if name in FILE_KINDS]) | \
+        ((kind == 'DLIS') & ((files['tools'].to_numpy() & bits) != 0))
+
+    return files[in_wells & matches].sort_values(['catalog', 'well', 'path'], ignore_index=True)
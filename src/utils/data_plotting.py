@@ -1724,4 +1724,39 @@ def plot_cali_rhob_drho(
     
     plot_cali_logs_5_runs(axes[0], cali_spliced, cali_01, cali_02, cali_03, cali_04, title_cali)
     plot_rhob_logs_3_runs(axes[1], rhob_spliced, rhob_01, rhob_02, title_rhob)
-    plot_drho_logs_3_runs(axes[2], drho_spliced, drho_01, drho_02, title_drho)
\ No newline at end of file
+    plot_drho_logs_3_runs(axes[2], drho_spliced, drho_01, drho_02, title_drho)
+
+
+def plot_image_log(ax, depth: np.ndarray, image: np.ndarray, title: str, **kwargs) -> None:
+    """
+    Plots an image log (e.g. CAST amplitude or FMI) interval as a colormapped image, depth increasing downwards.
+
+    The interval can be read from an image log store with `ImageLogStore.read(top, bottom)`, so only the
+    plotted rows are loaded.
+
+    Args:
+        ax (matplotlib.axes.Axes): Axes where the image is drawn.
+        depth (np.ndarray): Depth of each row, recorded downwards or upwards.
+        image (np.ndarray): Rows of the image (depth x azimuthal samples).
+        title (str): Title for the plot.
+        **kwargs: Keyword arguments passed on to ax.imshow() (cmap, vmin, vmax, ...).
+
+    Returns:
+        None
+    """
+    kwargs.setdefault('cmap', 'afmhot')
+
+    # Extent so that the pixel centres match the depths and the sample numbers
+    dy = np.mean(np.diff(depth)) if len(depth) > 1 else 1.0
+    extent = (-0.5, image.shape[1] - 0.5, depth[-1] + dy / 2, depth[0] - dy / 2)
+
+    img = ax.imshow(image, aspect='auto', extent=extent, origin='upper', **kwargs)
+    plt.colorbar(img, ax=ax)
+
+    # Depth increases downwards whatever the recording direction
+    if not ax.yaxis_inverted():
+        ax.invert_yaxis()
+
+    ax.set_title(title, fontweight='bold')
+    ax.set_xlabel('Sample', fontweight='bold')
+    ax.set_ylabel('Depth', fontweight='bold')
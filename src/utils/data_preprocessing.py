@@ -1,9 +1,15 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
 import os
 import glob
 import re
+from utils.depth_keys import DEPTH_KEY_COLUMN, depth_to_key
+from utils.validity import ValidityMask
+
+# Null value used by the DLIS files for missing samples
+DLIS_NULL_VALUES = [-999.25]
+
 
 def logical_files_to_ndarray(logical_files: List[object]) -> Dict[int, Dict[int, np.ndarray]]:
     """
@@ -37,6 +43,50 @@ def logical_files_to_ndarray(logical_files: List[object]) -> Dict[int, Dict[int,
     return logical_files_dict
 
 
+def frame_to_dataframe(curves: np.ndarray) -> pd.DataFrame:
+    """
+    Converts the structured array returned by `frame.curves()` into a DataFrame without walking its rows.
+
+    Scalar channels become one column each and multi-dimensional channels (e.g. FBB1 or AMP image arrays)
+    become a 2-D block of columns named 'CHANNEL[j]', one per sample. The columns are views on the
+    structured array, so no data is copied element by element.
+
+    Args:
+        curves (np.ndarray): Structured array where each field is a channel of the frame.
+
+    Returns:
+        pd.DataFrame: DataFrame with one column per scalar channel and per image channel sample, in the
+        same order as the channels of the frame.
+    """
+    blocks = []
+    scalar_columns = {}
+
+    for channel_name in curves.dtype.names:
+        channel = curves[channel_name]  # View on the field, no copy
+
+        if channel.ndim == 1:
+            scalar_columns[channel_name] = channel
+            continue
+
+        # Flush the scalar columns collected so far to keep the channel order
+        if scalar_columns:
+            blocks.append(pd.DataFrame(scalar_columns, copy=False))
+            scalar_columns = {}
+
+        # Image channels are kept as a single 2-D block
+        image = channel.reshape(channel.shape[0], int(np.prod(channel.shape[1:])))
+        columns = [f"{channel_name}[{j}]" for j in range(image.shape[1])]
+        blocks.append(pd.DataFrame(image, columns=columns, copy=False))
+
+    if scalar_columns or not blocks:
+        blocks.append(pd.DataFrame(scalar_columns, copy=False))
+
+    if len(blocks) == 1:
+        return blocks[0]
+
+    return pd.concat(blocks, axis=1)
+
+
 def ndarray_to_dataframe(logical_files_dict: Dict[int, Dict[int, np.ndarray]]) -> Dict[int, Dict[int, pd.DataFrame]]:
     """
     Converts a dictionary of NumPy arrays (representing well log frames) into a dictionary of pandas DataFrames.
@@ -49,31 +99,19 @@ def ndarray_to_dataframe(logical_files_dict: Dict[int, Dict[int, np.ndarray]]) -
     Returns:
         Dict[int, Dict[int, pd.DataFrame]]: A nested dictionary where the outer keys represent the logical file 
         index and the inner keys represent frame indices, each associated with pandas DataFrames, where the 
-        columns correspond to the curve names and the rows correspond to the data points.
+        columns correspond to the curve names and the rows correspond to the data points. Multi-dimensional
+        channels are expanded by `frame_to_dataframe` into one column per sample.
     """
-    logical_file_index = 0
     logical_files_df_dict = {}
 
-    for logical_file in logical_files_dict.values():
+    for logical_file_index, logical_file in enumerate(logical_files_dict.values()):
         
         dataframe_dict = {}
-        frame_index = 0
-
-        for frame in logical_file.values():
-            i = 0
-            channel_names = frame.dtype.names  # Extract the names of the data channels (columns)
-            frame_dict = {}
-
-            for channel_name in channel_names:
-                curves = [t[i] for t in frame]  # Extract data points for each curve (column)
-                frame_dict[channel_name] = curves
-                i += 1
 
-            dataframe_dict[frame_index] = pd.DataFrame(frame_dict)  # Convert the curve data into a DataFrame
-            frame_index += 1
+        for frame_index, frame in enumerate(logical_file.values()):
+            dataframe_dict[frame_index] = frame_to_dataframe(frame)  # Convert the curve data into a DataFrame
 
         logical_files_df_dict[logical_file_index] = dataframe_dict
-        logical_file_index += 1
 
     return logical_files_df_dict
 
@@ -441,4 +479,657 @@ def remove_nan_values(
                     # Remove lines with NaN
                     df.dropna(inplace=True)
                 except:
-                    pass
\ No newline at end of file
+                    pass
+
+
+def drop_frame_number(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Removes the FRAMENO column, when the frame has one.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+
+    Returns:
+        pd.DataFrame: The frame without the FRAMENO column.
+    """
+    return df.drop(columns='FRAMENO', errors='ignore')
+
+
+def rename_depth_index(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renames the depth index column (INDEX, INDEX [0.1 in], ...) to TDEP.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+
+    Returns:
+        pd.DataFrame: The frame with the depth column named TDEP.
+    """
+    return df.rename(columns=lambda col: 'TDEP' if col.startswith('INDEX') else col)
+
+
+def round_depth(df: pd.DataFrame, decimals: int = 1) -> pd.DataFrame:
+    """
+    Rounds the TDEP column.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        decimals (int): Number of decimal places.
+
+    Returns:
+        pd.DataFrame: The frame with the rounded TDEP column.
+    """
+    return df.assign(TDEP=df['TDEP'].round(decimals))
+
+
+def replace_null_values(df: pd.DataFrame, null_values: List[float] = DLIS_NULL_VALUES) -> pd.DataFrame:
+    """
+    Replaces the null values of the DLIS files with NaN.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        null_values (List[float]): Values that represent a missing sample.
+
+    Returns:
+        pd.DataFrame: The frame with NaN in place of the null values.
+    """
+    return df.replace(null_values, np.nan)
+
+
+def trim_casing(
+    df: pd.DataFrame,
+    surface_coating: float,
+    intermediary_coating: float,
+    distance: float = 20,
+    margin: float = 5
+) -> pd.DataFrame:
+    """
+    Removes the samples near a casing shoe from a frame that starts close to it.
+
+    When the top of the frame is less than `distance` meters away from a casing shoe, the samples
+    above the shoe depth plus `margin` are removed.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        surface_coating (float): Depth of the surface casing shoe, or None.
+        intermediary_coating (float): Depth of the intermediary casing shoe, or None.
+        distance (float): Distance from the shoe under which the frame is trimmed.
+        margin (float): Depth below the shoe from which the samples are kept.
+
+    Returns:
+        pd.DataFrame: The trimmed frame.
+    """
+    for coating in (surface_coating, intermediary_coating):
+        if coating is None or df.empty:
+            continue
+
+        # Remove values near the coating
+        if abs(df['TDEP'].min() - coating) < distance:
+            df = df.loc[df['TDEP'] >= coating + margin].reset_index(drop=True)
+
+    return df
+
+
+def assign_bit_size(
+    df: pd.DataFrame,
+    surface_coating: float,
+    intermediary_coating: float,
+    surface_drill: float,
+    intermediary_drill: float,
+    open_hole_drill: float = 8.5
+) -> pd.DataFrame:
+    """
+    Adds the BS (bit size) column from the depth of the casing shoes and the drill diameters.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        surface_coating (float): Depth of the surface casing shoe.
+        intermediary_coating (float): Depth of the intermediary casing shoe, or None.
+        surface_drill (float): Drill diameter of the surface phase.
+        intermediary_drill (float): Drill diameter of the intermediary phase, or None.
+        open_hole_drill (float): Drill diameter below the last casing shoe.
+
+    Returns:
+        pd.DataFrame: The frame with the BS column, or the frame unchanged when the casing data is incomplete.
+    """
+    if surface_coating is None or surface_drill is None:
+        return df
+
+    if intermediary_coating is not None:
+        if intermediary_drill is None:
+            return df
+        bins = [0, surface_coating, intermediary_coating, float('inf')]
+        labels = [surface_drill, intermediary_drill, open_hole_drill]
+    else:
+        bins = [0, surface_coating, float('inf')]
+        labels = [surface_drill, open_hole_drill]
+
+    return df.assign(BS=pd.cut(df['TDEP'], bins=bins, labels=labels, right=False))
+
+
+def casing_trim_depth(
+    depth: np.ndarray,
+    surface_coating: float,
+    intermediary_coating: float,
+    distance: float = 20,
+    margin: float = 5
+) -> float:
+    """
+    Computes the depth from which a frame is kept by the casing trimming of `trim_casing`.
+
+    Args:
+        depth (np.ndarray): Depth of the samples of the frame.
+        surface_coating (float): Depth of the surface casing shoe, or None.
+        intermediary_coating (float): Depth of the intermediary casing shoe, or None.
+        distance (float): Distance from the shoe under which the frame is trimmed.
+        margin (float): Depth below the shoe from which the samples are kept.
+
+    Returns:
+        float: The depth from which the samples are kept, or -inf when the frame is not trimmed.
+    """
+    keep_from = -np.inf
+    valid = depth[~np.isnan(depth)]
+
+    for coating in (surface_coating, intermediary_coating):
+        if coating is None or valid.size == 0:
+            continue
+
+        if abs(valid.min() - coating) < distance:
+            keep_from = coating + margin
+            valid = valid[valid >= keep_from]
+
+    return keep_from
+
+
+def bit_size_from_depth(
+    depth: np.ndarray,
+    surface_coating: float,
+    intermediary_coating: float,
+    surface_drill: float,
+    intermediary_drill: float,
+    open_hole_drill: float = 8.5,
+    dtype: type = np.float64
+) -> np.ndarray:
+    """
+    Computes the bit size of each sample with a sorted search over the casing shoe depths.
+
+    Gives the same values as the `pd.cut` of `assign_bit_size` (intervals closed on the left, NaN above
+    depth 0), as plain floats instead of a categorical.
+
+    Args:
+        depth (np.ndarray): Depth of the samples.
+        surface_coating (float): Depth of the surface casing shoe.
+        intermediary_coating (float): Depth of the intermediary casing shoe, or None.
+        surface_drill (float): Drill diameter of the surface phase.
+        intermediary_drill (float): Drill diameter of the intermediary phase, or None.
+        open_hole_drill (float): Drill diameter below the last casing shoe.
+        dtype (type): Float dtype of the result.
+
+    Returns:
+        np.ndarray: The bit size of each sample, or None when the casing data is incomplete.
+    """
+    if surface_coating is None or surface_drill is None:
+        return None
+
+    if intermediary_coating is not None:
+        if intermediary_drill is None:
+            return None
+        shoes = np.array([surface_coating, intermediary_coating])
+        drills = np.array([surface_drill, intermediary_drill, open_hole_drill, np.nan], dtype=dtype)
+    else:
+        shoes = np.array([surface_coating])
+        drills = np.array([surface_drill, open_hole_drill, np.nan], dtype=dtype)
+
+    phase = np.searchsorted(shoes, depth, side='right')
+
+    # NaN depths and depths above the surface are outside of every interval
+    phase[~(depth >= 0)] = len(drills) - 1
+
+    return drills[phase]
+
+
+def add_bit_size(
+    df: pd.DataFrame,
+    surface_coating: float,
+    intermediary_coating: float,
+    surface_drill: float,
+    intermediary_drill: float,
+    open_hole_drill: float = 8.5,
+    dtype: type = np.float32
+) -> pd.DataFrame:
+    """
+    Adds the BS (bit size) column of `assign_bit_size` as a plain float column, as `preprocess_frame` does.
+
+    Returns:
+        pd.DataFrame: The frame with the BS column, or the frame unchanged when the casing data is incomplete.
+    """
+    bit_size = bit_size_from_depth(df['TDEP'].to_numpy(dtype=np.float64), surface_coating, intermediary_coating,
+                                   surface_drill, intermediary_drill, open_hole_drill, dtype)
+    return df.assign(BS=bit_size) if bit_size is not None else df
+
+
+def casing_bit_size_reason(coating_location: Dict[str, float], drill_diameter: Dict[str, float]) -> Optional[str]:
+    """
+    Explains why no BS column can be assigned from the casing data of a well, or returns None when it can.
+    """
+    if coating_location.get('Surface Coating') is None:
+        return 'no surface casing depth'
+    if drill_diameter.get('Surface Drill') is None:
+        return 'no surface drill diameter'
+    if coating_location.get('Intermediary Coating') is not None and drill_diameter.get('Intermediary Drill') is None:
+        return 'no intermediary drill diameter'
+    return None
+
+
+def apply_well_casing(
+    frames: Dict[str, pd.DataFrame],
+    coating_location: Dict[str, float],
+    drill_diameter: Dict[str, float],
+    open_hole_drill: float = 8.5,
+    distance: float = 20,
+    margin: float = 5,
+    bs_dtype: type = np.float32
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, object]]:
+    """
+    Trims the frames of a well near the casing shoes and assigns their BS column, for every frame at once.
+
+    The depths of all the frames are concatenated, the top of each frame is found with one reduction per
+    casing shoe, and the bit size of every sample comes from a single `searchsorted` over the shoe
+    depths. The frames are the same as `trim_casing` followed by `assign_bit_size`, with BS as a plain
+    float column instead of a categorical.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): The frames of the well, with their TDEP column.
+        coating_location (Dict[str, float]): 'Surface Coating' and 'Intermediary Coating' depths of the
+            well, from `extract_coating_location`.
+        drill_diameter (Dict[str, float]): 'Surface Drill' and 'Intermediary Drill' diameters of the well,
+            from `calculate_drill_diameters`.
+        open_hole_drill (float): Drill diameter below the last casing shoe.
+        distance (float): Distance from a shoe under which a frame is trimmed.
+        margin (float): Depth below the shoe from which the samples are kept.
+        bs_dtype (type): Float dtype of the BS column.
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, object]]: The trimmed frames, and the statistics of the
+        well: number of frames and rows, rows and frames trimmed, frames left empty, rows per bit size,
+        and the reason why BS was not assigned (None when it was).
+    """
+    surface_coating = coating_location.get('Surface Coating')
+    intermediary_coating = coating_location.get('Intermediary Coating')
+
+    names = list(frames)
+    lengths = np.array([len(frames[name]) for name in names], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    depth = (np.concatenate([frames[name]['TDEP'].to_numpy(dtype=np.float64) for name in names])
+             if names else np.empty(0))
+    frame_of_row = np.repeat(np.arange(len(names)), lengths)
+
+    def frame_tops(keep: np.ndarray) -> np.ndarray:
+        # Top (smallest kept, non-NaN depth) of each frame, NaN for the empty ones
+        tops = np.full(len(names), np.nan)
+        non_empty = lengths > 0
+        if non_empty.any():
+            kept_depth = np.where(keep, depth, np.nan)
+            tops[non_empty] = np.fmin.reduceat(kept_depth, starts[non_empty])
+        return tops
+
+    # The same two passes as trim_casing, for the frames of the well at once
+    keep = np.ones(len(depth), dtype=bool)
+    for coating in (surface_coating, intermediary_coating):
+        if coating is None:
+            continue
+        near = np.abs(frame_tops(keep) - coating) < distance
+        keep &= ~near[frame_of_row] | (depth >= coating + margin)
+
+    reason = casing_bit_size_reason(coating_location, drill_diameter)
+    bit_size = None
+    if reason is None:
+        bit_size = bit_size_from_depth(depth, surface_coating, intermediary_coating, drill_diameter.get('Surface Drill'),
+                                       drill_diameter.get('Intermediary Drill'), open_hole_drill, bs_dtype)
+
+    trimmed = {}
+    kept_rows = np.bincount(frame_of_row[keep], minlength=len(names))
+    for i, name in enumerate(names):
+        rows = slice(starts[i], starts[i] + lengths[i])
+        frame_keep = keep[rows]
+        df = frames[name] if frame_keep.all() else frames[name].loc[frame_keep].reset_index(drop=True)
+        if bit_size is not None:
+            df = df.assign(BS=bit_size[rows][frame_keep])
+        trimmed[name] = df
+
+    bit_sizes = pd.Series(bit_size[keep] if bit_size is not None else [], dtype=bs_dtype).value_counts()
+    stats = {
+        'frames': len(names),
+        'rows': int(lengths.sum()),
+        'trimmed_rows': int(lengths.sum() - kept_rows.sum()),
+        'trimmed_frames': int((kept_rows < lengths).sum()),
+        'empty_frames': int(((kept_rows == 0) & (lengths > 0)).sum()),
+        'bs_rows': {float(size): int(count) for size, count in bit_sizes.sort_index().items()},
+        'bs_missing_reason': reason,
+    }
+
+    return trimmed, stats
+
+
+def apply_casing_table(
+    wells: Dict[str, Dict[str, pd.DataFrame]],
+    coating_locations: Dict[str, Dict[str, float]],
+    drill_diameters: Dict[str, Dict[str, float]],
+    open_hole_drill: float = 8.5,
+    distance: float = 20,
+    margin: float = 5,
+    bs_dtype: type = np.float32
+) -> Tuple[Dict[str, Dict[str, pd.DataFrame]], pd.DataFrame]:
+    """
+    Applies `apply_well_casing` to every well with the casing table of the AGP reports.
+
+    Args:
+        wells (Dict[str, Dict[str, pd.DataFrame]]): The frames of each well, by frame name.
+        coating_locations (Dict[str, Dict[str, float]]): Output of `extract_coating_location`.
+        drill_diameters (Dict[str, Dict[str, float]]): Output of `calculate_drill_diameters`.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, pd.DataFrame]], pd.DataFrame]: The trimmed frames of each well, and one
+        row of statistics per well (see `apply_well_casing`). Wells missing from the AGP table are kept
+        untrimmed, without BS.
+    """
+    processed, records = {}, []
+    for well, frames in wells.items():
+        coating_location = coating_locations.get(well, {})
+        processed[well], stats = apply_well_casing(frames, coating_location, drill_diameters.get(well, {}),
+                                                   open_hole_drill, distance, margin, bs_dtype)
+        if well not in coating_locations:
+            stats['bs_missing_reason'] = 'well not in the AGP reports'
+        records.append(dict(well=well, **stats))
+
+    columns = ['well', 'frames', 'rows', 'trimmed_rows', 'trimmed_frames', 'empty_frames', 'bs_rows', 'bs_missing_reason']
+    return processed, pd.DataFrame(records, columns=columns)
+
+
+def preprocess_frame(
+    df: pd.DataFrame,
+    null_values: List[float] = DLIS_NULL_VALUES,
+    decimals: int = 1,
+    surface_coating: float = None,
+    intermediary_coating: float = None,
+    surface_drill: float = None,
+    intermediary_drill: float = None,
+    open_hole_drill: float = 8.5,
+    distance: float = 20,
+    margin: float = 5,
+    depth_key: bool = False
+) -> pd.DataFrame:
+    """
+    Applies every step of preprocess_dlis.ipynb to a raw frame in a single pass.
+
+    The steps are the same as `drop_frame_number`, `rename_depth_index`, `round_depth`,
+    `replace_null_values`, `trim_casing` and `assign_bit_size`, but the numeric columns are copied
+    once into a float64 block and every step then works in place on that block. Null values become
+    NaN, so no column turns into object dtype, and BS is a compact float32 column.
+
+    Args:
+        df (pd.DataFrame): The raw frame, as saved by `dlis_raw_dfs_to_csv`.
+        null_values (List[float]): Values that represent a missing sample.
+        decimals (int): Number of decimal places of TDEP.
+        surface_coating (float): Depth of the surface casing shoe, or None.
+        intermediary_coating (float): Depth of the intermediary casing shoe, or None.
+        surface_drill (float): Drill diameter of the surface phase, or None.
+        intermediary_drill (float): Drill diameter of the intermediary phase, or None.
+        open_hole_drill (float): Drill diameter below the last casing shoe.
+        distance (float): Distance from a shoe under which the frame is trimmed.
+        margin (float): Depth below the shoe from which the samples are kept.
+        depth_key (bool): Whether to add the integer depth key of the rounded TDEP (see `depth_to_key`)
+            after the TDEP column, so the frame can be joined with `merge_on_depth_key`.
+
+    Returns:
+        pd.DataFrame: The preprocessed frame.
+    """
+    columns = [col for col in df.columns if col != 'FRAMENO']
+    renamed = ['TDEP' if col.startswith('INDEX') else col for col in columns]
+    numeric = [col for col in columns if pd.api.types.is_numeric_dtype(df[col].dtype)]
+    numeric_renamed = [renamed[columns.index(col)] for col in numeric]
+
+    # The only copy of the data: every numeric column in one float64 block
+    values = df[numeric].to_numpy(dtype=np.float64, copy=True)
+    depth = values[:, numeric_renamed.index('TDEP')]
+
+    np.round(depth, decimals, out=depth)
+
+    # Casing trimming, as a row mask over the rounded depth
+    keep_from = casing_trim_depth(depth, surface_coating, intermediary_coating, distance, margin)
+    keep = depth >= keep_from if np.isfinite(keep_from) else None
+    if keep is not None:
+        values = values[keep]
+        depth = values[:, numeric_renamed.index('TDEP')]
+
+    for null_value in null_values:
+        np.putmask(values, values == null_value, np.nan)
+
+    result = pd.DataFrame(values, columns=numeric_renamed, copy=False)
+
+    # Non-numeric columns (rare in DLIS frames) are carried over in their original position
+    if len(numeric) != len(columns):
+        for position, col in enumerate(columns):
+            if col not in numeric:
+                column = df[col].to_numpy()
+                result.insert(position, renamed[position], column[keep] if keep is not None else column)
+
+    bit_size = bit_size_from_depth(depth, surface_coating, intermediary_coating,
+                                   surface_drill, intermediary_drill, open_hole_drill, np.float32)
+    if bit_size is not None:
+        result['BS'] = bit_size
+
+    if depth_key:
+        result.insert(result.columns.get_loc('TDEP') + 1, DEPTH_KEY_COLUMN, depth_to_key(depth))
+
+    return result
+
+
+def depth_grid(min_depth: float, max_depth: float, step: float = 0.01, decimals: int = 2) -> np.ndarray:
+    """
+    Creates a regular depth grid from min_depth to max_depth, both included.
+
+    Args:
+        min_depth (float): First depth of the grid.
+        max_depth (float): Last depth of the grid.
+        step (float): Spacing of the grid.
+        decimals (int): Number of decimal places the depths are rounded to.
+
+    Returns:
+        np.ndarray: The depths of the grid.
+    """
+    return np.round(np.arange(min_depth, max_depth + step / 10, step), decimals)
+
+
+def resample_lithology(
+    df_lithology: pd.DataFrame,
+    target_depths: np.ndarray,
+    depth_column: str = 'TDEP',
+    lithology_column: str = 'LITOLOGIA',
+    decimals: int = 2,
+    depth_key: bool = False
+) -> pd.DataFrame:
+    """
+    Assigns to each target depth the lithology of the nearest described depth.
+
+    A target depth that matches a described depth takes its lithology. Otherwise it takes the lithology
+    of the described depth just above it when it is above the midpoint (rounded to `decimals`) between
+    its two neighbours, and the one just below it from the midpoint on. Target depths outside of the
+    described range get NaN. Uses a sorted search, O((N + M) log N) for N described and M target depths.
+
+    Args:
+        df_lithology (pd.DataFrame): Described lithology, one row per depth.
+        target_depths (np.ndarray): Depths to resample to, e.g. from `depth_grid`.
+        depth_column (str): Name of the depth column of df_lithology.
+        lithology_column (str): Name of the lithology column of df_lithology.
+        decimals (int): Number of decimal places of the midpoints.
+        depth_key (bool): Whether to add the integer depth key of the target depths after TDEP.
+
+    Returns:
+        pd.DataFrame: Columns 'TDEP' (the target depths) and 'Lithology'.
+    """
+    target_depths = np.asarray(target_depths, dtype=np.float64)
+
+    # Stable sort, so repeated depths keep their order as in the file
+    order = np.argsort(df_lithology[depth_column].to_numpy(dtype=np.float64), kind='stable')
+    depths = df_lithology[depth_column].to_numpy(dtype=np.float64)[order]
+    lithologies = np.append(df_lithology[lithology_column].to_numpy(dtype=object)[order], np.nan)
+    missing = len(depths)  # Position of the NaN appended to the lithologies
+
+    first_not_below = np.searchsorted(depths, target_depths, side='left')
+    first_above = np.searchsorted(depths, target_depths, side='right')
+
+    exact = first_above > first_not_below
+    inside = (first_not_below > 0) & (first_above < len(depths))
+
+    below = np.clip(first_not_below - 1, 0, max(len(depths) - 1, 0))
+    above = np.clip(first_above, 0, max(len(depths) - 1, 0))
+    mid = np.round((depths[below] + depths[above]) / 2, decimals) if len(depths) else target_depths
+
+    nearest = np.where(target_depths < mid, below, above)
+    nearest = np.where(inside, nearest, missing)
+    nearest = np.where(exact, first_not_below, nearest)
+
+    result = pd.DataFrame({'TDEP': target_depths, 'Lithology': lithologies[nearest]})
+    if depth_key:
+        result.insert(1, DEPTH_KEY_COLUMN, depth_to_key(target_depths))
+
+    return result
+
+
+def _block_average(depth: np.ndarray, values: np.ndarray, target_depths: np.ndarray) -> np.ndarray:
+    """
+    Averages the valid samples of every curve that fall in the block of each target depth.
+
+    The block of a target depth goes from the midpoint with the previous target to the midpoint with
+    the next one; the first and last blocks are symmetric around their target.
+    """
+    n_targets, n_curves = len(target_depths), values.shape[1]
+    result = np.full((n_targets, n_curves), np.nan)
+    if n_targets == 0:
+        return result
+
+    midpoints = (target_depths[1:] + target_depths[:-1]) / 2
+    first_half = (midpoints[0] - target_depths[0]) if n_targets > 1 else 0.0
+    last_half = (target_depths[-1] - midpoints[-1]) if n_targets > 1 else 0.0
+    edges = np.concatenate([[target_depths[0] - first_half], midpoints, [target_depths[-1] + last_half]])
+
+    block = np.searchsorted(edges, depth, side='right') - 1
+    # The last edge closes the last block
+    block[depth == edges[-1]] = n_targets - 1
+    inside = (block >= 0) & (block < n_targets)
+
+    valid = ~np.isnan(values) & inside[:, None]
+    # One bincount for every curve: the bins are (block, curve) pairs
+    bins = (block[:, None] * n_curves + np.arange(n_curves))[valid]
+    sums = np.bincount(bins, weights=values[valid], minlength=n_targets * n_curves)
+    counts = np.bincount(bins, minlength=n_targets * n_curves)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averages = sums / counts
+
+    result[:] = averages.reshape(n_targets, n_curves)
+    return result
+
+
+def resample_logs(
+    df: pd.DataFrame,
+    curves: List[str],
+    target_depths: np.ndarray,
+    method: str = 'linear',
+    depth_column: str = 'TDEP',
+    max_gap: float = None,
+    decimals: int = None,
+    depth_key: bool = False,
+    mask: Optional[ValidityMask] = None
+) -> pd.DataFrame:
+    """
+    Resamples several curves to a target depth grid in one call and returns them aligned on the grid.
+
+    Every curve uses only its own valid (non-NaN) samples and is NaN outside of its own valid depth
+    range, as when each curve is interpolated separately after dropping its NaN values.
+
+    Args:
+        df (pd.DataFrame): Log data with the depth column and the curves. The depth may be increasing
+            or decreasing.
+        curves (List[str]): Curves to resample.
+        target_depths (np.ndarray): Depths of the new grid, in increasing order.
+        method (str): 'linear' interpolation, 'nearest' sample (ties go to the shallower sample), or
+            'block_average' of the samples between the midpoints of consecutive target depths.
+        depth_column (str): Name of the depth column.
+        max_gap (float): Largest distance between two valid samples that is interpolated across
+            ('linear' and 'nearest'). None interpolates across every gap.
+        decimals (int): Number of decimal places the resampled values are rounded to. None keeps them.
+        depth_key (bool): Whether to add the integer depth key of the target depths after TDEP.
+        mask (Optional[ValidityMask]): Validity masks of the frame. The curves it has take their valid
+            samples from it ('linear' and 'nearest') instead of checking the data.
+
+    Returns:
+        pd.DataFrame: The TDEP column with the target depths and one column per curve.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in ('linear', 'nearest', 'block_average'):
+        raise ValueError(f"Expected 'linear', 'nearest' or 'block_average', but got '{method}'")
+
+    target_depths = np.asarray(target_depths, dtype=np.float64)
+
+    order = np.argsort(df[depth_column].to_numpy(dtype=np.float64), kind='stable')
+    depth = df[depth_column].to_numpy(dtype=np.float64)[order]
+    values = df[curves].to_numpy(dtype=np.float64)[order]
+
+    # Samples without depth cannot be placed on the grid
+    values[np.isnan(depth)] = np.nan
+
+    if method == 'block_average':
+        resampled = _block_average(depth, values, target_depths)
+    else:
+        # Curve-major, so each curve is written contiguously and the DataFrame can use it without a copy
+        resampled = np.empty((len(curves), len(target_depths)))
+
+        if mask is not None and not mask.matches(df, curves):
+            mask = None
+
+        # The depth is sorted once; each curve then only searches its own valid samples
+        for i in range(len(curves)):
+            if mask is not None and curves[i] in mask:
+                valid = mask.valid([curves[i]])[order]
+            else:
+                valid = ~np.isnan(values[:, i])
+            curve_depth, curve_values = depth[valid], values[valid, i]
+            if len(curve_depth) == 0:
+                resampled[i] = np.nan
+                continue
+
+            inside = (target_depths >= curve_depth[0]) & (target_depths <= curve_depth[-1])
+
+            if method == 'linear':
+                curve_resampled = np.interp(target_depths, curve_depth, curve_values)
+
+            if method == 'nearest' or max_gap is not None:
+                # First valid sample at or below each target depth and last valid sample at or above it
+                after = np.minimum(np.searchsorted(curve_depth, target_depths, side='left'), len(curve_depth) - 1)
+                exact = curve_depth[after] == target_depths
+                before = np.where(exact, after, np.maximum(after - 1, 0))
+
+                if method == 'nearest':
+                    closer_before = target_depths - curve_depth[before] <= curve_depth[after] - target_depths
+                    curve_resampled = np.where(closer_before, curve_values[before], curve_values[after])
+
+                if max_gap is not None:
+                    inside &= (curve_depth[after] - curve_depth[before]) <= max_gap
+
+            np.copyto(resampled[i], np.where(inside, curve_resampled, np.nan))
+
+        resampled = resampled.T
+
+    if decimals is not None:
+        resampled = np.round(resampled, decimals)
+
+    result = pd.DataFrame(resampled, columns=curves, copy=False)
+    result.insert(0, 'TDEP', target_depths)
+    if depth_key:
+        result.insert(1, DEPTH_KEY_COLUMN, depth_to_key(target_depths))
+
+    return result
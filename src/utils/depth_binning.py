@@ -0,0 +1,251 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Statistics computed for each column of each depth bin
+BIN_STATISTICS = ['mean', 'std', 'min', 'max', 'count']
+
+
+def depth_bin_keys(depth: np.ndarray, step: float = 0.01, decimals: int = 6) -> np.ndarray:
+    """
+    Gets the integer key of the depth bin of each depth: floor(depth / step).
+
+    The quotient is rounded to `decimals` before the floor, so a depth that falls on a bin edge is not
+    pushed to the previous bin by the float error of the division (400.03 / 0.01 = 40002.999...), while
+    a depth just above the edge keeps its bin (400.02996 / 0.01 = 40002.996 stays in bin 40002).
+
+    Args:
+        depth (np.ndarray): Depths.
+        step (float): Width of the bins.
+        decimals (int): Decimals of the quotient kept before the floor.
+
+    Returns:
+        np.ndarray: int64 bin keys. The top of bin k is k * step.
+
+    Raises:
+        ValueError: If a depth is NaN or infinite, since it has no bin.
+    """
+    depth = np.asarray(depth, dtype=np.float64)
+    if not np.isfinite(depth).all():
+        raise ValueError("Depth bins need finite depths, but got NaN or infinite depths")
+
+    return np.floor(np.round(depth / step, decimals)).astype(np.int64)
+
+
+def step_decimals(step: float) -> int:
+    """
+    Gets the number of decimals of a bin width, used to round the bin depths: 2 for 0.01, 4 for 0.1524.
+    """
+    return len(f"{step:.10f}".rstrip('0').split('.')[1])
+
+
+class DepthBinAggregator:
+    """
+    One-pass aggregation of rows in depth order into fixed-width depth bins.
+
+    Rows are fed in chunks, in increasing or decreasing depth order. Each chunk is reduced per bin with
+    vectorized operations, and only the running statistics of the last, still open bin are kept between
+    chunks, so the memory does not depend on the number of rows. The standard deviation is combined
+    across chunks with the parallel variance formula and uses ddof=1, like pandas. NaN values are
+    skipped, as in `groupby().agg()`, and so are the rows without a finite depth.
+
+    Args:
+        columns (List[str]): Columns to aggregate.
+        step (float): Width of the bins, e.g. 0.01 m.
+        depth_column (str): Name of the depth column of the input rows.
+        bin_column (str): Name of the bin depth column of the output.
+        statistics (Sequence[str]): Statistics to output, among `BIN_STATISTICS`. The output columns are
+            named '{column}_{statistic}'.
+        decimals (Optional[int]): Decimals of the output bin depths. None uses the decimals of the step.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        step: float = 0.01,
+        depth_column: str = 'Depth',
+        bin_column: str = 'TDEP',
+        statistics: Sequence[str] = BIN_STATISTICS,
+        decimals: Optional[int] = None
+    ):
+        unknown = [statistic for statistic in statistics if statistic not in BIN_STATISTICS]
+        if unknown:
+            raise ValueError(f"Unknown statistics {unknown}, expected some of {BIN_STATISTICS}")
+
+        self.columns = list(columns)
+        self.step = step
+        self.depth_column = depth_column
+        self.bin_column = bin_column
+        self.statistics = list(statistics)
+        self.decimals = decimals if decimals is not None else step_decimals(step)
+
+        # Running statistics of the open bin: key and per column count, mean, M2, min and max
+        self._open = None
+
+    def _reduce(self, keys: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Reduces a chunk to the statistics of each run of equal keys.
+        """
+        starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+        valid = ~np.isnan(values)
+
+        count = np.add.reduceat(valid, starts, axis=0).astype(np.float64)
+        total = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+
+        lengths = np.diff(np.concatenate([starts, [len(keys)]]))
+        deviations = np.where(valid, values - np.repeat(mean, lengths, axis=0), 0.0)
+
+        return {
+            'key': keys[starts],
+            'count': count,
+            'mean': mean,
+            'm2': np.add.reduceat(deviations * deviations, starts, axis=0),
+            'min': np.fmin.reduceat(values, starts, axis=0),
+            'max': np.fmax.reduceat(values, starts, axis=0),
+        }
+
+    @staticmethod
+    def _combine(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Combines the statistics of two parts of the same bin.
+        """
+        count = a['count'] + b['count']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = b['mean'] - a['mean']
+            weight = np.where(count > 0, b['count'] / count, 0.0)
+            mean = np.where(a['count'] == 0, b['mean'], np.where(b['count'] == 0, a['mean'], a['mean'] + delta * weight))
+            m2 = a['m2'] + b['m2'] + np.where((a['count'] > 0) & (b['count'] > 0), delta * delta * a['count'] * weight, 0.0)
+
+        return {
+            'key': a['key'],
+            'count': count,
+            'mean': mean,
+            'm2': m2,
+            'min': np.fmin(a['min'], b['min']),
+            'max': np.fmax(a['max'], b['max']),
+        }
+
+    def _output(self, bins: Dict[str, np.ndarray]) -> pd.DataFrame:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = {
+                'mean': bins['mean'],
+                'std': np.sqrt(np.where(bins['count'] > 1, bins['m2'] / (bins['count'] - 1), np.nan)),
+                'min': bins['min'],
+                'max': bins['max'],
+                'count': bins['count'].astype(np.int64),
+            }
+
+        output = {self.bin_column: np.round(bins['key'] * self.step, self.decimals)}
+        for c, column in enumerate(self.columns):
+            for statistic in self.statistics:
+                output[f"{column}_{statistic}"] = values[statistic][:, c]
+
+        return pd.DataFrame(output)
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds a chunk of rows and returns the bins that are complete.
+
+        Args:
+            chunk (pd.DataFrame): Rows with the depth column and the aggregated columns, continuing the
+                depth order of the previous chunks.
+
+        Returns:
+            pd.DataFrame: The bins closed by this chunk, in input order. The last bin of the chunk stays
+            open until a row of another bin (or `flush`) arrives.
+        """
+        depth = chunk[self.depth_column].to_numpy(dtype=np.float64)
+        # Rows without a depth have no bin and are skipped, as the NaN keys of groupby
+        finite = np.isfinite(depth)
+        if not finite.all():
+            chunk, depth = chunk[finite], depth[finite]
+
+        if chunk.empty:
+            return self._output(self._empty())
+
+        keys = depth_bin_keys(depth, self.step)
+        bins = self._reduce(keys, chunk[self.columns].to_numpy(dtype=np.float64))
+
+        if self._open is not None:
+            if self._open['key'][0] == bins['key'][0]:
+                first = self._combine(self._open, {name: values[:1] for name, values in bins.items()})
+                bins = {name: np.concatenate([first[name], values[1:]]) for name, values in bins.items()}
+            else:
+                bins = {name: np.concatenate([self._open[name], values]) for name, values in bins.items()}
+
+        self._open = {name: values[-1:] for name, values in bins.items()}
+        return self._output({name: values[:-1] for name, values in bins.items()})
+
+    def flush(self) -> pd.DataFrame:
+        """
+        Closes the open bin and returns it.
+        """
+        bins, self._open = self._open, None
+        return self._output(bins if bins is not None else self._empty())
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        empty = np.empty((0, len(self.columns)))
+        return {'key': np.empty(0, dtype=np.int64), 'count': empty, 'mean': empty, 'm2': empty, 'min': empty, 'max': empty}
+
+
+def bin_depth_stream(
+    chunks: Iterable[pd.DataFrame],
+    columns: List[str],
+    step: float = 0.01,
+    depth_column: str = 'Depth',
+    bin_column: str = 'TDEP',
+    statistics: Sequence[str] = BIN_STATISTICS,
+    decimals: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Aggregates a stream of chunks in depth order into depth bins, yielding the bins as they are completed.
+
+    See `DepthBinAggregator` for the arguments.
+
+    Yields:
+        pd.DataFrame: The bins completed by each chunk, and the last bin at the end of the stream.
+    """
+    aggregator = DepthBinAggregator(columns, step, depth_column, bin_column, statistics, decimals)
+
+    for chunk in chunks:
+        bins = aggregator.update(chunk)
+        if not bins.empty:
+            yield bins
+
+    bins = aggregator.flush()
+    if not bins.empty:
+        yield bins
+
+
+def bin_by_depth(
+    df: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    step: float = 0.01,
+    depth_column: str = 'Depth',
+    bin_column: str = 'TDEP',
+    statistics: Sequence[str] = BIN_STATISTICS,
+    decimals: Optional[int] = None,
+    chunk_rows: int = 65536
+) -> pd.DataFrame:
+    """
+    Aggregates a DataFrame in depth order into depth bins, as the floor + groupby of
+    resolution_preprocess_02.ipynb but in one pass.
+
+    Args:
+        df (pd.DataFrame): Rows in increasing or decreasing depth order.
+        columns (Optional[List[str]]): Columns to aggregate. None aggregates every column but the depth.
+        chunk_rows (int): Number of rows reduced at a time.
+
+    Returns:
+        pd.DataFrame: One row per bin, see `DepthBinAggregator`.
+    """
+    columns = columns if columns is not None else [column for column in df.columns if column != depth_column]
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+
+    bins = list(bin_depth_stream(chunks, columns, step, depth_column, bin_column, statistics, decimals))
+    if not bins:
+        return DepthBinAggregator(columns, step, depth_column, bin_column, statistics, decimals).flush()
+
+    return pd.concat(bins, ignore_index=True)
@@ -0,0 +1,384 @@
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+# Canonical integer depth index: depth in tenths of a millimetre, as int64
+DEPTH_KEY_COLUMN = 'DEPTH_KEY'
+DEPTH_KEYS_PER_METRE = 10_000
+
+
+def depth_to_key(depth: np.ndarray, keys_per_metre: int = DEPTH_KEYS_PER_METRE) -> np.ndarray:
+    """
+    Converts depths in metres to integer depth keys, rounding to the nearest key.
+
+    Every depth that rounds to the same 0.1 mm gets the same key, whatever the float error it carries
+    (400.03, 400.03000000000003 and 400.0299999 are all 4000300), so keys can be compared and joined
+    exactly.
+
+    Args:
+        depth (np.ndarray): Depths in metres.
+        keys_per_metre (int): Number of keys per metre.
+
+    Returns:
+        np.ndarray: int64 depth keys.
+
+    Raises:
+        ValueError: If a depth is NaN or infinite.
+    """
+    depth = np.asarray(depth, dtype=np.float64)
+    if not np.isfinite(depth).all():
+        raise ValueError("Depth keys need finite depths, but got NaN or infinite depths")
+
+    return np.rint(depth * keys_per_metre).astype(np.int64)
+
+
+def key_to_depth(keys: np.ndarray, keys_per_metre: int = DEPTH_KEYS_PER_METRE) -> np.ndarray:
+    """
+    Converts integer depth keys back to depths in metres.
+
+    The keys are divided by an integer, so the depths are the floats closest to the decimal depths
+    (4000300 -> 400.03), the same as `np.round(depth, 4)`.
+    """
+    return np.asarray(keys, dtype=np.int64) / keys_per_metre
+
+
+def step_to_key(step: float, keys_per_metre: int = DEPTH_KEYS_PER_METRE) -> int:
+    """
+    Converts a depth step in metres, such as 0.01 or 0.1524, to a whole number of keys.
+
+    Raises:
+        ValueError: If the step is not a positive multiple of the key resolution.
+    """
+    step_keys = int(round(step * keys_per_metre))
+    if step_keys <= 0 or abs(step_keys - step * keys_per_metre) > 1e-6:
+        raise ValueError(f"The step {step} is not a positive multiple of 1/{keys_per_metre} m")
+    return step_keys
+
+
+def key_grid(min_depth: float, max_depth: float, step: float = 0.01) -> np.ndarray:
+    """
+    Creates the depth keys of a regular grid from min_depth to max_depth, both included.
+
+    Unlike a float `np.arange`, the grid has no accumulated error: `key_to_depth(key_grid(...))` gives the
+    same depths as `depth_grid` with the decimals of the step.
+
+    Returns:
+        np.ndarray: int64 depth keys, starting at the key of min_depth.
+    """
+    step_keys = step_to_key(step)
+    first, last = depth_to_key([min_depth, max_depth])
+    return np.arange(first, last + 1, step_keys, dtype=np.int64)
+
+
+def add_depth_key(df: pd.DataFrame, depth_column: str = 'TDEP', key_column: str = DEPTH_KEY_COLUMN) -> pd.DataFrame:
+    """
+    Adds the integer depth key column of a frame, right after its depth column.
+
+    Returns:
+        pd.DataFrame: A copy of the frame with the key column.
+    """
+    df = df.drop(columns=[key_column], errors='ignore')
+    df.insert(df.columns.get_loc(depth_column) + 1, key_column, depth_to_key(df[depth_column].to_numpy()))
+    return df
+
+
+def _sorted_keys(df: pd.DataFrame, key_column: str, depth_column: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the depth keys of a frame in increasing order and the row of each one (None when the frame is
+    already in increasing order, and is not sorted). A frame without the key column gets its keys from
+    the depth column.
+    """
+    if key_column in df.columns or depth_column is None:
+        keys = df[key_column].to_numpy(dtype=np.int64)
+    else:
+        keys = depth_to_key(df[depth_column].to_numpy())
+    if len(keys) > 1 and not (keys[1:] >= keys[:-1]).all():
+        order = np.argsort(keys, kind='stable')
+        return keys[order], order
+
+    return keys, None
+
+
+def _rows(order: Optional[np.ndarray], position: np.ndarray) -> np.ndarray:
+    """
+    Maps positions in the sorted keys of a frame (-1 for missing) to rows of the frame.
+    """
+    if order is None:
+        return position
+    return np.where(position >= 0, order[np.maximum(position, 0)], -1) if len(order) else position
+
+
+def _positions(frame_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """
+    Gets the position of each key in a sorted array of unique keys, -1 where it is not present.
+
+    Both arrays are sorted and unique, so pandas joins them with a linear merge instead of a hash table.
+    """
+    _, _, position = pd.Index(keys, copy=False).join(pd.Index(frame_keys, copy=False), how='left', return_indexers=True)
+    return np.arange(len(keys)) if position is None else position
+
+
+def _sorted_join(arrays: List[np.ndarray], how: str) -> np.ndarray:
+    """
+    Intersects ('inner') or merges ('outer') sorted arrays of unique keys with linear merges.
+    """
+    keys = pd.Index(arrays[0], copy=False)
+    for frame_keys in arrays[1:]:
+        keys = keys.join(pd.Index(frame_keys, copy=False), how=how)
+    return keys.to_numpy(dtype=np.int64)
+
+
+def _join_positions(arrays: List[np.ndarray], how: str) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Intersects ('inner') or merges ('outer') sorted arrays of unique keys with linear merges, keeping the
+    position of each output key in every array (-1 where the array does not have it) from the indexers
+    of the merges, so the arrays are not searched again.
+    """
+    keys = pd.Index(arrays[0], copy=False)
+    positions = [None]
+    for frame_keys in arrays[1:]:
+        keys, left, right = keys.join(pd.Index(frame_keys, copy=False), how=how, return_indexers=True)
+        if left is not None:
+            # Positions of the previous output keys, carried over to the new ones
+            positions = [left if position is None else np.where(left >= 0, position[left], -1)
+                         for position in positions]
+        positions.append(right)
+
+    n_keys = len(keys)
+    return keys.to_numpy(dtype=np.int64), [np.arange(n_keys) if position is None else position
+                                           for position in positions]
+
+
+def _aligned_join(arrays: List[np.ndarray], how: str) -> Optional[Tuple[np.ndarray, List[Tuple[int, int, int]]]]:
+    """
+    Intersects ('inner') or merges ('outer') sorted arrays of unique keys that are slices of a single
+    grid, as the curves of a well sampled at the same depths with different tops and bottoms. Each array
+    then fills a contiguous run of output keys from a contiguous run of its own, found with a few binary
+    searches and checked with one comparison per array.
+
+    Returns:
+        Optional[Tuple[np.ndarray, List[Tuple[int, int, int]]]]: The output keys and, for each array, the
+        first output row it fills, its first key used and the number of keys; or None when the arrays are
+        not slices of one grid (or one is empty).
+    """
+    if any(len(frame_keys) == 0 for frame_keys in arrays):
+        return None
+
+    if how == 'inner':
+        top, bottom = max(frame_keys[0] for frame_keys in arrays), min(frame_keys[-1] for frame_keys in arrays)
+        first = arrays[0]
+        keys = first[np.searchsorted(first, top):np.searchsorted(first, bottom, side='right')]
+        runs = []
+        for frame_keys in arrays:
+            start = int(np.searchsorted(frame_keys, top))
+            if not np.array_equal(frame_keys[start:start + len(keys)], keys):
+                return None
+            runs.append((0, start, len(keys)))
+        return keys, runs
+
+    # The union grows from the shallowest array, and each array must continue it where they overlap
+    keys = None
+    for frame_keys in sorted(arrays, key=lambda frame_keys: frame_keys[0]):
+        if keys is None:
+            keys = frame_keys
+            continue
+        start = int(np.searchsorted(keys, frame_keys[0]))
+        shared = min(len(keys) - start, len(frame_keys))
+        if not np.array_equal(keys[start:start + shared], frame_keys[:shared]):
+            return None
+        if shared < len(frame_keys):
+            keys = np.concatenate([keys, frame_keys[shared:]])
+
+    return keys, [(int(np.searchsorted(keys, frame_keys[0])), 0, len(frame_keys)) for frame_keys in arrays]
+
+
+def _take_run(array: pd.api.extensions.ExtensionArray, order: Optional[np.ndarray], run: Tuple[int, int, int],
+              n_keys: int) -> pd.api.extensions.ExtensionArray:
+    """
+    Gathers the rows of a frame that fill a run of output keys (see `_aligned_join`), with NaN (or the
+    missing value of the dtype) in the other output rows.
+    """
+    row, start, length = run
+    if order is None and row == 0 and length == n_keys:
+        return array[start:start + length].copy()
+
+    if order is None and isinstance(array.dtype, np.dtype) and array.dtype.kind == 'f':
+        values = np.full(n_keys, np.nan, dtype=array.dtype)
+        values[row:row + length] = array.to_numpy()[start:start + length]
+        return values
+
+    rows = np.full(n_keys, -1)
+    rows[row:row + length] = np.arange(start, start + length) if order is None else order[start:start + length]
+    return take(array, rows, allow_fill=True)
+
+
+def merge_on_depth_key(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    how: str = 'inner',
+    key_column: str = DEPTH_KEY_COLUMN,
+    depth_column: str = 'TDEP',
+    suffixes: Tuple[str, str] = ('_x', '_y')
+) -> pd.DataFrame:
+    """
+    Joins two frames on their integer depth keys with a sorted merge.
+
+    Replaces `pd.merge(..., on='TDEP')` on rounded float depths: rows whose depths differ only by float
+    error are matched instead of silently dropped, and the join is a search over sorted integers instead
+    of a hash of floats. Frames with repeated keys fall back to `pd.merge` on the keys.
+
+    Args:
+        left (pd.DataFrame): Left frame, with the key column.
+        right (pd.DataFrame): Right frame, with the key column.
+        how (str): 'inner', 'left', 'right' or 'outer', as in `pd.merge`.
+        key_column (str): Name of the key column.
+        depth_column (str): Name of the float depth column. When both frames have it, the output has a
+            single depth column rebuilt from the keys.
+        suffixes (Tuple[str, str]): Suffixes of the other columns present in both frames.
+
+    Returns:
+        pd.DataFrame: The joined frame, sorted by depth key.
+
+    Raises:
+        ValueError: If `how` is unknown.
+    """
+    if how not in ('inner', 'left', 'right', 'outer'):
+        raise ValueError(f"Expected 'inner', 'left', 'right' or 'outer', but got '{how}'")
+
+    shared_depth = depth_column in left.columns and depth_column in right.columns
+    if shared_depth:
+        left, right = left.drop(columns=[depth_column]), right.drop(columns=[depth_column])
+
+    left_keys, left_order = _sorted_keys(left, key_column)
+    right_keys, right_order = _sorted_keys(right, key_column)
+
+    if (left_keys[1:] == left_keys[:-1]).any() or (right_keys[1:] == right_keys[:-1]).any():
+        merged = pd.merge(left, right, on=key_column, how=how, sort=True, suffixes=suffixes)
+    else:
+        if how == 'inner':
+            keys = _sorted_join([left_keys, right_keys], 'inner')
+        elif how == 'left':
+            keys = left_keys
+        elif how == 'right':
+            keys = right_keys
+        else:
+            keys = _sorted_join([left_keys, right_keys], 'outer')
+
+        merged = {key_column: keys}
+        sides = ((left, left_keys, left_order, right, suffixes[0]), (right, right_keys, right_order, left, suffixes[1]))
+        for frame, frame_keys, order, other, suffix in sides:
+            # Row of each output key in the frame, -1 where the frame does not have the key
+            rows = _rows(order, _positions(frame_keys, keys))
+            for col in frame.columns.drop(key_column):
+                merged[f"{col}{suffix}" if col in other.columns else col] = take(frame[col].array, rows, allow_fill=True)
+
+        merged = pd.DataFrame(merged)
+
+    if shared_depth:
+        merged.insert(0, depth_column, key_to_depth(merged[key_column].to_numpy()))
+
+    return merged
+
+
+def _nearest_rows(frame_keys: np.ndarray, keys: np.ndarray, tolerance_keys: Optional[int]) -> np.ndarray:
+    """
+    Gets the position of the nearest key of a sorted key array for each key, -1 when it is farther than
+    the tolerance. Ties go to the shallower key.
+    """
+    if len(frame_keys) == 0:
+        return np.full(len(keys), -1)
+
+    after = np.minimum(np.searchsorted(frame_keys, keys), len(frame_keys) - 1)
+    before = np.maximum(np.where(frame_keys[after] == keys, after, after - 1), 0)
+    nearest = np.where(np.abs(keys - frame_keys[before]) <= np.abs(frame_keys[after] - keys), before, after)
+
+    if tolerance_keys is not None:
+        nearest = np.where(np.abs(frame_keys[nearest] - keys) <= tolerance_keys, nearest, -1)
+
+    return nearest
+
+
+def merge_sorted_frames(
+    frames: List[pd.DataFrame],
+    how: str = 'inner',
+    tolerance: Optional[float] = None,
+    key_column: str = DEPTH_KEY_COLUMN,
+    depth_column: str = 'TDEP'
+) -> pd.DataFrame:
+    """
+    Joins N frames on depth in one pass: the output keys are found over the sorted keys of every frame,
+    and each frame is then gathered once into the output.
+
+    Replaces a chain of `pd.merge` calls, each of which hashes and copies the whole table. Frames sampled
+    on the same depth grid, such as the spliced curves of a well, are joined by slicing each frame; other
+    frames with linear merges of their sorted keys. Frames without the key column get it from their depth
+    column.
+
+    Unlike `pd.merge`, repeated depths are not multiplied: a frame with repeated keys only contributes
+    the first of its rows at each key, in the order of the frame, and its other rows there are dropped.
+
+    Args:
+        frames (List[pd.DataFrame]): Frames to join, each with the depth column or the key column.
+        how (str): 'inner' keeps the depths present in every frame, 'outer' the depths present in any
+            frame, and 'asof' the depths of the first frame, matching each other frame to its nearest
+            depth within the tolerance.
+        tolerance (Optional[float]): Largest depth distance, in metres, matched by 'asof'. None matches the
+            nearest depth at any distance.
+        key_column (str): Name of the key column.
+        depth_column (str): Name of the depth column, rebuilt from the keys in the output.
+
+    Returns:
+        pd.DataFrame: The depth column, the key column and the other columns of every frame, in order,
+        sorted by depth.
+
+    Raises:
+        ValueError: If `how` is unknown, or a column other than the depth and key is in several frames.
+    """
+    if how not in ('inner', 'outer', 'asof'):
+        raise ValueError(f"Expected 'inner', 'outer' or 'asof', but got '{how}'")
+    if not frames:
+        return pd.DataFrame({depth_column: np.empty(0), key_column: np.empty(0, dtype=np.int64)})
+
+    columns = [[col for col in df.columns if col not in (depth_column, key_column)] for df in frames]
+    all_columns = [col for frame_columns in columns for col in frame_columns]
+    repeated = sorted({col for col in all_columns if all_columns.count(col) > 1})
+    if repeated:
+        raise ValueError(f"Columns {repeated} are in more than one frame")
+
+    sorted_keys = []
+    for df in frames:
+        keys, order = _sorted_keys(df, key_column, depth_column)
+
+        # First row of each repeated key
+        repeated_keys = keys[1:] == keys[:-1]
+        if repeated_keys.any():
+            first = np.flatnonzero(np.concatenate([[True], ~repeated_keys]))
+            keys, order = keys[first], (order[first] if order is not None else first)
+        sorted_keys.append((keys, order))
+
+    aligned = _aligned_join([frame_keys for frame_keys, _ in sorted_keys], how) if how != 'asof' else None
+    if aligned is not None:
+        keys, runs = aligned
+    elif how in ('inner', 'outer'):
+        keys, positions = _join_positions([frame_keys for frame_keys, _ in sorted_keys], how)
+    else:
+        tolerance_keys = None if tolerance is None else int(round(tolerance * DEPTH_KEYS_PER_METRE))
+        keys = sorted_keys[0][0]
+        positions = [np.arange(len(keys))] + [_nearest_rows(frame_keys, keys, tolerance_keys)
+                                              for frame_keys, _ in sorted_keys[1:]]
+
+    merged = {depth_column: key_to_depth(keys), key_column: keys.copy()}
+    for i, (df, frame_columns, (_, order)) in enumerate(zip(frames, columns, sorted_keys)):
+        if aligned is not None:
+            for col in frame_columns:
+                merged[col] = _take_run(df[col].array, order, runs[i], len(keys))
+            continue
+
+        # One gather per column, with NaN (or the missing value of the dtype) where the frame has no row
+        rows = _rows(order, positions[i])
+        for col in frame_columns:
+            merged[col] = take(df[col].array, rows, allow_fill=True)
+
+    # The columns are new arrays, so the frame does not need to copy them into one block
+    return pd.DataFrame(merged, copy=False)
@@ -0,0 +1,149 @@
+from typing import Dict, List, Optional
+import os
+import numpy as np
+from utils.data_preprocessing import DLIS_NULL_VALUES
+from utils.image_store import ImageLogWriter
+
+
+def get_frame(logical_file: object, name: str) -> object:
+    """
+    Returns the frame with a given name within a logical file.
+
+    Raises:
+        ValueError: If the logical file does not have exactly one frame with that name.
+    """
+    [frame] = [x for x in logical_file.frames if x.name == name]
+    return frame
+
+
+def index_of(frame: object) -> object:
+    """
+    Returns the index channel of a frame.
+    """
+    return next(ch for ch in frame.channels if ch.name == frame.index)
+
+
+def get_channel(frame: object, name: str) -> object:
+    """
+    Returns the channel with a given name from a frame.
+
+    Raises:
+        ValueError: If the frame does not have exactly one channel with that name.
+    """
+    [channel] = [x for x in frame.channels if x.name == name]
+    return channel
+
+
+def image_channels(frame: object) -> List[object]:
+    """
+    Gets the multi-dimensional channels of a frame, such as the FBB1/FBD1 FMI or the CAST amplitude images.
+    """
+    return [channel for channel in frame.channels if int(np.prod(channel.dimension or [1])) > 1]
+
+
+def channel_metadata(frame: object, channel: object) -> Dict[str, object]:
+    """
+    Gets the metadata of an image channel and of the depth index of its frame.
+
+    Returns:
+        Dict[str, object]: Name, long name, units and dimension of the channel, and name, direction,
+        spacing, index type and units of its frame.
+    """
+    index = index_of(frame)
+
+    return {
+        'channel': channel.name,
+        'long_name': channel.long_name,
+        'units': channel.units,
+        'dimension': list(channel.dimension),
+        'frame': frame.name,
+        'direction': frame.direction,
+        'spacing': frame.spacing,
+        'index': frame.index,
+        'index_type': frame.index_type,
+        'index_units': index.units,
+    }
+
+
+def image_dtype(dtype: np.dtype) -> str:
+    """
+    Picks the dtype of the store of an image channel: uint16 for samples that fit in it losslessly,
+    float32 otherwise.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'u' and dtype.itemsize <= 2:
+        return 'uint16'
+    return 'float32'
+
+
+def image_store_path(base_dir: str, well_name: str, logical_file_index: int, frame_name: str, channel_name: str) -> str:
+    """
+    Builds the directory of the store of an image channel: {base_dir}/{well}/logical_file_{i}/{frame}/{channel}.
+    """
+    return os.path.join(base_dir, well_name, f"logical_file_{logical_file_index}", frame_name, channel_name)
+
+
+def write_image_channels(
+    curves: np.ndarray,
+    frame: object,
+    base_dir: str,
+    well_name: str,
+    logical_file_index: int,
+    channels: Optional[List[str]] = None,
+    null_values: List[float] = DLIS_NULL_VALUES
+) -> List[Dict[str, object]]:
+    """
+    Writes the image channels of a decoded frame to image log stores.
+
+    Args:
+        curves (np.ndarray): Structured array returned by `frame.curves()`.
+        frame (object): The dlisio frame.
+        base_dir (str): The base directory of the image stores.
+        well_name (str): Name of the well.
+        logical_file_index (int): Index of the logical file inside the well.
+        channels (Optional[List[str]]): Names of the image channels to write. None writes every image channel.
+        null_values (List[float]): Values replaced by NaN in float32 stores.
+
+    Returns:
+        List[Dict[str, object]]: One record per written channel with its well, logical file, frame,
+        channel, number of rows and samples, dtype and store path.
+    """
+    depth = curves[frame.index]
+    records = []
+
+    for channel in image_channels(frame):
+        if channels is not None and channel.name not in channels:
+            continue
+
+        image = curves[channel.name]
+        image = image.reshape(len(image), -1)
+        dtype = image_dtype(image.dtype)
+
+        if dtype == 'float32':
+            image = image.astype(np.float32)
+            image[np.isin(image, np.asarray(null_values, dtype=np.float32))] = np.nan
+
+        path = image_store_path(base_dir, well_name, logical_file_index, frame.name, channel.name)
+        with ImageLogWriter(path, image.shape[1], dtype, channel_metadata(frame, channel)) as writer:
+            writer.append(depth, image)
+
+        records.append({
+            'well': well_name,
+            'logical_file': logical_file_index,
+            'frame': frame.name,
+            'channel': channel.name,
+            'rows': image.shape[0],
+            'samples': image.shape[1],
+            'dtype': dtype,
+            'path': path,
+        })
+
+    return records
+
+
+def scalar_curves(curves: np.ndarray) -> np.ndarray:
+    """
+    Keeps the scalar channels of a decoded frame, dropping the image channels.
+    """
+    names = [name for name in curves.dtype.names if curves.dtype[name].shape == ()]
+    return curves[names]
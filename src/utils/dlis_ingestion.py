@@ -0,0 +1,498 @@
+from typing import Callable, Dict, List, Optional
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import numpy as np
+import pandas as pd
+from dlisio import dlis
+from utils.data_preprocessing import frame_to_dataframe
+from utils.dlis_images import image_channels, scalar_curves, write_image_channels
+from utils.storage import frame_file_name, save_frame
+
+
+def find_dlis_files(base_path: str) -> List[str]:
+    """
+    Finds every DLIS file under the base directory, whatever the case of the extension.
+
+    Args:
+        base_path (str): The root directory where the DLIS files are stored.
+
+    Returns:
+        List[str]: Sorted list of paths to the DLIS files.
+    """
+    data_path = os.path.join(base_path, '**', '*')
+
+    return sorted(
+        file for file in glob.glob(data_path, recursive=True)
+        if file.lower().endswith('.dlis') and os.path.isfile(file)
+    )
+
+
+def get_well_name(logical_files: List[object], file_path: str) -> str:
+    """
+    Gets the well name stored in the origin of the first logical file.
+
+    Args:
+        logical_files (List[object]): The logical files of a DLIS file.
+        file_path (str): Path of the DLIS file, used as fallback when there is no well name.
+
+    Returns:
+        str: The well name, or the file name without extension when the origin has no well name.
+    """
+    for logical_file in logical_files:
+        for origin in logical_file.origins:
+            if origin.well_name:
+                return origin.well_name
+
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def write_frame(
+    df: pd.DataFrame,
+    base_dir: str,
+    well_name: str,
+    logical_file_index: int,
+    frame_index: int,
+    units: Optional[Dict[str, str]] = None,
+    backend: str = 'csv'
+) -> None:
+    """
+    Saves a frame DataFrame in the same hierarchy used by `dlis_raw_dfs_to_csv`.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        base_dir (str): The base directory where the files will be saved.
+        well_name (str): Name of the well.
+        logical_file_index (int): Index of the logical file inside the well.
+        frame_index (int): Index of the frame inside the logical file.
+        units (Optional[Dict[str, str]]): Units of the channels, saved as metadata.
+        backend (str): Name of the storage backend (see `utils.storage`).
+    """
+    file_path = os.path.join(base_dir, well_name, f"logical_file_{logical_file_index}",
+                             frame_file_name(frame_index, backend))
+
+    save_frame(df, file_path, backend, units)
+
+
+def channel_units(frame: object, image_columns: bool = True) -> Dict[str, str]:
+    """
+    Gets the units of the columns of a frame, as named by `frame_to_dataframe`.
+
+    Args:
+        frame (object): A dlisio frame.
+        image_columns (bool): Whether to include the image channels. False leaves them out, for frames
+            whose image channels are written to image log stores instead.
+
+    Returns:
+        Dict[str, str]: Units of each column. Each column 'CHANNEL[j]' of an image channel has the units
+        of 'CHANNEL'.
+    """
+    units = {}
+    for channel in frame.channels:
+        size = int(np.prod(channel.dimension or [1]))
+        if size == 1:
+            units[channel.name] = channel.units
+        elif image_columns:
+            units.update({f"{channel.name}[{j}]": channel.units for j in range(size)})
+
+    return units
+
+
+def map_isolated(func: Callable, items: List[object], workers: int = 1) -> List[object]:
+    """
+    Applies a function to every item, optionally in a process pool, isolating the failures.
+
+    The results are returned in the order of the items, whatever the number of workers, and an item
+    that raises does not stop the others. A worker process that dies (e.g. killed for lack of memory)
+    breaks the pool and fails every item not finished yet, so those items are submitted again to a new
+    pool; when no item of a round gets through, each one runs alone in its own pool, so only the items
+    whose worker dies get the BrokenProcessPool error.
+
+    Args:
+        func (Callable): Function applied to each item. Must be picklable (defined at module level)
+            when workers > 1.
+        items (List[object]): Items to process.
+        workers (int): Number of worker processes. 1 runs everything in the current process.
+
+    Returns:
+        List[object]: The result of each item, or the exception it raised.
+    """
+    if workers <= 1:
+        results = []
+        for item in items:
+            try:
+                results.append(func(item))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    results = [None] * len(items)
+    pending = list(range(len(items)))
+    alone = False
+
+    while pending:
+        broken = []
+        for batch in ([[i] for i in pending] if alone else [pending]):
+            with ProcessPoolExecutor(max_workers=1 if alone else workers) as executor:
+                futures = {i: executor.submit(func, items[i]) for i in batch}
+
+                for i, future in futures.items():
+                    try:
+                        results[i] = future.result()
+                    except BrokenProcessPool as e:
+                        if alone:
+                            results[i] = e
+                        else:
+                            broken.append(i)
+                    except Exception as e:
+                        results[i] = e
+
+        # Items are retried together while some get through, and alone once none does
+        alone = len(broken) == len(pending)
+        pending = broken
+
+    return results
+
+
+def scan_dlis_file(file_path: str) -> Dict[str, object]:
+    """
+    Opens a DLIS file without decoding any curve to get its well name and number of logical files.
+
+    Args:
+        file_path (str): Path to the DLIS file.
+
+    Returns:
+        Dict[str, object]: The file path, the well name and the number of logical files.
+    """
+    with dlis.load(file_path) as logical_files:
+        return {
+            'file': file_path,
+            'well': get_well_name(logical_files, file_path),
+            'logical_files': len(logical_files)
+        }
+
+
+def plan_dlis_ingestion(scans: List[Dict[str, object]], by: str = 'file') -> List[Dict[str, object]]:
+    """
+    Splits the ingestion in independent tasks and gives each logical file its output index.
+
+    Logical files of DLIS files that belong to the same well are numbered one after the other, in the
+    order of the scans, instead of the last file overwriting the previous ones. The plan only depends on
+    the scans, so the output is the same whatever the number of workers.
+
+    Args:
+        scans (List[Dict[str, object]]): Results of `scan_dlis_file`.
+        by (str): 'file' for one task per DLIS file or 'logical_file' for one task per logical file.
+
+    Returns:
+        List[Dict[str, object]]: Tasks with the file, the well, a mapping from the logical file
+        position inside the DLIS file to its output index and the unit of work ('by').
+
+    Raises:
+        ValueError: If `by` is not 'file' or 'logical_file'.
+    """
+    if by not in ('file', 'logical_file'):
+        raise ValueError(f"Expected 'file' or 'logical_file', but got '{by}'")
+
+    tasks = []
+    logical_file_offsets = {}
+
+    for scan in scans:
+        well_name = scan['well']
+        offset = logical_file_offsets.get(well_name, 0)
+        logical_file_indices = {i: offset + i for i in range(scan['logical_files'])}
+        logical_file_offsets[well_name] = offset + scan['logical_files']
+
+        if by == 'file':
+            tasks.append({'file': scan['file'], 'well': well_name, 'logical_files': logical_file_indices, 'by': by})
+        else:
+            for position, logical_file_index in logical_file_indices.items():
+                tasks.append({'file': scan['file'], 'well': well_name, 'logical_files': {position: logical_file_index},
+                              'by': by})
+
+    return tasks
+
+
+# DLIS file loaded by the last logical file task of the process, see `load_shared_dlis`
+_shared_dlis = {}
+
+
+def load_shared_dlis(file_path: str) -> object:
+    """
+    Loads a DLIS file for the tasks of its logical files, keeping it open for the next task of the same
+    file in this process.
+
+    `dlis.load` scans the whole file to index it, so the tasks of the logical files of a file (submitted
+    one after the other) reuse the load of the previous task run by the same process instead of loading
+    the file again. Only the last file is kept open; the one before is closed.
+
+    Returns:
+        object: The logical files of the DLIS file.
+    """
+    if _shared_dlis.get('file') != file_path:
+        close_shared_dlis()
+        _shared_dlis.update(file=file_path, logical_files=dlis.load(file_path))
+    return _shared_dlis['logical_files']
+
+
+def close_shared_dlis() -> None:
+    """
+    Closes the DLIS file kept open by `load_shared_dlis`, if any.
+    """
+    if _shared_dlis:
+        _shared_dlis.pop('logical_files').close()
+        _shared_dlis.clear()
+
+
+def ingest_dlis_task(
+    task: Dict[str, object],
+    base_dir: str,
+    writer: Callable[..., None] = write_frame,
+    image_dir: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Reads the logical files of a task one frame at a time and writes each frame before reading the next one.
+
+    Only the curves of the current frame are kept in memory, so the peak memory is one frame
+    and not the whole file. The tasks of single logical files (by='logical_file') load the file with
+    `load_shared_dlis`, so a process loads each file once for all the logical files it ingests.
+
+    Args:
+        task (Dict[str, object]): A task created by `plan_dlis_ingestion`.
+        base_dir (str): The base directory where the frames will be saved.
+        writer (Callable): Function that saves a frame, called as
+            writer(df, base_dir, well_name, logical_file_index, frame_index, units).
+        image_dir (Optional[str]): When given, the image channels are written to image log stores in this
+            directory (see `write_image_channels`) and left out of the frames. None keeps them in the frames
+            as 'CHANNEL[j]' columns.
+
+    Returns:
+        Dict[str, object]: Statistics of the task: number of logical files, frames, rows and image
+        channels, decoded bytes and elapsed seconds.
+    """
+    start = time.perf_counter()
+    n_frames = 0
+    n_rows = 0
+    n_images = 0
+    decoded_bytes = 0
+
+    shared = task.get('by') == 'logical_file'
+    logical_files = load_shared_dlis(task['file']) if shared else dlis.load(task['file'])
+    try:
+        for position, logical_file_index in task['logical_files'].items():
+            for frame_index, frame in enumerate(logical_files[position].frames):
+                curves = frame.curves()
+                n_rows += len(curves)
+                decoded_bytes += curves.nbytes
+
+                image_columns = True
+                if image_dir is not None and image_channels(frame):
+                    n_images += len(write_image_channels(curves, frame, image_dir, task['well'], logical_file_index))
+                    curves = scalar_curves(curves)
+                    image_columns = False
+
+                writer(frame_to_dataframe(curves), base_dir, task['well'], logical_file_index, frame_index,
+                       channel_units(frame, image_columns))
+
+                n_frames += 1
+
+                # Release the frame before decoding the next one
+                del curves
+    finally:
+        if not shared:
+            logical_files.close()
+
+    return {
+        'file': task['file'],
+        'well': task['well'],
+        'logical_files': len(task['logical_files']),
+        'frames': n_frames,
+        'rows': n_rows,
+        'image_channels': n_images,
+        'decoded_bytes': decoded_bytes,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def extract_image_channels(
+    file_path: str,
+    base_dir: str,
+    channels: Optional[List[str]] = None,
+    logical_file_offset: int = 0
+) -> pd.DataFrame:
+    """
+    Extracts the image channels of a DLIS file straight to image log stores, one frame at a time.
+
+    Only the frames with image channels are decoded, and each frame is released before the next one
+    is read.
+
+    Args:
+        file_path (str): Path to the DLIS file.
+        base_dir (str): The base directory of the image stores.
+        channels (Optional[List[str]]): Names of the image channels to extract, e.g. ['FBB1', 'FBD1'].
+            None extracts every image channel.
+        logical_file_offset (int): Index of the first logical file of the file inside its well.
+
+    Returns:
+        pd.DataFrame: One row per extracted channel, see `write_image_channels`.
+    """
+    records = []
+
+    with dlis.load(file_path) as logical_files:
+        well_name = get_well_name(logical_files, file_path)
+
+        for position, logical_file in enumerate(logical_files):
+            for frame in logical_file.frames:
+                wanted = [channel.name for channel in image_channels(frame)
+                          if channels is None or channel.name in channels]
+                if not wanted:
+                    continue
+
+                curves = frame.curves()
+                records += write_image_channels(curves, frame, base_dir, well_name,
+                                                logical_file_offset + position, wanted)
+
+                # Release the frame before decoding the next one
+                del curves
+
+    return pd.DataFrame(records, columns=['well', 'logical_file', 'frame', 'channel', 'rows', 'samples', 'dtype', 'path'])
+
+
+def ingest_dlis_files(
+    file_paths: List[str],
+    base_dir: str,
+    writer: Callable[..., None] = write_frame,
+    workers: int = 1,
+    by: str = 'file',
+    verbose: bool = True,
+    image_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Streams a list of DLIS files to disk, one frame at a time per worker.
+
+    With workers > 1 the DLIS files (by='file') or their logical files (by='logical_file') are decoded
+    at the same time in a process pool. The files written and the returned report are the same whatever
+    the number of workers, and a file that fails does not stop the others.
+
+    Args:
+        file_paths (List[str]): Paths to the DLIS files.
+        base_dir (str): The base directory where the frames will be saved.
+        writer (Callable): Function that saves a frame, see `ingest_dlis_task`. Must be picklable
+            (e.g. a module level function or a partial of one) when workers > 1.
+        workers (int): Number of worker processes.
+        by (str): Unit of parallel work, 'file' or 'logical_file'.
+        verbose (bool): Whether to print the timing of each file.
+        image_dir (Optional[str]): Directory of the image log stores of the image channels, see
+            `ingest_dlis_task`.
+
+    Returns:
+        pd.DataFrame: One row of statistics per file: well name, number of logical files, frames, rows and
+        image channels, size in bytes, decoded bytes, decoding seconds and throughput in bytes/s. Files that could not be
+        read have the 'error' column filled.
+    """
+    scans = map_isolated(scan_dlis_file, file_paths, workers)
+    tasks = plan_dlis_ingestion([scan for scan in scans if not isinstance(scan, Exception)], by)
+
+    results = map_isolated(partial(ingest_dlis_task, base_dir=base_dir, writer=writer, image_dir=image_dir),
+                           tasks, workers)
+    # The worker processes close their files when they exit, but a run in this process keeps the last one
+    close_shared_dlis()
+
+    # Gather the results of the tasks of each file, keeping the order of the input files
+    task_results = {}
+    for task, result in zip(tasks, results):
+        task_results.setdefault(task['file'], []).append(result)
+
+    reports = []
+    for file_path, scan in zip(file_paths, scans):
+        if isinstance(scan, Exception):
+            report = {'file': file_path, 'error': str(scan)}
+        else:
+            report = merge_task_results(scan, task_results.get(file_path, []))
+
+        reports.append(report)
+
+        if verbose:
+            print_report(report)
+
+    return pd.DataFrame(reports)
+
+
+def merge_task_results(scan: Dict[str, object], results: List[object]) -> Dict[str, object]:
+    """
+    Combines the results of the tasks of one DLIS file into the report of the file.
+
+    Args:
+        scan (Dict[str, object]): Result of `scan_dlis_file` for the file.
+        results (List[object]): Results of `ingest_dlis_task` for the file, or the exceptions they raised.
+
+    Returns:
+        Dict[str, object]: Statistics of the file. The 'error' key holds the first error, if any.
+    """
+    errors = [str(result) for result in results if isinstance(result, Exception)]
+    results = [result for result in results if not isinstance(result, Exception)]
+
+    file_bytes = os.path.getsize(scan['file'])
+    seconds = sum(result['seconds'] for result in results)
+
+    return {
+        'file': scan['file'],
+        'well': scan['well'],
+        'logical_files': sum(result['logical_files'] for result in results),
+        'frames': sum(result['frames'] for result in results),
+        'rows': sum(result['rows'] for result in results),
+        'image_channels': sum(result['image_channels'] for result in results),
+        'bytes': file_bytes,
+        'decoded_bytes': sum(result['decoded_bytes'] for result in results),
+        'seconds': seconds,
+        'bytes_per_second': file_bytes / seconds if seconds > 0 else np.inf,
+        'error': errors[0] if errors else None
+    }
+
+
+def print_report(report: Dict[str, object]) -> None:
+    """
+    Prints the statistics of one ingested file.
+
+    Args:
+        report (Dict[str, object]): Statistics of one file from `merge_task_results`, as in the report of
+            `ingest_dlis_files`.
+    """
+    if report.get('error'):
+        print(f"Error reading {report['file']}: {report['error']}")
+        return
+
+    print(
+        f"{report['file']}: well={report['well']} frames={report['frames']} rows={report['rows']} "
+        f"{report['bytes'] / 1e6:.1f} MB in {report['seconds']:.2f} s "
+        f"({report['bytes_per_second'] / 1e6:.1f} MB/s)"
+    )
+
+
+def summarize_reports(reports: pd.DataFrame, wall_seconds: Optional[float] = None) -> Optional[str]:
+    """
+    Builds a one-line summary of an ingestion run.
+
+    Args:
+        reports (pd.DataFrame): Statistics returned by `ingest_dlis_files`.
+        wall_seconds (Optional[float]): Wall time of the whole run. When omitted, the decoding seconds of
+            the files are added up, which overestimates the time of a parallel run.
+
+    Returns:
+        Optional[str]: The summary, or None when no file was ingested.
+    """
+    if reports.empty:
+        return None
+
+    ok = reports[reports['error'].isna()]
+    total_bytes = ok['bytes'].sum() if 'bytes' in ok else 0
+    total_seconds = wall_seconds if wall_seconds is not None else (ok['seconds'].sum() if 'seconds' in ok else 0.0)
+    throughput = total_bytes / total_seconds if total_seconds > 0 else 0.0
+
+    return (
+        f"{len(ok)}/{len(reports)} files ingested, {total_bytes / 1e6:.1f} MB in {total_seconds:.2f} s "
+        f"({throughput / 1e6:.1f} MB/s)"
+    )
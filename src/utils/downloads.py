@@ -0,0 +1,314 @@
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import base64
+import hashlib
+import http.client
+import os
+import re
+import socket
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import pandas as pd
+
+# Public share of the data, as opened by data_collection_bot.py
+SHARE_URL = "https://reate.cprm.gov.br/arquivos/index.php/s/UIgVZobfQwyLeA1"
+
+# Header with the checksum of the file ('SHA1:<hex>', 'MD5:<hex>', ...) sent by Nextcloud/ownCloud shares
+CHECKSUM_HEADER = 'OC-Checksum'
+
+# HTTP statuses worth retrying; any other error status fails the download at once
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_SHARE_PATTERN = re.compile(r"^(?P<base>.*?)/(?:index\.php/)?s/(?P<token>[^/?#]+)")
+
+
+class ChecksumError(Exception):
+    """
+    Raised when a downloaded file does not have the expected checksum.
+    """
+
+
+def share_webdav(share_url: str) -> Tuple[str, str]:
+    """
+    Gets the WebDAV endpoint of a public share link ('<host>/index.php/s/<token>'), whose files are
+    downloaded with plain HTTP requests authenticated by the share token.
+
+    Returns:
+        Tuple[str, str]: The base URL of the files ('<host>/public.php/webdav') and the share token.
+
+    Raises:
+        ValueError: If the link is not a public share link.
+    """
+    match = _SHARE_PATTERN.match(share_url.rstrip('/'))
+    if not match:
+        raise ValueError(f"Expected a public share link ('<host>/index.php/s/<token>'), but got '{share_url}'")
+
+    return f"{match.group('base')}/public.php/webdav", match.group('token')
+
+
+def basic_auth(user: str, password: str = '') -> str:
+    """
+    Builds the value of the Authorization header of HTTP basic authentication.
+    """
+    return "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+
+
+def remote_path(path: str, strip_components: int = 2) -> str:
+    """
+    Gets the path of a file in the share from its path in a catalog, dropping the leading directories
+    ('./1-Bacia_de_Alagoas/POCO/...' becomes 'POCO/...'), as data_collection_bot.py does.
+    """
+    parts = path.strip().split("/")[strip_components:]
+    return "/".join(part for part in parts if part)
+
+
+def read_path_list(file_path: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Reads a list of paths to download, one per line, as written by index_catalogs.py --paths or
+    select_wells_with_agp_fmi.py. A line may also have, after a tab, the checksum of the file
+    ('sha256:<hex>'), which takes precedence over the one sent by the server.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: The 'path' and 'checksum' (or None) of each file, without repeated paths.
+    """
+    items = {}
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
+        for line in file:
+            parts = line.rstrip("\r\n").split("\t")
+            path = parts[0].strip()
+            if path and path not in items:
+                items[path] = {'path': path, 'checksum': parts[1].strip() if len(parts) > 1 and parts[1].strip() else None}
+
+    return list(items.values())
+
+
+def parse_checksum(checksum: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Parses a checksum such as 'SHA256:<hex>' (several can be separated by spaces or commas; the first one
+    with an algorithm of hashlib is used).
+
+    Returns:
+        Optional[Tuple[str, str]]: The hashlib algorithm and the lower case hex digest, or None.
+    """
+    if not checksum:
+        return None
+
+    for part in re.split(r"[\s,]+", checksum.strip()):
+        algorithm, _, digest = part.partition(':')
+        if digest and algorithm.lower() in hashlib.algorithms_available:
+            return algorithm.lower(), digest.lower()
+
+    return None
+
+
+def file_checksum(file_path: str, algorithm: str = 'sha256', chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the hex digest of a file with a hashlib algorithm.
+    """
+    digest = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _request(url: str, method: str, headers: Dict[str, str], timeout: float) -> http.client.HTTPResponse:
+    return urllib.request.urlopen(urllib.request.Request(url, method=method, headers=headers), timeout=timeout)
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRY_STATUSES
+    return isinstance(error, (urllib.error.URLError, http.client.HTTPException, socket.timeout,
+                              ConnectionError, ChecksumError, TimeoutError))
+
+
+def _get_part(
+    url: str,
+    part_path: str,
+    headers: Dict[str, str],
+    offset: int,
+    timeout: float,
+    chunk_size: int,
+    report: Dict[str, object]
+) -> bool:
+    """
+    Downloads a file to its partial file, from `offset` with a range request when it is not 0.
+
+    Returns:
+        bool: Whether the download was resumed, i.e. appended to the partial file.
+    """
+    request_headers = dict(headers)
+    if offset:
+        request_headers['Range'] = f"bytes={offset}-"
+
+    with _request(url, 'GET', request_headers, timeout) as response:
+        # A server without range support sends the whole file again
+        resumed = offset > 0 and response.status == 206
+
+        with open(part_path, 'ab' if resumed else 'wb') as f:
+            for chunk in iter(lambda: response.read(chunk_size), b''):
+                f.write(chunk)
+                # Counted as they arrive, so the bytes of the failed attempts are in the report too
+                report['bytes'] += len(chunk)
+
+    return resumed
+
+
+def _fetch(
+    url: str,
+    output_path: str,
+    headers: Dict[str, str],
+    checksum: Optional[str],
+    timeout: float,
+    chunk_size: int,
+    report: Dict[str, object]
+) -> None:
+    """
+    Makes one attempt to download a file, resuming its partial download ('<output_path>.part') with a
+    range request. Updates the report of the file, or raises on any error.
+    """
+    with _request(url, 'HEAD', headers, timeout) as response:
+        size = response.headers.get('Content-Length')
+        size = int(size) if size is not None else None
+        expected = parse_checksum(checksum) or parse_checksum(response.headers.get(CHECKSUM_HEADER))
+
+    if size is not None and os.path.exists(output_path) and os.path.getsize(output_path) == size:
+        report.update({'status': 'skipped', 'size': size})
+        return
+
+    part_path = f"{output_path}.part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if size is not None and offset > size:
+        offset = 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    if offset and offset == size:
+        # An earlier run stopped after the last write but before the rename: only the checks are left
+        resumed = True
+    else:
+        try:
+            resumed = _get_part(url, part_path, headers, offset, timeout, chunk_size, report)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise
+            # The range of the partial file is not in the remote file, so the download starts over
+            resumed = _get_part(url, part_path, headers, 0, timeout, chunk_size, report)
+
+    total = os.path.getsize(part_path)
+    if size is not None and total != size:
+        raise http.client.IncompleteRead(b'', size - total)
+
+    if expected is not None:
+        algorithm, digest = expected
+        if file_checksum(part_path, algorithm) != digest:
+            # The partial file is corrupt, so the next attempt starts from scratch
+            os.remove(part_path)
+            raise ChecksumError(f"Expected {algorithm} {digest}, but got another checksum for {url}")
+
+    os.replace(part_path, output_path)
+    report.update({'status': 'resumed' if resumed else 'downloaded', 'size': total, 'verified': expected is not None})
+
+
+def download_file(
+    url: str,
+    output_path: str,
+    headers: Optional[Dict[str, str]] = None,
+    checksum: Optional[str] = None,
+    retries: int = 5,
+    backoff: float = 1.0,
+    max_backoff: float = 60.0,
+    timeout: float = 60.0,
+    chunk_size: int = 1 << 20
+) -> Dict[str, object]:
+    """
+    Downloads a file over HTTP, skipping it when the local file already has the size of the remote one.
+
+    The file is written to '<output_path>.part' and moved to `output_path` once complete and verified, so
+    an interrupted download is resumed from where it stopped by a range request. Failed attempts (network
+    errors, retryable HTTP statuses, truncated or corrupt downloads) are retried after an exponential
+    backoff of `backoff * 2 ** attempt` seconds, at most `max_backoff`.
+
+    Args:
+        url (str): URL of the file.
+        output_path (str): Path where the file is saved.
+        headers (Optional[Dict[str, str]]): Headers of every request, e.g. the Authorization.
+        checksum (Optional[str]): Expected checksum ('sha256:<hex>'). None uses the checksum sent by the
+            server in `CHECKSUM_HEADER`, if any.
+        retries (int): Number of attempts after the first one.
+        backoff (float): Wait before the first retry, in seconds.
+        max_backoff (float): Maximum wait between attempts, in seconds.
+        timeout (float): Timeout of each connection, in seconds.
+        chunk_size (int): Bytes read at a time.
+
+    Returns:
+        Dict[str, object]: The 'url' and 'output_path', the 'status' ('downloaded', 'resumed', 'skipped'
+        or 'failed'), the 'bytes' received, the file 'size', whether its checksum was 'verified', the
+        number of 'attempts', the 'seconds' taken and the 'error' of a failed download.
+    """
+    headers = headers or {}
+    start = time.perf_counter()
+    report = {'url': url, 'output_path': output_path, 'status': 'failed', 'bytes': 0, 'size': None,
+              'verified': False, 'attempts': 0, 'error': None}
+
+    for attempt in range(retries + 1):
+        report['attempts'] = attempt + 1
+        try:
+            _fetch(url, output_path, headers, checksum, timeout, chunk_size, report)
+            report['error'] = None
+            break
+        except Exception as e:
+            report['error'] = repr(e)
+            if attempt == retries or not _retryable(e):
+                break
+            time.sleep(min(max_backoff, backoff * 2 ** attempt))
+
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def download_files(
+    items: List[Dict[str, Optional[str]]],
+    output_dir: str,
+    share_url: str = SHARE_URL,
+    workers: int = 4,
+    strip_components: int = 2,
+    **kwargs
+) -> pd.DataFrame:
+    """
+    Downloads files of a public share with a bounded pool of concurrent connections.
+
+    Args:
+        items (List[Dict[str, Optional[str]]]): The 'path' (as in the catalogs) and 'checksum' of each
+            file, from `read_path_list`.
+        output_dir (str): Directory where the files are saved, in the directories of the share.
+        share_url (str): Public share link, see `share_webdav`.
+        workers (int): Maximum number of files downloaded at the same time.
+        strip_components (int): Leading directories of the catalog paths that are not in the share.
+        **kwargs: Options of `download_file` (retries, backoff, max_backoff, timeout, chunk_size).
+
+    Returns:
+        pd.DataFrame: The report of each file (see `download_file`), with its 'path', in the order of the items.
+    """
+    base_url, token = share_webdav(share_url)
+    headers = {'Authorization': basic_auth(token)}
+
+    def download(item):
+        path = remote_path(item['path'], strip_components)
+        url = f"{base_url}/{urllib.parse.quote(path)}"
+        report = download_file(url, os.path.join(output_dir, *path.split('/')), headers,
+                               item.get('checksum'), **kwargs)
+        return {'path': item['path'], **report}
+
+    reports = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(download, item): i for i, item in enumerate(items)}
+        # Printed by this thread as the files finish, so the lines of the workers are not interleaved
+        for future in as_completed(futures):
+            report = reports[futures[future]] = future.result()
+            status = report['status'] if report['status'] != 'failed' else f"failed: {report['error']}"
+            print(f"{report['path']}: {status}")
+
+    return pd.DataFrame(reports)
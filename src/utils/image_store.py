@@ -0,0 +1,268 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Files of an image log store: raw C-order rows, depth index sidecar and metadata
+IMAGE_FILE = 'image.bin'
+DEPTH_FILE = 'depth.npy'
+METADATA_FILE = 'metadata.json'
+
+
+class ImageLogWriter:
+    """
+    Writes an image log store one block of rows at a time, so the image is never fully in memory.
+
+    The rows are appended to a raw binary file that is later memory mapped. The depth index and the
+    metadata are written when the writer is closed. Used as a context manager, a writer left by an
+    exception is aborted instead, so a partial store is never taken for a complete one.
+
+    Args:
+        path (str): Directory of the store.
+        n_samples (int): Number of samples per row (azimuthal samples of the image).
+        dtype (str): dtype of the stored samples, e.g. 'float32' or 'uint16'.
+        metadata (Optional[Dict[str, object]]): Extra metadata saved with the store (units, channel, ...).
+    """
+
+    def __init__(self, path: str, n_samples: int, dtype: str = 'float32', metadata: Optional[Dict[str, object]] = None):
+        self.path = path
+        self.n_samples = n_samples
+        self.dtype = np.dtype(dtype)
+        self.metadata = dict(metadata or {})
+        self.n_rows = 0
+        self._depths = []
+
+        os.makedirs(path, exist_ok=True)
+        self._file = open(os.path.join(path, IMAGE_FILE), 'wb')
+
+    def append(self, depth: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Appends rows to the store.
+
+        Args:
+            depth (np.ndarray): Depth of each row.
+            rows (np.ndarray): n_rows x n_samples array, cast to the dtype of the store.
+
+        Raises:
+            ValueError: If the rows do not have n_samples samples or the depths do not match the rows.
+        """
+        rows = np.asarray(rows).reshape(len(rows), -1)
+        if rows.shape[1] != self.n_samples:
+            raise ValueError(f"Expected rows of {self.n_samples} samples, but got {rows.shape[1]}")
+        if len(depth) != len(rows):
+            raise ValueError(f"Got {len(depth)} depths for {len(rows)} rows")
+
+        self._file.write(np.ascontiguousarray(rows, dtype=self.dtype).tobytes())
+        self._depths.append(np.asarray(depth, dtype=np.float64))
+        self.n_rows += len(rows)
+
+    def close(self) -> None:
+        """
+        Writes the depth index and the metadata of the store.
+        """
+        if self._file.closed:
+            return
+        self._file.close()
+
+        depth = np.concatenate(self._depths) if self._depths else np.empty(0)
+        np.save(os.path.join(self.path, DEPTH_FILE), depth)
+
+        metadata = dict(self.metadata, n_rows=self.n_rows, n_samples=self.n_samples, dtype=self.dtype.str)
+        with open(os.path.join(self.path, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+    def abort(self) -> None:
+        """
+        Closes the writer without writing the depth index and the metadata, and removes the files of the
+        store, including those of an earlier version the writer was replacing.
+        """
+        self._file.close()
+        for name in (IMAGE_FILE, DEPTH_FILE, METADATA_FILE):
+            if os.path.exists(os.path.join(self.path, name)):
+                os.remove(os.path.join(self.path, name))
+        if not os.listdir(self.path):
+            os.rmdir(self.path)
+
+    def __enter__(self) -> 'ImageLogWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class ImageLogStore:
+    """
+    Read access to an image log store written by `ImageLogWriter`.
+
+    Only the depth index is kept in memory. Rows are read through a memory map that is released after
+    each read, so the memory used is the size of the rows requested and not the size of the image.
+
+    Args:
+        path (str): Directory of the store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+
+        self.depth = np.load(os.path.join(path, DEPTH_FILE))
+        self.dtype = np.dtype(self.metadata['dtype'])
+        self.shape = (self.metadata['n_rows'], self.metadata['n_samples'])
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return f"ImageLogStore({self.path!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Reads a block of rows.
+
+        Args:
+            start (int): First row.
+            stop (int): Last row + 1.
+
+        Returns:
+            np.ndarray: Copy of the rows start..stop - 1.
+        """
+        start, stop, _ = slice(start, stop).indices(self.shape[0])
+        if stop <= start:
+            return np.empty((0, self.shape[1]), dtype=self.dtype)
+
+        image = np.memmap(os.path.join(self.path, IMAGE_FILE), dtype=self.dtype, mode='r', shape=self.shape)
+        block = np.array(image[start:stop])
+        del image
+
+        return block
+
+    def row_range(self, top: float, bottom: float) -> Tuple[int, int]:
+        """
+        Gets the rows whose depth is in [top, bottom], for a depth index recorded downwards or upwards.
+
+        Returns:
+            Tuple[int, int]: The first row and the last row + 1.
+        """
+        if len(self.depth) > 1 and self.depth[0] > self.depth[-1]:
+            # Recorded from the bottom to the top of the well
+            n = len(self.depth)
+            reversed_depth = self.depth[::-1]
+            return (int(n - np.searchsorted(reversed_depth, bottom, side='right')),
+                    int(n - np.searchsorted(reversed_depth, top, side='left')))
+
+        return int(np.searchsorted(self.depth, top, side='left')), int(np.searchsorted(self.depth, bottom, side='right'))
+
+    def read(self, top: float, bottom: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads the rows of a depth interval.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The depths and the rows in [top, bottom].
+        """
+        start, stop = self.row_range(top, bottom)
+        return self.depth[start:stop], self.rows(start, stop)
+
+    def iter_blocks(self, block_rows: int = 4096, overlap: int = 0) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Iterates over the image in blocks of rows.
+
+        Args:
+            block_rows (int): Number of new rows per block.
+            overlap (int): Rows of the next block added at the end of each block, e.g. window_size - 1
+                so that every window of rows is inside one block.
+
+        Yields:
+            Tuple[int, np.ndarray, np.ndarray]: The first row, the depths and the rows of the block.
+        """
+        for start in range(0, self.shape[0], block_rows):
+            stop = min(start + block_rows + overlap, self.shape[0])
+            yield start, self.depth[start:stop], self.rows(start, stop)
+
+    def value_range(self, block_rows: int = 4096) -> Tuple[float, float]:
+        """
+        Computes the minimum and maximum of the image, ignoring NaN, reading one block at a time.
+        """
+        minimum, maximum = np.inf, -np.inf
+        for _, _, block in self.iter_blocks(block_rows):
+            if block.size and not np.isnan(block).all():
+                minimum = min(minimum, np.nanmin(block))
+                maximum = max(maximum, np.nanmax(block))
+
+        return float(minimum), float(maximum)
+
+
+def find_image_stores(base_path: str) -> List[str]:
+    """
+    Finds every image log store under the base directory.
+
+    Returns:
+        List[str]: Sorted list of the store directories.
+    """
+    return sorted(
+        os.path.dirname(file) for file in glob.glob(os.path.join(base_path, '**', METADATA_FILE), recursive=True)
+        if os.path.exists(os.path.join(os.path.dirname(file), IMAGE_FILE))
+    )
+
+
+def write_image_log(
+    path: str,
+    depth: np.ndarray,
+    image: np.ndarray,
+    dtype: str = 'float32',
+    metadata: Optional[Dict[str, object]] = None
+) -> ImageLogStore:
+    """
+    Writes an image already in memory as an image log store.
+
+    Returns:
+        ImageLogStore: The store.
+    """
+    with ImageLogWriter(path, image.shape[1], dtype, metadata) as writer:
+        writer.append(depth, image)
+
+    return ImageLogStore(path)
+
+
+def convert_image_csv(
+    csv_path: str,
+    path: str,
+    depth_column: str = 'MD',
+    image_columns: Optional[List[str]] = None,
+    dtype: str = 'float32',
+    chunk_rows: int = 4096,
+    metadata: Optional[Dict[str, object]] = None
+) -> ImageLogStore:
+    """
+    Converts an image log CSV (one column per azimuthal sample) into an image log store, chunk by chunk.
+
+    Args:
+        csv_path (str): Path of the CSV file, such as '3-BRSA-778-SE_AMP [NONE].csv'.
+        path (str): Directory of the store.
+        depth_column (str): Name of the depth column.
+        image_columns (Optional[List[str]]): Columns of the image samples, in order. None uses every column
+            but the depth column.
+        dtype (str): dtype of the stored samples.
+        chunk_rows (int): Number of CSV rows parsed at a time.
+        metadata (Optional[Dict[str, object]]): Extra metadata saved with the store.
+
+    Returns:
+        ImageLogStore: The store.
+    """
+    if image_columns is None:
+        header = pd.read_csv(csv_path, nrows=0).columns
+        image_columns = [column for column in header if column != depth_column]
+
+    metadata = dict(metadata or {}, source=os.path.basename(csv_path), columns=list(image_columns))
+
+    with ImageLogWriter(path, len(image_columns), dtype, metadata) as writer:
+        for chunk in pd.read_csv(csv_path, usecols=[depth_column] + list(image_columns), chunksize=chunk_rows):
+            writer.append(chunk[depth_column].to_numpy(), chunk[image_columns].to_numpy(dtype=np.float64))
+
+    return ImageLogStore(path)
@@ -0,0 +1,166 @@
+from typing import Dict, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import os
+import re
+import threading
+import time
+import urllib.parse
+from utils.downloads import CHECKSUM_HEADER, file_checksum
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+
+class LocalShareServer:
+    """
+    Local stand-in for the WebDAV endpoint of a public share, serving the files of a directory at
+    '/public.php/webdav/<path>' for `download_files`. It answers HEAD and GET requests (with single byte
+    ranges), checks the share token of the basic authentication and sends the SHA256 of each file in
+    `CHECKSUM_HEADER`.
+
+    Faults can be injected to exercise the retries and the resumed downloads:
+        - latency: seconds of wait before each response, as a distant server.
+        - fail_every: every n-th request is answered with a 503.
+        - drop_after: GET responses are cut after this many bytes (the connection is closed).
+
+    Usage:
+        with LocalShareServer(directory) as server:
+            download_files(items, output_dir, server.share_url)
+
+    Args:
+        directory (str): Directory with the files of the share.
+        token (str): Share token expected as the user of the basic authentication.
+        latency (float): Wait before each response, in seconds.
+        fail_every (int): Answer every n-th request with a 503. 0 never fails.
+        drop_after (Optional[int]): Bytes after which the GET responses are cut. None sends every byte.
+        port (int): Port of the server. 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        token: str = 'TOKEN',
+        latency: float = 0.0,
+        fail_every: int = 0,
+        drop_after: Optional[int] = None,
+        port: int = 0
+    ):
+        self.directory = directory
+        self.token = token
+        self.latency = latency
+        self.fail_every = fail_every
+        self.drop_after = drop_after
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._checksums: Dict[str, str] = {}
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def share_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/index.php/s/{self.token}"
+
+    def __enter__(self) -> 'LocalShareServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _checksum(self, file_path: str) -> str:
+        with self._lock:
+            if file_path not in self._checksums:
+                self._checksums[file_path] = file_checksum(file_path, 'sha256')
+            return self._checksums[file_path]
+
+    def _count_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def _handler(self):
+        share = self
+        expected_auth = "Basic " + base64.b64encode(f"{self.token}:".encode()).decode()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._respond(body=False)
+
+            def do_GET(self):
+                self._respond(body=True)
+
+            def _error(self, status):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def _respond(self, body):
+                number = share._count_request()
+                if share.latency:
+                    time.sleep(share.latency)
+                if share.fail_every and number % share.fail_every == 0:
+                    return self._error(503)
+                if self.headers.get('Authorization') != expected_auth:
+                    return self._error(401)
+
+                prefix = '/public.php/webdav/'
+                path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+                if not path.startswith(prefix):
+                    return self._error(404)
+
+                file_path = os.path.realpath(os.path.join(share.directory, path[len(prefix):]))
+                if not file_path.startswith(os.path.realpath(share.directory) + os.sep) or not os.path.isfile(file_path):
+                    return self._error(404)
+
+                size = os.path.getsize(file_path)
+                start, end, status = 0, size - 1, 200
+                match = _RANGE_PATTERN.match(self.headers.get('Range', ''))
+                if match:
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                    if start >= size:
+                        return self._error(416)
+                    status = 206
+
+                self.send_response(status)
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header(CHECKSUM_HEADER, f"SHA256:{share._checksum(file_path)}")
+                if status == 206:
+                    self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+                self.end_headers()
+                if not body:
+                    return
+
+                remaining = end - start + 1
+                if share.drop_after is not None:
+                    remaining = min(remaining, share.drop_after)
+                with open(file_path, 'rb') as f:
+                    f.seek(start)
+                    while remaining > 0:
+                        chunk = f.read(min(remaining, 1 << 16))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+
+                if share.drop_after is not None:
+                    self.close_connection = True
+
+        return Handler
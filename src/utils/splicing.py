@@ -0,0 +1,303 @@
+from typing import Dict, List, Optional, Tuple
+import re
+import numpy as np
+import pandas as pd
+from utils.catalog import FrameCatalog
+from utils.depth_keys import depth_to_key, key_to_depth
+from utils.validity import ValidityMask
+
+# Ways of choosing the run that gives the samples of a depth interval covered by several runs
+SPLICE_POLICIES = ['run', 'resolution', 'blend']
+
+
+def run_sort_key(run: str) -> Tuple:
+    """
+    Natural sort key of a run name such as 'logical_file_10/frame_2.csv', so logical file 10 comes after 2.
+    """
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', run))
+
+
+def curve_segment(
+    df: pd.DataFrame,
+    curve: str,
+    depth_column: str = 'TDEP',
+    mask: Optional[ValidityMask] = None
+) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Gets the valid samples of a curve in a run, sorted by depth, with their integer depth keys.
+
+    The valid samples come from the validity masks of the run when it has them for the curve, and
+    are otherwise checked on the data. Samples at a repeated depth are kept once, the first one in
+    the order of the frame.
+
+    Returns:
+        Optional[Dict[str, np.ndarray]]: 'depth', 'key' and 'values' of the valid samples, the 'spacing'
+        (median distance between samples) and the 'pieces', the (top, bottom) depth keys of the parts of
+        the run without NaN gaps, or None when the run has fewer than two valid samples.
+    """
+    if curve not in df.columns:
+        return None
+
+    depth = df[depth_column].to_numpy(dtype=np.float64)
+    values = df[curve].to_numpy(dtype=np.float64)
+    if mask is not None and curve in mask and mask.matches(df, [curve]):
+        valid = mask.valid([curve])
+    else:
+        valid = ~np.isnan(values) & np.isfinite(depth)
+
+    # np.unique sorts the keys and gives the first sample of each one
+    key, first = np.unique(depth_to_key(depth[valid]), return_index=True)
+    if len(key) < 2:
+        return None
+
+    # A NaN gap is a row of the run without a value of the curve between two valid samples
+    missing = np.unique(depth_to_key(depth[~valid & np.isfinite(depth)]))
+    gaps = np.flatnonzero(np.searchsorted(missing, key[:-1], side='right') < np.searchsorted(missing, key[1:]))
+    pieces = [(int(key[top]), int(key[bottom]))
+              for top, bottom in zip(np.concatenate([[0], gaps + 1]), np.concatenate([gaps, [len(key) - 1]]))]
+
+    depth = depth[valid][first]
+    return {
+        'depth': depth,
+        'key': key,
+        'values': values[valid][first],
+        'spacing': float(np.median(np.diff(depth))),
+        'pieces': pieces,
+    }
+
+
+def ownership_intervals(intervals: List[Tuple[int, int]], ranks: List[float]) -> List[Tuple[int, int, int]]:
+    """
+    Sweeps over the sorted ends of the depth intervals and gives each part of the well to the covering
+    interval with the best (lowest) rank.
+
+    Args:
+        intervals (List[Tuple[int, int]]): Top and bottom depth key of each interval. An interval of a single
+            depth (top == bottom) is given that depth when no other interval covers it.
+        ranks (List[float]): Rank of each interval. Ties go to the interval listed first.
+
+    Returns:
+        List[Tuple[int, int, int]]: Sorted (top, bottom, interval) intervals. Consecutive intervals of the
+        same owner are joined, and depths covered by no interval are left out.
+    """
+    ends = sorted({end for interval in intervals for end in interval})
+    # Intervals sorted by rank, so the owner of a part is the first covering interval in this order
+    by_rank = sorted(range(len(intervals)), key=lambda run: (ranks[run], run))
+
+    owned = []
+    for top, bottom in zip(ends[:-1], ends[1:]):
+        owner = next((run for run in by_rank if intervals[run][0] <= top and intervals[run][1] >= bottom), None)
+        if owner is None:
+            continue
+
+        if owned and owned[-1][2] == owner and owned[-1][1] == top:
+            owned[-1] = (owned[-1][0], bottom, owner)
+        else:
+            owned.append((top, bottom, owner))
+
+    points = {}
+    for run in by_rank:
+        point = intervals[run][0]
+        if intervals[run][1] == point and point not in points and \
+                not any(top <= point <= bottom for top, bottom, _ in owned):
+            points[point] = run
+
+    return sorted(owned + [(point, point, run) for point, run in points.items()])
+
+
+def _interpolate(segment: Dict[str, np.ndarray], depth: np.ndarray) -> np.ndarray:
+    """
+    Interpolates the valid samples of a run at some depths, NaN outside of the run.
+    """
+    inside = (depth >= segment['depth'][0]) & (depth <= segment['depth'][-1])
+    return np.where(inside, np.interp(depth, segment['depth'], segment['values']), np.nan)
+
+
+def splice_curve(
+    runs: List[pd.DataFrame],
+    curve: str,
+    policy: str = 'run',
+    transition: float = 1.0,
+    depth_column: str = 'TDEP',
+    masks: Optional[List[Optional[ValidityMask]]] = None
+) -> pd.DataFrame:
+    """
+    Splices the runs of a curve into one log without repeated depths.
+
+    Where runs overlap, the samples come from a single run, chosen by the policy:
+        - 'run': the run listed first.
+        - 'resolution': the run with the smallest sample spacing, then the run listed first.
+        - 'blend': the run listed first, as 'run', but over the last `transition` metres of the overlap
+          before each change of run (or the first ones after it, when the new run starts there) the curve
+          goes linearly from one run to the other, both interpolated at the output depths.
+
+    A run only covers the parts of its depth range where it has samples: a NaN gap of the chosen run is
+    filled by the next run that has samples there.
+
+    Args:
+        runs (List[pd.DataFrame]): The runs (frames) of the well, in priority order.
+        curve (str): The curve to splice.
+        policy (str): One of `SPLICE_POLICIES`.
+        transition (float): Length of the transition zone of 'blend', in metres.
+        depth_column (str): Name of the depth column.
+        masks (Optional[List[Optional[ValidityMask]]]): Validity masks of each run, see `curve_segment`.
+
+    Returns:
+        pd.DataFrame: The depth column and the curve, sorted by depth. Runs with fewer than two valid
+        samples of the curve are not used.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+    if policy not in SPLICE_POLICIES:
+        raise ValueError(f"Expected one of {SPLICE_POLICIES}, but got '{policy}'")
+
+    masks = masks or [None] * len(runs)
+    segments = [curve_segment(df, curve, depth_column, mask) for df, mask in zip(runs, masks)]
+    segments = [segment for segment in segments if segment is not None]
+    if not segments:
+        return pd.DataFrame({depth_column: pd.Series(dtype='float64'), curve: pd.Series(dtype='float64')})
+
+    # Each part of a run without NaN gaps is an interval, so the gaps of a run are filled by the others
+    intervals = [piece for segment in segments for piece in segment['pieces']]
+    piece_runs = [run for run, segment in enumerate(segments) for _ in segment['pieces']]
+    if policy == 'resolution':
+        ranks = [segments[run]['spacing'] for run in piece_runs]
+    else:
+        ranks = piece_runs
+
+    owned = ownership_intervals(intervals, ranks)
+
+    depths, values = [], []
+    for i, (top, bottom, piece) in enumerate(owned):
+        key = segments[piece_runs[piece]]['key']
+        # The bottom sample belongs to the next interval when it starts right there
+        closed = i + 1 == len(owned) or owned[i + 1][0] != bottom
+        keep = (key >= top) & ((key <= bottom) if closed else (key < bottom))
+
+        depths.append(segments[piece_runs[piece]]['depth'][keep])
+        values.append(segments[piece_runs[piece]]['values'][keep])
+
+    depth, value = np.concatenate(depths), np.concatenate(values)
+
+    if policy == 'blend' and transition > 0:
+        for (_, boundary, upper), (next_top, _, lower) in zip(owned[:-1], owned[1:]):
+            if next_top != boundary:
+                continue
+
+            # The zone is the part of the overlap of both runs within `transition` of the change of run:
+            # above it when the upper run ends there, below it when the lower run starts there
+            overlap_top = key_to_depth(max(intervals[upper][0], intervals[lower][0]))
+            overlap_bottom = key_to_depth(min(intervals[upper][1], intervals[lower][1]))
+            boundary_depth = key_to_depth(boundary)
+            if boundary == intervals[upper][1]:
+                zone_top, zone_bottom = max(overlap_top, boundary_depth - transition), boundary_depth
+            else:
+                zone_top, zone_bottom = boundary_depth, min(overlap_bottom, boundary_depth + transition)
+            if zone_bottom <= zone_top:
+                continue
+
+            zone = (depth >= zone_top) & (depth <= zone_bottom)
+            # Weight of the upper run: 1 at the top of the zone, 0 at its bottom
+            weight = (zone_bottom - depth[zone]) / (zone_bottom - zone_top)
+            blended = weight * _interpolate(segments[piece_runs[upper]], depth[zone]) + \
+                (1 - weight) * _interpolate(segments[piece_runs[lower]], depth[zone])
+            value[zone] = np.where(np.isnan(blended), value[zone], blended)
+
+    return pd.DataFrame({depth_column: depth, curve: value})
+
+
+def splice_well(
+    frames: Dict[str, pd.DataFrame],
+    curves: List[str],
+    policy: str = 'run',
+    transition: float = 1.0,
+    run_order: str = 'first',
+    depth_column: str = 'TDEP',
+    masks: Optional[Dict[str, ValidityMask]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Splices several curves of a well from the same frames.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): Frames of the well by run name ('logical_file/frame').
+        curves (List[str]): Curves to splice.
+        policy (str): One of `SPLICE_POLICIES`, see `splice_curve`.
+        transition (float): Length of the transition zone of 'blend', in metres.
+        run_order (str): 'first' gives priority to the earlier runs (in natural order of the logical
+            files and frames), 'last' to the later ones.
+        depth_column (str): Name of the depth column.
+        masks (Optional[Dict[str, ValidityMask]]): Validity masks of the frames by run name, built once
+            and reused by every curve.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The spliced log of each curve that the well has.
+
+    Raises:
+        ValueError: If run_order is unknown.
+    """
+    if run_order not in ('first', 'last'):
+        raise ValueError(f"Expected 'first' or 'last', but got '{run_order}'")
+
+    names = sorted(frames, key=run_sort_key, reverse=run_order == 'last')
+    runs = [frames[name] for name in names]
+    run_masks = [(masks or {}).get(name) for name in names]
+
+    spliced = {}
+    for curve in curves:
+        if any(curve in df.columns for df in runs):
+            spliced[curve] = splice_curve(runs, curve, policy, transition, depth_column, run_masks)
+
+    return spliced
+
+
+def splice_catalog(
+    catalog: FrameCatalog,
+    curves: List[str],
+    policy: str = 'run',
+    transition: float = 1.0,
+    run_order: str = 'first'
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Splices several curves of every well of a catalog, reading each frame once.
+
+    Args:
+        catalog (FrameCatalog): Catalog of the preprocessed frames. Only the frames with at least one of
+            the curves are read, and only their depth column and the curves. The validity masks built
+            by the catalog as it reads the frames are used by every curve.
+        curves (List[str]): Curves to splice.
+        policy (str): One of `SPLICE_POLICIES`, see `splice_curve`.
+        transition (float): Length of the transition zone of 'blend', in metres.
+        run_order (str): 'first' or 'last', see `splice_well`.
+
+    Returns:
+        Dict[str, Dict[str, pd.DataFrame]]: The spliced logs by curve and well, as `spliced_dfs_to_csv` saves them.
+    """
+    catalog = catalog.select(curves, require_all=False)
+
+    spliced = {curve: {} for curve in curves}
+    for well, w_dict in catalog.items():
+        frames = {
+            f"{logical_file}/{frame}": df
+            for logical_file, lf_dict in w_dict.items()
+            for frame, df in lf_dict.items()
+        }
+
+        masks = None
+        if catalog.validity_masks:
+            masks = {
+                f"{logical_file}/{frame}": lf_dict.validity(frame)
+                for logical_file, lf_dict in w_dict.items()
+                for frame in lf_dict
+            }
+
+        try:
+            well_logs = splice_well(frames, curves, policy, transition, run_order, catalog.depth_column, masks)
+        except Exception as e:
+            print(f"Error when splicing {well}: {e}")
+            continue
+
+        for curve, df in well_logs.items():
+            spliced[curve][well] = df
+
+    return spliced
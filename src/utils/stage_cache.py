@@ -0,0 +1,310 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from functools import partial
+import glob
+import hashlib
+import inspect
+import json
+import os
+import types
+import pandas as pd
+from utils.storage import load_frame, save_frame
+
+# A pipeline stage: its name, the function applied to the frame and the keyword arguments of the function
+Stage = Tuple[str, Callable[..., pd.DataFrame], Dict[str, object]]
+
+# Code hash of each stage function, computed once per process
+_code_hashes = {}
+
+
+def hash_params(params: Dict[str, object]) -> str:
+    """
+    Hashes the parameters of a stage. Values that are not JSON serializable are hashed by their repr.
+
+    Args:
+        params (Dict[str, object]): Keyword arguments of the stage.
+
+    Returns:
+        str: Hex digest of the parameters.
+    """
+    encoded = json.dumps(params, sort_keys=True, default=repr).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _update_code(digest: 'hashlib._Hash', code: types.CodeType) -> None:
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        # Nested functions are hashed by their code; the repr of a code object has its address
+        if isinstance(const, types.CodeType):
+            _update_code(digest, const)
+        else:
+            digest.update(repr(const).encode())
+
+
+def _code_names(code: types.CodeType) -> List[str]:
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names += _code_names(const)
+    return names
+
+
+def code_hash(function: Callable) -> str:
+    """
+    Hashes the code of a stage function: its bytecode and constants, and those of the functions of its
+    own module that it calls, so editing any of them invalidates the cached outputs of the stage.
+
+    Changes in other modules are not seen; give the stage a new name to invalidate its outputs then.
+
+    Args:
+        function (Callable): The function, or a partial of it.
+
+    Returns:
+        str: Hex digest of the code.
+    """
+    while isinstance(function, partial):
+        function = function.func
+
+    if function not in _code_hashes:
+        digest = hashlib.blake2b(digest_size=16)
+        pending, seen = [function], set()
+
+        while pending:
+            func = pending.pop()
+            code = getattr(func, '__code__', None)
+            if code is None:
+                # Builtins and callable objects are identified by their name only
+                digest.update(getattr(func, '__qualname__', repr(type(func))).encode())
+                continue
+            if code in seen:
+                continue
+
+            seen.add(code)
+            _update_code(digest, code)
+            for name in sorted(set(_code_names(code))):
+                called = func.__globals__.get(name)
+                if inspect.isfunction(called) and called.__module__ == func.__module__:
+                    pending.append(called)
+
+        _code_hashes[function] = digest.hexdigest()
+
+    return _code_hashes[function]
+
+
+def hash_file_content(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Hashes the content of a file, reading it in chunks.
+
+    Args:
+        file_path (str): Path of the file.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Persistent on-disk cache of the output of pipeline stages.
+
+    The output of a stage is keyed on the hash of the stage input and of its name, parameters and code
+    (see `code_hash`). The input of the first stage is the content hash of the input file, and the input
+    of the next stages is the key of the previous one, so a change in the file or in the parameters or
+    code of a stage invalidates that stage and every stage after it. Outputs are stored as Parquet files and the least recently used ones
+    are removed when the cache grows beyond `max_bytes`.
+
+    Args:
+        cache_dir (str): Directory where the cached outputs are stored.
+        max_bytes (int): Maximum size of the cached outputs.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Size of the cached outputs, computed on the first put
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._file_hashes_path = os.path.join(cache_dir, 'file_hashes.json')
+        self._file_hashes = self._load_file_hashes()
+
+    def _load_file_hashes(self) -> Dict[str, Dict[str, object]]:
+        if not os.path.exists(self._file_hashes_path):
+            return {}
+
+        with open(self._file_hashes_path) as f:
+            return json.load(f)
+
+    def save_file_hashes(self) -> None:
+        """
+        Saves the content hashes of the input files, so unchanged files are not hashed again in the next run.
+        """
+        with open(self._file_hashes_path, 'w') as f:
+            json.dump(self._file_hashes, f)
+
+    def file_hash(self, file_path: str) -> str:
+        """
+        Gets the content hash of an input file, hashing it again only when its size or mtime changed.
+
+        Args:
+            file_path (str): Path of the file.
+
+        Returns:
+            str: Hex digest of the content.
+        """
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        known = self._file_hashes.get(path)
+
+        if known is None or known['size'] != stat.st_size or known['mtime_ns'] != stat.st_mtime_ns:
+            known = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': hash_file_content(file_path)}
+            self._file_hashes[path] = known
+
+        return known['hash']
+
+    @staticmethod
+    def stage_key(
+        input_key: str,
+        stage_name: str,
+        params: Dict[str, object],
+        function: Optional[Callable] = None
+    ) -> str:
+        """
+        Builds the key of the output of a stage.
+
+        Args:
+            input_key (str): Content hash of the input file, or key of the previous stage.
+            stage_name (str): Name of the stage.
+            params (Dict[str, object]): Keyword arguments of the stage.
+            function (Optional[Callable]): Function of the stage, whose code is part of the key.
+
+        Returns:
+            str: Hex digest identifying the output.
+        """
+        code = code_hash(function) if function is not None else ''
+        encoded = f"{input_key}:{stage_name}:{hash_params(params)}:{code}".encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.parquet")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Loads a cached output and marks it as recently used.
+
+        Args:
+            key (str): Key of the output.
+
+        Returns:
+            Optional[pd.DataFrame]: The cached output, or None when it is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            # The mtime of the file is the last access used by the LRU eviction
+            os.utime(path)
+            return load_frame(path)
+        except FileNotFoundError:
+            # Not cached, or evicted (e.g. by another process) since the key was computed
+            return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """
+        Stores an output and evicts the least recently used outputs if the cache is over its size.
+
+        Args:
+            key (str): Key of the output.
+            df (pd.DataFrame): The output of the stage.
+        """
+        path = self._path(key)
+        save_frame(df, path, 'parquet')
+
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> List[str]:
+        """
+        Removes the least recently used outputs until the cache fits in `max_bytes`.
+
+        Returns:
+            List[str]: Paths of the removed files.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*', '*.parquet')):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = []
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed.append(path)
+
+        self._size = total
+        return removed
+
+    def run_stages(
+        self,
+        input_key: str,
+        load_input: Callable[[], pd.DataFrame],
+        stages: List[Stage]
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Runs a chain of stages, skipping the ones whose output is already cached.
+
+        Only the output of the last cached stage is loaded, and the input is loaded only when no stage
+        is cached.
+
+        Args:
+            input_key (str): Content hash of the input (see `file_hash`).
+            load_input (Callable[[], pd.DataFrame]): Function that loads the input of the first stage.
+            stages (List[Stage]): The stages, as (name, function, keyword arguments).
+
+        Returns:
+            Tuple[pd.DataFrame, int]: The output of the last stage and the number of stages computed.
+        """
+        keys = []
+        for stage_name, function, params in stages:
+            input_key = self.stage_key(input_key, stage_name, params, function)
+            keys.append(input_key)
+
+        # Resume from the last stage whose output is cached. An output evicted since it was found is a
+        # miss, so the scan goes on to the stages before it
+        start = 0
+        df = None
+        for i in range(len(stages) - 1, -1, -1):
+            df = self.get(keys[i])
+            if df is not None:
+                start = i + 1
+                break
+
+        if df is None:
+            df = load_input()
+
+        self.hits += start
+        self.misses += len(stages) - start
+
+        for (_, function, params), key in zip(stages[start:], keys[start:]):
+            df = function(df, **params)
+            self.put(key, df)
+
+        return df, len(stages) - start
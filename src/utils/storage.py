@@ -0,0 +1,359 @@
+from typing import Callable, Dict, List, Optional
+import glob
+import json
+import numbers
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Key of the schema metadata (Parquet/Arrow) or of the sidecar file (CSV) where the units are stored
+UNITS_METADATA_KEY = 'units'
+
+
+def _sidecar_path(file_path: str) -> str:
+    return f"{file_path}.meta.json"
+
+
+def _existing_columns(names: List[str], columns: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Keeps the requested columns that exist in the file, in the order of the file.
+    """
+    if columns is None:
+        return None
+
+    requested = set(columns)
+    return [name for name in names if name in requested]
+
+
+def _with_units(table: pa.Table, units: Optional[Dict[str, str]]) -> pa.Table:
+    """
+    Adds the units to the schema metadata of an Arrow table.
+    """
+    metadata = dict(table.schema.metadata or {})
+    metadata[UNITS_METADATA_KEY.encode()] = json.dumps(units or {}).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _units_from_schema(schema: pa.Schema) -> Dict[str, str]:
+    metadata = schema.metadata or {}
+    return json.loads(metadata.get(UNITS_METADATA_KEY.encode(), b'{}'))
+
+
+def write_csv(df: pd.DataFrame, file_path: str, units: Optional[Dict[str, str]] = None) -> None:
+    """
+    Saves a DataFrame as CSV, with the dtypes and units in a JSON sidecar file.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        file_path (str): Path of the CSV file.
+        units (Optional[Dict[str, str]]): Units of the columns.
+    """
+    df.to_csv(file_path, index=False)
+
+    metadata = {
+        'dtypes': {column: str(dtype) for column, dtype in df.dtypes.items()},
+        UNITS_METADATA_KEY: units or {}
+    }
+    with open(_sidecar_path(file_path), 'w') as f:
+        json.dump(metadata, f)
+
+
+def read_csv(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads a CSV file, restoring the dtypes saved in its sidecar file when there is one.
+
+    Args:
+        file_path (str): Path of the CSV file.
+        columns (Optional[List[str]]): Columns to read. Columns missing from the file are ignored.
+            None reads every column.
+
+    Returns:
+        pd.DataFrame: The frame data.
+    """
+    dtypes = read_csv_metadata(file_path).get('dtypes')
+    usecols = (lambda column: column in columns) if columns is not None else None
+
+    return pd.read_csv(file_path, usecols=usecols, dtype=dtypes)
+
+
+def read_csv_metadata(file_path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Reads the dtypes and units saved in the sidecar file of a CSV file.
+
+    Returns:
+        Dict[str, Dict[str, str]]: The 'dtypes' and 'units' of the columns. Empty when there is no sidecar.
+    """
+    sidecar_path = _sidecar_path(file_path)
+    if not os.path.exists(sidecar_path):
+        return {}
+
+    with open(sidecar_path) as f:
+        return json.load(f)
+
+
+def write_parquet(df: pd.DataFrame, file_path: str, units: Optional[Dict[str, str]] = None) -> None:
+    """
+    Saves a DataFrame as Parquet, with the units in the schema metadata.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        file_path (str): Path of the Parquet file.
+        units (Optional[Dict[str, str]]): Units of the columns.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(_with_units(table, units), file_path)
+
+
+def read_parquet(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads a Parquet file, decoding only the requested columns.
+
+    Args:
+        file_path (str): Path of the Parquet file.
+        columns (Optional[List[str]]): Columns to read. Columns missing from the file are ignored.
+            None reads every column.
+
+    Returns:
+        pd.DataFrame: The frame data.
+    """
+    columns = _existing_columns(pq.read_schema(file_path).names, columns)
+    return pq.read_table(file_path, columns=columns).to_pandas()
+
+
+def write_arrow(df: pd.DataFrame, file_path: str, units: Optional[Dict[str, str]] = None) -> None:
+    """
+    Saves a DataFrame in the Arrow IPC (Feather v2) format, uncompressed so it can be memory mapped.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        file_path (str): Path of the Arrow file.
+        units (Optional[Dict[str, str]]): Units of the columns.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(_with_units(table, units), file_path, compression='uncompressed')
+
+
+def read_arrow(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads an Arrow IPC file through a memory map, touching only the requested columns.
+
+    Args:
+        file_path (str): Path of the Arrow file.
+        columns (Optional[List[str]]): Columns to read. Columns missing from the file are ignored.
+            None reads every column.
+
+    Returns:
+        pd.DataFrame: The frame data.
+    """
+    with pa.memory_map(file_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        columns = _existing_columns(table.schema.names, columns)
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+
+def read_schema_units(file_path: str) -> Dict[str, str]:
+    """
+    Reads the units saved in the schema metadata of an Arrow IPC file.
+    """
+    with pa.memory_map(file_path) as source:
+        return _units_from_schema(pa.ipc.open_file(source).schema)
+
+
+# Registered storage backends: file extension, writer, reader and units reader
+STORAGE_BACKENDS: Dict[str, Dict[str, object]] = {
+    'csv': {
+        'extension': '.csv',
+        'write': write_csv,
+        'read': read_csv,
+        'units': lambda file_path: read_csv_metadata(file_path).get(UNITS_METADATA_KEY, {})
+    },
+    'parquet': {
+        'extension': '.parquet',
+        'write': write_parquet,
+        'read': read_parquet,
+        'units': lambda file_path: _units_from_schema(pq.read_schema(file_path))
+    },
+    'arrow': {
+        'extension': '.arrow',
+        'write': write_arrow,
+        'read': read_arrow,
+        'units': read_schema_units
+    },
+}
+
+
+def register_backend(
+    name: str,
+    extension: str,
+    write: Callable[[pd.DataFrame, str, Optional[Dict[str, str]]], None],
+    read: Callable[[str, Optional[List[str]]], pd.DataFrame],
+    units: Callable[[str], Dict[str, str]]
+) -> None:
+    """
+    Adds a storage backend, making it available to every function of this module.
+
+    Args:
+        name (str): Name of the backend, used as the `backend` argument.
+        extension (str): File extension of the backend, including the dot.
+        write (Callable): Function called as write(df, file_path, units).
+        read (Callable): Function called as read(file_path, columns).
+        units (Callable): Function called as units(file_path), returning the units of the columns.
+    """
+    STORAGE_BACKENDS[name] = {'extension': extension, 'write': write, 'read': read, 'units': units}
+
+
+def get_backend(backend: str) -> Dict[str, object]:
+    """
+    Gets a registered storage backend by name.
+
+    Raises:
+        ValueError: If the backend is not registered.
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {sorted(STORAGE_BACKENDS)}")
+
+    return STORAGE_BACKENDS[backend]
+
+
+def backend_from_path(file_path: str) -> str:
+    """
+    Gets the name of the backend that handles a file from its extension.
+
+    Raises:
+        ValueError: If no registered backend uses the extension of the file.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    for name, backend in STORAGE_BACKENDS.items():
+        if backend['extension'] == extension:
+            return name
+
+    raise ValueError(f"No storage backend for the extension '{extension}' of {file_path}")
+
+
+def frame_file_name(frame: object, backend: str = 'csv') -> str:
+    """
+    Builds the file name of a frame for a backend.
+
+    Integer frame indices (Python or NumPy) become 'frame_{i}', as in `dlis_raw_dfs_to_csv`. String keys, such as the
+    file names returned by `load_csv_files`, keep their name with the extension of the backend.
+    """
+    name = f"frame_{frame}" if isinstance(frame, numbers.Integral) else os.path.splitext(frame)[0]
+    return name + get_backend(backend)['extension']
+
+
+def save_frame(
+    df: pd.DataFrame,
+    file_path: str,
+    backend: Optional[str] = None,
+    units: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Saves a frame with a storage backend, creating the directories as needed.
+
+    Args:
+        df (pd.DataFrame): The frame data.
+        file_path (str): Path of the file.
+        backend (Optional[str]): Name of the backend. None picks it from the extension of the file.
+        units (Optional[Dict[str, str]]): Units of the columns, saved as metadata.
+    """
+    backend = backend or backend_from_path(file_path)
+
+    # Ensure the directories exist before saving the file
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+
+    get_backend(backend)['write'](df, file_path, units)
+
+
+def load_frame(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads a frame saved by any storage backend, reading only the requested columns.
+
+    Args:
+        file_path (str): Path of the file. The backend is picked from its extension.
+        columns (Optional[List[str]]): Columns to read. Columns missing from the file are ignored.
+            None reads every column.
+
+    Returns:
+        pd.DataFrame: The frame data.
+    """
+    return get_backend(backend_from_path(file_path))['read'](file_path, columns)
+
+
+def load_frame_units(file_path: str) -> Dict[str, str]:
+    """
+    Loads the units saved with a frame.
+
+    Args:
+        file_path (str): Path of the file. The backend is picked from its extension.
+
+    Returns:
+        Dict[str, str]: Units of the columns. Empty when no units were saved.
+    """
+    return get_backend(backend_from_path(file_path))['units'](file_path)
+
+
+def save_frames(
+    well_df_dict: Dict[str, Dict[object, Dict[object, pd.DataFrame]]],
+    base_dir: str,
+    backend: str = 'parquet',
+    units: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Saves each DataFrame from a nested dictionary of wells, logical files, and frames with a storage backend.
+
+    The hierarchy is the same as the one of the CSV files: {base_dir}/{well}/{logical_file}/{frame}.
+    Integer keys are written as 'logical_file_{i}' and 'frame_{j}', as in `dlis_raw_dfs_to_csv`.
+
+    Args:
+        well_df_dict (Dict[str, Dict[object, Dict[object, pd.DataFrame]]]): A nested dictionary where:
+            - The outer keys are well names (str),
+            - The second-level keys are logical file indices or names,
+            - The third-level keys are frame indices or file names,
+            - The values are pandas DataFrames containing well log data.
+        base_dir (str): The base directory where the files will be saved.
+        backend (str): Name of the storage backend.
+        units (Optional[Dict[str, str]]): Units of the columns, saved as metadata of every frame.
+    """
+    for well, w_dict in well_df_dict.items():
+        for logical_file, lf_dict in w_dict.items():
+            logical_file_name = f"logical_file_{logical_file}" if isinstance(logical_file, numbers.Integral) else logical_file
+
+            for frame, df in lf_dict.items():
+                file_path = os.path.join(base_dir, well, logical_file_name, frame_file_name(frame, backend))
+                save_frame(df, file_path, backend, units)
+
+
+def load_frames(
+    base_path: str,
+    backend: str = 'parquet',
+    columns: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Dict[str, pd.DataFrame]]]:
+    """
+    Loads every frame saved by a storage backend, in the same nested dictionary as `load_csv_files`.
+
+    Args:
+        base_path (str): The root directory where the files are stored.
+        backend (str): Name of the storage backend.
+        columns (Optional[List[str]]): Columns to read from every frame. Columns missing from a frame
+            are ignored. None reads every column.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, pd.DataFrame]]]: A nested dictionary where the outer keys are well names,
+        the second level keys are logical file names, and the innermost keys are file names.
+    """
+    frames = {}
+    read = get_backend(backend)['read']
+
+    data_path = os.path.join(base_path, '**', '*' + get_backend(backend)['extension'])
+
+    for file in sorted(glob.glob(data_path, recursive=True)):
+        well, logical_file, file_name = os.path.relpath(file, base_path).split(os.sep)[:3]
+
+        frames.setdefault(well, {}).setdefault(logical_file, {})[file_name] = read(file, columns)
+
+    return frames
@@ -0,0 +1,908 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from skimage.feature import graycomatrix, graycoprops
+from utils.depth_binning import BIN_STATISTICS, DepthBinAggregator, bin_depth_stream
+from utils.image_store import ImageLogStore
+
+# Properties computed by `extract_textures`, in the order of cast_test_01.ipynb
+TEXTURE_PROPERTIES = ['contrast', 'dissimilarity', 'homogeneity', 'energy', 'correlation', 'entropy']
+
+# Ways of mapping the amplitudes to gray levels, see `gray_level_mapping`
+QUANTIZATION_METHODS = ['min_max', 'equal_width', 'equal_frequency']
+
+DEFAULT_DISTANCES = [1, 2, 4]
+DEFAULT_ANGLES = [0, np.pi / 4, np.pi / 2]
+
+# Fixed-point scale of the sum of c * ln(c) over the co-occurrence counts. Keeping the running sum as an
+# integer makes each window independent of the windows before it. The sum fits in an int64 for windows of up
+# to about 200k pixel pairs per offset.
+ENTROPY_SCALE = 2 ** 40
+
+
+def normalize_gray_levels(
+    image: np.ndarray,
+    levels: int = 256,
+    value_range: Optional[Tuple[float, float]] = None
+) -> np.ndarray:
+    """
+    Min-max normalizes an image log to integer gray levels, as done in cast_test_01.ipynb.
+
+    Args:
+        image (np.ndarray): 2-D amplitude array (depth x azimuth).
+        levels (int): Number of gray levels.
+        value_range (Optional[Tuple[float, float]]): Minimum and maximum amplitude of the whole image, to
+            normalize a slice of it like the whole image. None uses the range of `image`. Amplitudes
+            outside the range are clipped to the first or last level.
+
+    Returns:
+        np.ndarray: The gray levels, as uint8 when they fit, uint16 otherwise. NaN samples, such as the
+        null values of an image extracted from DLIS, get the level 0.
+    """
+    image = np.asarray(image)
+    if not np.issubdtype(image.dtype, np.floating):
+        image = image.astype(np.float64)
+    # Computed in the float type of the image, as in the notebook, so each amplitude rounds the same way
+    image_min, image_max = value_range if value_range is not None else (np.nanmin(image), np.nanmax(image))
+    if image_max > image_min:
+        # Divided before the scaling, as in the notebook, so the maximum amplitude gets the last level
+        gray = (image - image_min) / (image_max - image_min) * (levels - 1)
+    else:
+        gray = np.zeros(image.shape)
+
+    # Clipped before the cast, so an amplitude outside a fixed range does not wrap around
+    gray = np.clip(gray, 0, levels - 1)
+
+    dtype = np.uint8 if levels <= 256 else np.uint16
+    return np.where(np.isnan(image), 0, gray).astype(dtype)
+
+
+def gray_level_mapping(
+    values: np.ndarray,
+    levels: int = 256,
+    quantization: str = 'min_max',
+    clip_percentiles: Optional[Tuple[float, float]] = None,
+    value_range: Optional[Tuple[float, float]] = None
+) -> Dict[str, object]:
+    """
+    Computes how amplitudes are mapped to gray levels, from the amplitudes of an image or a sample of them.
+
+    Keeping the mapping apart from its application lets the blocks of a long image be quantized like
+    the whole image.
+
+    Args:
+        values (np.ndarray): Amplitudes of the image, or a sample of them. NaN values are ignored.
+        levels (int): Number of gray levels.
+        quantization (str): One of `QUANTIZATION_METHODS`:
+            - 'min_max': the range is scaled to 0..levels - 1 and truncated, as in cast_test_01.ipynb.
+            - 'equal_width': the range is split in `levels` bins of the same width.
+            - 'equal_frequency': the range is split in bins with the same number of samples
+              (histogram equalization).
+        clip_percentiles (Optional[Tuple[float, float]]): Lower and upper percentiles of the amplitudes
+            used as the range instead of the minimum and maximum, so a few outliers do not squeeze the
+            other samples in a few levels.
+        value_range (Optional[Tuple[float, float]]): Fixed amplitude range. It takes precedence over the
+            minimum and maximum and over `clip_percentiles`.
+
+    Returns:
+        Dict[str, object]: The 'quantization', the 'levels', the 'value_range' and, for 'equal_frequency',
+        the 'edges' between the levels, for `apply_gray_level_mapping`.
+
+    Raises:
+        ValueError: If the quantization is unknown.
+    """
+    if quantization not in QUANTIZATION_METHODS:
+        raise ValueError(f"Expected one of {QUANTIZATION_METHODS}, but got '{quantization}'")
+
+    values = np.asarray(values, dtype=np.float64).ravel()
+    valid = values[~np.isnan(values)]
+
+    if value_range is not None:
+        low, high = float(value_range[0]), float(value_range[1])
+    elif valid.size == 0:
+        low, high = 0.0, 0.0
+    elif clip_percentiles is None:
+        low, high = float(valid.min()), float(valid.max())
+    else:
+        low, high = (float(value) for value in np.percentile(valid, clip_percentiles))
+
+    edges = None
+    if quantization == 'equal_frequency' and valid.size and high > low:
+        edges = np.quantile(np.clip(valid, low, high), np.arange(1, levels) / levels).tolist()
+
+    return {'quantization': quantization, 'levels': levels, 'value_range': [low, high], 'edges': edges}
+
+
+def apply_gray_level_mapping(image: np.ndarray, mapping: Dict[str, object]) -> np.ndarray:
+    """
+    Maps the amplitudes of an image (or a block of it) to gray levels with a mapping of `gray_level_mapping`.
+
+    Returns:
+        np.ndarray: The gray levels 0..levels - 1, as uint8 when they fit, uint16 otherwise. NaN samples
+        get the level 0, and so does every sample of a constant image, whatever the quantization.
+        Amplitudes outside the range go to the first or last level.
+    """
+    levels = mapping['levels']
+    low, high = mapping['value_range']
+
+    if mapping['quantization'] == 'min_max':
+        return normalize_gray_levels(image, levels, (low, high))
+
+    image = np.asarray(image, dtype=np.float64)
+    dtype = np.uint8 if levels <= 256 else np.uint16
+    if not high > low:
+        return np.zeros(image.shape, dtype=dtype)
+
+    clipped = np.clip(image, low, high)
+    if mapping['quantization'] == 'equal_width':
+        quantized = np.minimum((clipped - low) * (levels / (high - low)), levels - 1)
+    elif mapping['edges'] is None:
+        quantized = np.zeros(image.shape)
+    else:
+        quantized = np.searchsorted(np.asarray(mapping['edges']), clipped, side='right')
+
+    return np.where(np.isnan(image), 0, quantized).astype(dtype)
+
+
+def quantize_gray_levels(
+    image: np.ndarray,
+    levels: int = 64,
+    method: str = 'equal_width',
+    clip_percentiles: Optional[Tuple[float, float]] = None
+) -> np.ndarray:
+    """
+    Quantizes an image log to a small number of gray levels, shrinking the GLCM to levels x levels.
+
+    Args:
+        image (np.ndarray): 2-D amplitude array (depth x azimuth).
+        levels (int): Number of gray levels, e.g. 16, 32 or 64.
+        method (str): 'equal_width' or 'equal_frequency', see `gray_level_mapping`.
+        clip_percentiles (Optional[Tuple[float, float]]): Lower and upper percentiles of the amplitudes
+            used as the range instead of the minimum and maximum. Samples outside the range go to the
+            first or last level.
+
+    Returns:
+        np.ndarray: The gray levels 0..levels - 1, as uint8 when they fit, uint16 otherwise. NaN samples,
+        and every sample of a constant image, get the level 0.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in ('equal_width', 'equal_frequency'):
+        raise ValueError(f"Expected 'equal_width' or 'equal_frequency', but got '{method}'")
+
+    return apply_gray_level_mapping(image, gray_level_mapping(image, levels, method, clip_percentiles))
+
+
+def store_gray_level_mapping(
+    store: ImageLogStore,
+    levels: int = 256,
+    quantization: str = 'min_max',
+    clip_percentiles: Optional[Tuple[float, float]] = None,
+    value_range: Optional[Tuple[float, float]] = None,
+    max_samples: int = 1_000_000,
+    block_rows: int = 4096
+) -> Dict[str, object]:
+    """
+    Computes the gray level mapping (see `gray_level_mapping`) of a whole image log store, reading one
+    block of rows at a time.
+
+    The minimum and maximum use every sample. The percentiles of `clip_percentiles` and the edges of
+    'equal_frequency' are computed from every n-th row, so at most about `max_samples` amplitudes are kept.
+
+    Returns:
+        Dict[str, object]: The mapping.
+    """
+    needs_sample = value_range is None and clip_percentiles is not None or quantization == 'equal_frequency'
+    if not needs_sample:
+        value_range = value_range if value_range is not None else store.value_range(block_rows)
+        return gray_level_mapping(np.empty(0), levels, quantization, None, value_range)
+
+    n_rows, n_samples = store.shape
+    step = max(1, -(-n_rows * n_samples // max_samples))
+    sample = [block[(-start) % step::step] for start, _, block in store.iter_blocks(block_rows)]
+    sample = np.concatenate(sample) if sample else np.empty(0)
+
+    if value_range is None and clip_percentiles is None:
+        # The range of the sample could miss the extremes of the rows left out
+        value_range = store.value_range(block_rows)
+
+    return gray_level_mapping(sample, levels, quantization, clip_percentiles, value_range)
+
+
+def glcm_offsets(distances: Sequence[int], angles: Sequence[float]) -> List[Tuple[int, int]]:
+    """
+    Gets the (row, column) pixel offset of each distance and angle, rounded as `graycomatrix` does.
+
+    Returns:
+        List[Tuple[int, int]]: One offset per (distance, angle), distances first.
+    """
+    return [(round(np.sin(angle) * distance), round(np.cos(angle) * distance))
+            for distance in distances for angle in angles]
+
+
+def _canonical_offset(offset: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Flips an offset so it points down (or right), which gives the same symmetric co-occurrences.
+    """
+    row, col = offset
+    if row < 0 or (row == 0 and col < 0):
+        return -row, -col
+    return row, col
+
+
+def _pair_values(image: np.ndarray, offset: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the gray levels of every pixel pair of an offset, indexed by the row of the upper pixel.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The upper and lower pixel of each pair, as (rows - dr) x (cols - |dc|)
+        views on the image.
+    """
+    dr, dc = offset
+    rows, cols = image.shape
+
+    upper = image[:max(rows - dr, 0), max(0, -dc):max(cols - max(0, dc), 0)]
+    lower = image[dr:, max(0, dc):max(cols - max(0, -dc), 0)]
+    return upper, lower
+
+
+def _window_sums(values: np.ndarray, length: int, n_windows: int) -> np.ndarray:
+    """
+    Sums `length` consecutive rows of values for each window, always adding the rows in the same order.
+    """
+    sums = np.zeros((n_windows,) + values.shape[1:], dtype=values.dtype)
+    for k in range(max(length, 0)):
+        sums += values[k:k + n_windows]
+    return sums
+
+
+def _xlogx_table(max_count: int) -> np.ndarray:
+    """
+    Builds the fixed-point table of c * ln(c) for the counts 0..max_count.
+    """
+    counts = np.arange(max_count + 1, dtype=np.float64)
+    xlogx = counts * np.log(np.maximum(counts, 1))
+    return np.rint(xlogx * ENTROPY_SCALE).astype(np.int64)
+
+
+def _pair_row_sums(
+    image: np.ndarray,
+    offsets: List[Tuple[int, int]],
+    window_size: int,
+    n_windows: int
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the statistics of the symmetric co-occurrences that are linear in the counts for every window.
+
+    Each pixel pair (a, b) counts as (a, b) and (b, a). The statistics are summed per row of pairs and then
+    over the rows of each window.
+
+    Returns:
+        Dict[str, np.ndarray]: n_windows x n_offsets arrays of the number of pairs ('count'), the sum of
+        the levels ('sum_i'), of their squares ('sum_ii'), of their products ('sum_ij'), of their squared
+        and absolute differences ('contrast', 'dissimilarity') and of 1 / (1 + (i - j)^2) ('homogeneity').
+    """
+    stats = {
+        name: np.zeros((n_windows, len(offsets)), dtype=np.float64 if name == 'homogeneity' else np.int64)
+        for name in ['count', 'sum_i', 'sum_ii', 'sum_ij', 'contrast', 'dissimilarity', 'homogeneity']
+    }
+
+    for o, offset in enumerate(offsets):
+        length = window_size - offset[0]
+        if length <= 0 or abs(offset[1]) >= image.shape[1]:
+            continue
+
+        upper, lower = _pair_values(image, offset)
+        a = upper.astype(np.int64)
+        b = lower.astype(np.int64)
+        diff = a - b
+
+        row_sums = {
+            'sum_i': (a + b).sum(axis=1),
+            'sum_ii': (a * a + b * b).sum(axis=1),
+            'sum_ij': 2 * (a * b).sum(axis=1),
+            'contrast': 2 * (diff * diff).sum(axis=1),
+            'dissimilarity': 2 * np.abs(diff).sum(axis=1),
+            'homogeneity': 2 * (1.0 / (1.0 + diff * diff)).sum(axis=1),
+        }
+
+        stats['count'][:, o] = 2 * length * a.shape[1]
+        for name, values in row_sums.items():
+            stats[name][:, o] = _window_sums(values, length, n_windows)
+
+    return stats
+
+
+def _sliding_count_moments(
+    image: np.ndarray,
+    offsets: List[Tuple[int, int]],
+    levels: int,
+    window_size: int,
+    n_windows: int,
+    chunk_size: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Slides the window down the image keeping the co-occurrence counts of every offset up to date.
+
+    Moving the window one row down removes the pairs whose upper pixel is on the row that leaves the
+    window and adds the pairs whose lower pixel is on the row that enters it. Only the cells touched by
+    those pairs are read, to update the sum of the squared counts and the sum of c * ln(c).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: n_windows x n_offsets arrays of the sum of the squared counts and of
+        the fixed-point sum of c * ln(c) (see `ENTROPY_SCALE`).
+    """
+    cells = levels * levels
+    sum_squares = np.zeros((n_windows, len(offsets)), dtype=np.int64)
+    sum_xlogx = np.zeros((n_windows, len(offsets)), dtype=np.int64)
+
+    # Offsets whose pairs fit in the window, with the number of rows of pairs in a window
+    active = [
+        (o, window_size - offset[0], _pair_values(image, offset)) for o, offset in enumerate(offsets)
+        if offset[0] < window_size and abs(offset[1]) < image.shape[1]
+    ]
+    if not active:
+        return sum_squares, sum_xlogx
+
+    def pair_codes(start: int, stop: int, entering: bool) -> np.ndarray:
+        # Cells of both orders of the pairs whose upper pixel is on the rows start..stop - 1, or, for the
+        # pairs entering the window, on the rows `length` rows below them
+        codes = []
+        for o, length, (upper, lower) in active:
+            shift = length if entering else 0
+            a = upper[start + shift:stop + shift].astype(np.intp)
+            b = lower[start + shift:stop + shift].astype(np.intp)
+            codes += [a * levels + b + o * cells, b * levels + a + o * cells]
+        return np.concatenate(codes, axis=1)
+
+    # Counts of the first window
+    counts = np.zeros(len(offsets) * cells, dtype=np.int64)
+    for o, length, (upper, lower) in active:
+        a = upper[:length].astype(np.intp).ravel()
+        b = lower[:length].astype(np.intp).ravel()
+        counts += np.bincount(np.concatenate([a * levels + b, b * levels + a]) + o * cells, minlength=counts.size)
+
+    # A cell can hold at most every pair of its offset
+    xlogx = _xlogx_table(max(2 * length * upper.shape[1] for _, length, (upper, _) in active))
+    sum_squares[0] = (counts * counts).reshape(len(offsets), cells).sum(axis=1)
+    sum_xlogx[0] = xlogx[counts].reshape(len(offsets), cells).sum(axis=1)
+
+    n_codes = sum(2 * upper.shape[1] for _, _, (upper, _) in active)
+    changes = np.concatenate([np.full(n_codes, -1, dtype=np.int64), np.ones(n_codes, dtype=np.int64)])
+    positions = np.arange(2 * n_codes)
+    last_seen = np.zeros(counts.size, dtype=np.intp)
+
+    for chunk_start in range(0, n_windows - 1, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, n_windows - 1)
+        touched_rows = np.concatenate([
+            pair_codes(chunk_start, chunk_stop, entering=False),
+            pair_codes(chunk_start, chunk_stop, entering=True)
+        ], axis=1)
+
+        for k, touched in enumerate(touched_rows):
+            # Keep one position per touched cell: whichever write wins, only that position matches
+            last_seen[touched] = positions
+            cells_touched = touched[last_seen[touched] == positions]
+
+            before = counts[cells_touched]
+            np.add.at(counts, touched, changes)
+            after = counts[cells_touched]
+
+            offset_of_cell = cells_touched // cells
+            t = chunk_start + k + 1
+            sum_squares[t] = sum_squares[t - 1]
+            sum_xlogx[t] = sum_xlogx[t - 1]
+            np.add.at(sum_squares[t], offset_of_cell, after * after - before * before)
+            np.add.at(sum_xlogx[t], offset_of_cell, xlogx[after] - xlogx[before])
+
+    return sum_squares, sum_xlogx
+
+
+def glcm_properties(stats: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Computes the texture properties from the statistics of normalized symmetric co-occurrence matrices.
+
+    The formulas are the ones of skimage `graycoprops`, rewritten in terms of sums over the counts c of
+    the matrix: with N pairs, P = c / N. An empty matrix gives 0 for every property and 1 for the
+    correlation, as in skimage.
+
+    Args:
+        stats (Dict[str, np.ndarray]): Arrays of 'count', 'sum_i', 'sum_ii', 'sum_ij', 'contrast',
+            'dissimilarity', 'homogeneity', 'sum_squares' and 'sum_xlogx' (see `ENTROPY_SCALE`).
+
+    Returns:
+        Dict[str, np.ndarray]: One array per property of `TEXTURE_PROPERTIES`.
+    """
+    count = stats['count']
+    n = np.maximum(count, 1).astype(np.float64)
+
+    # Numerators of the variance and covariance of the levels, times N^2, computed on integers
+    variance = count * stats['sum_ii'] - stats['sum_i'] * stats['sum_i']
+    covariance = count * stats['sum_ij'] - stats['sum_i'] * stats['sum_i']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = np.where(variance > 0, covariance / variance, 1.0)
+
+    entropy = np.where(count > 0, np.log(n) - stats['sum_xlogx'] / ENTROPY_SCALE / n, 0.0)
+
+    return {
+        'contrast': stats['contrast'] / n,
+        'dissimilarity': stats['dissimilarity'] / n,
+        'homogeneity': stats['homogeneity'] / n,
+        'energy': np.sqrt(stats['sum_squares']) / n,
+        'correlation': correlation,
+        'entropy': entropy,
+    }
+
+
+def sliding_glcm_properties(
+    image: np.ndarray,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of the symmetric, normalized GLCM of every window of rows of an image.
+
+    The co-occurrence counts are updated incrementally as the window slides down the image instead of
+    being built again for each window.
+
+    Args:
+        image (np.ndarray): 2-D array of integer gray levels (depth x azimuth).
+        window_size (int): Number of rows of each window.
+        distances (Sequence[int]): Pixel pair distances.
+        angles (Sequence[float]): Pixel pair angles, in radians.
+        levels (int): Number of gray levels. Every value of the image must be below it.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per property of `TEXTURE_PROPERTIES`, of shape
+        (n_windows, len(distances), len(angles)). Window t covers the rows t..t + window_size - 1. An
+        image shorter than the window has no window.
+
+    Raises:
+        ValueError: If the image is not 2-D or has a value outside 0..levels - 1.
+    """
+    image = np.asarray(image)
+    if image.ndim != 2:
+        raise ValueError(f"Expected a 2-D image, but got {image.ndim} dimensions")
+    if image.size and (image.min() < 0 or image.max() >= levels):
+        raise ValueError(f"The gray levels of the image must be between 0 and {levels - 1}")
+
+    offsets = [_canonical_offset(offset) for offset in glcm_offsets(distances, angles)]
+    n_windows = image.shape[0] - window_size + 1
+    if n_windows <= 0:
+        return {prop: np.zeros((0, len(distances), len(angles))) for prop in TEXTURE_PROPERTIES}
+
+    stats = _pair_row_sums(image, offsets, window_size, n_windows)
+    stats['sum_squares'], stats['sum_xlogx'] = _sliding_count_moments(image, offsets, levels, window_size, n_windows)
+
+    shape = (n_windows, len(distances), len(angles))
+    return {prop: values.reshape(shape) for prop, values in glcm_properties(stats).items()}
+
+
+def sparse_glcm(
+    window: np.ndarray,
+    offsets: List[Tuple[int, int]],
+    levels: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds the symmetric co-occurrence counts of a window as a sorted list of its non-empty cells.
+
+    Each pixel pair (a, b) of an offset is encoded as the cell a * levels + b (and b * levels + a),
+    shifted by the offset index times levels^2, and the codes are counted with a single sort.
+
+    Args:
+        window (np.ndarray): 2-D array of integer gray levels.
+        offsets (List[Tuple[int, int]]): (row, column) offsets pointing down or right (see `glcm_offsets`).
+        levels (int): Number of gray levels.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The offset index, the cell code (i * levels + j) and the
+        count of every non-empty cell, sorted by offset and cell.
+    """
+    cells = levels * levels
+    codes = []
+
+    for o, offset in enumerate(offsets):
+        upper, lower = _pair_values(window, offset)
+        a = upper.astype(np.int64).ravel()
+        b = lower.astype(np.int64).ravel()
+        codes += [a * levels + b + o * cells, b * levels + a + o * cells]
+
+    codes, counts = np.unique(np.concatenate(codes), return_counts=True)
+    return codes // cells, codes % cells, counts
+
+
+def sparse_glcm_window_properties(
+    offset_index: np.ndarray,
+    codes: np.ndarray,
+    counts: np.ndarray,
+    n_offsets: int,
+    levels: int
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of the normalized GLCM of every offset from its non-empty cells only.
+
+    Returns:
+        Dict[str, np.ndarray]: One array of n_offsets values per property of `TEXTURE_PROPERTIES`.
+    """
+    i = (codes // levels).astype(np.float64)
+    j = (codes % levels).astype(np.float64)
+
+    def offset_sums(values: np.ndarray) -> np.ndarray:
+        return np.bincount(offset_index, weights=values, minlength=n_offsets)
+
+    n = offset_sums(counts.astype(np.float64))
+    p = counts / np.maximum(n, 1)[offset_index]
+
+    diff_i = i - offset_sums(p * i)[offset_index]
+    diff_j = j - offset_sums(p * j)[offset_index]
+    std_i = np.sqrt(offset_sums(p * diff_i ** 2))
+    std_j = np.sqrt(offset_sums(p * diff_j ** 2))
+    covariance = offset_sums(p * diff_i * diff_j)
+
+    constant = (std_i < 1e-15) | (std_j < 1e-15)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = np.where(constant, 1.0, covariance / (std_i * std_j))
+
+    return {
+        'contrast': offset_sums(p * (i - j) ** 2),
+        'dissimilarity': offset_sums(p * np.abs(i - j)),
+        'homogeneity': offset_sums(p / (1.0 + (i - j) ** 2)),
+        'energy': np.sqrt(offset_sums(p * p)),
+        'correlation': correlation,
+        'entropy': offset_sums(-p * np.log(p)),
+    }
+
+
+def sparse_glcm_properties(
+    image: np.ndarray,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of every window of rows from sparse co-occurrence counts.
+
+    Each window is processed on its own, like with `graycomatrix`, but only its non-empty cells (at most
+    two per pixel pair) are stored instead of a dense levels x levels matrix per distance and angle.
+
+    Returns:
+        Dict[str, np.ndarray]: Same output as `sliding_glcm_properties`.
+    """
+    image = np.asarray(image)
+    offsets = [_canonical_offset(offset) for offset in glcm_offsets(distances, angles)]
+    n_windows = max(image.shape[0] - window_size + 1, 0)
+
+    properties = {prop: np.zeros((n_windows, len(offsets))) for prop in TEXTURE_PROPERTIES}
+    for t in range(n_windows):
+        window_properties = sparse_glcm_window_properties(
+            *sparse_glcm(image[t:t + window_size], offsets, levels), len(offsets), levels
+        )
+        for prop, values in window_properties.items():
+            properties[prop][t] = values
+
+    shape = (n_windows, len(distances), len(angles))
+    return {prop: values.reshape(shape) for prop, values in properties.items()}
+
+
+def glcm_window_properties(
+    window: np.ndarray,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of the GLCM of one window with skimage, as done in cast_test_01.ipynb.
+
+    Returns:
+        Dict[str, np.ndarray]: One (len(distances), len(angles)) array per property of `TEXTURE_PROPERTIES`.
+    """
+    glcm = graycomatrix(window, distances=distances, angles=angles, levels=levels, symmetric=True, normed=True)
+    return {prop: graycoprops(glcm, prop=prop) for prop in TEXTURE_PROPERTIES}
+
+
+def skimage_glcm_properties(
+    image: np.ndarray,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of every window of rows with `graycomatrix`, building each GLCM from scratch.
+
+    Returns:
+        Dict[str, np.ndarray]: Same output as `sliding_glcm_properties`.
+    """
+    n_windows = max(image.shape[0] - window_size + 1, 0)
+    windows = [glcm_window_properties(image[t:t + window_size], distances, angles, levels) for t in range(n_windows)]
+
+    return {
+        prop: np.array([window[prop] for window in windows]).reshape(n_windows, len(distances), len(angles))
+        for prop in TEXTURE_PROPERTIES
+    }
+
+
+# Functions that compute the GLCM properties of every window of an image, by name of the method
+TEXTURE_METHODS = {
+    'incremental': sliding_glcm_properties,
+    'sparse': sparse_glcm_properties,
+    'skimage': skimage_glcm_properties,
+}
+
+
+def texture_tiles(n_windows: int, n_tiles: int) -> List[Tuple[int, int]]:
+    """
+    Splits the windows of an image in contiguous tiles of about the same size.
+
+    Returns:
+        List[Tuple[int, int]]: The first and last + 1 window of each tile, in depth order. The tile of the
+        windows start..stop - 1 reads the image rows start..stop + window_size - 2, so consecutive tiles
+        overlap by window_size - 1 rows, half a window on each side of the boundary.
+    """
+    bounds = np.linspace(0, n_windows, max(min(n_tiles, n_windows), 1) + 1).round().astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _texture_tile(
+    tile: Tuple[int, int],
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    window_size: int,
+    distances: Sequence[int],
+    angles: Sequence[float],
+    levels: int,
+    method: str
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of the windows of one tile, reading the image from shared memory.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        start, stop = tile
+        properties = TEXTURE_METHODS[method](image[start:stop + window_size - 1], window_size, distances, angles, levels)
+        del image
+    finally:
+        shm.close()
+
+    return properties
+
+
+def tiled_glcm_properties(
+    image: np.ndarray,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256,
+    method: str = 'incremental',
+    workers: int = 2,
+    n_tiles: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the properties of every window of rows in a process pool, one depth tile per task.
+
+    The image is copied once to shared memory, where the workers read their tile with its halo, and the
+    tiles are stitched back in depth order. Each window only depends on its own rows, so the output is
+    bit-identical to running the method on the whole image.
+
+    Args:
+        image (np.ndarray): 2-D array of integer gray levels (depth x azimuth).
+        window_size (int): Number of rows of each window.
+        distances (Sequence[int]): Pixel pair distances.
+        angles (Sequence[float]): Pixel pair angles, in radians.
+        levels (int): Number of gray levels.
+        method (str): Name of the method of `TEXTURE_METHODS`.
+        workers (int): Number of worker processes.
+        n_tiles (Optional[int]): Number of tiles. None uses 4 per worker, to balance the load.
+
+    Returns:
+        Dict[str, np.ndarray]: Same output as the method.
+    """
+    image = np.ascontiguousarray(image)
+    n_windows = max(image.shape[0] - window_size + 1, 0)
+    tiles = texture_tiles(n_windows, n_tiles or 4 * workers)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+    try:
+        np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[:] = image
+
+        compute_tile = partial(
+            _texture_tile, shm_name=shm.name, shape=image.shape, dtype=image.dtype.str, window_size=window_size,
+            distances=list(distances), angles=list(angles), levels=levels, method=method
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(compute_tile, tiles))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return {prop: np.concatenate([result[prop] for result in results]) for prop in TEXTURE_PROPERTIES}
+
+
+def extract_textures(
+    image: np.ndarray,
+    depth: Optional[Sequence[float]] = None,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256,
+    method: str = 'incremental',
+    depth_column: str = 'Depth',
+    workers: int = 1
+) -> pd.DataFrame:
+    """
+    Extracts GLCM texture features from an image log with a sliding window of rows.
+
+    For each row where the window fits, the GLCM of the window_size rows centered on it is computed for
+    every distance and angle, and the mean and standard deviation of each property over the distances
+    and angles are kept, as in cast_test_01.ipynb.
+
+    Args:
+        image (np.ndarray): 2-D array of integer gray levels (depth x azimuth), see `normalize_gray_levels`.
+        depth (Optional[Sequence[float]]): Depth of each row. None uses the row numbers.
+        window_size (int): Number of rows of each window.
+        distances (Sequence[int]): Pixel pair distances.
+        angles (Sequence[float]): Pixel pair angles, in radians.
+        levels (int): Number of gray levels.
+        method (str): 'incremental' to slide the co-occurrence counts down the image, 'sparse' to count
+            the non-empty cells of each window (see `sparse_glcm`), or 'skimage' to build the dense GLCM of
+            each window with `graycomatrix`.
+        depth_column (str): Name of the depth column of the output.
+        workers (int): Number of worker processes. With more than one, the image is split in depth tiles
+            (see `tiled_glcm_properties`); the output is the same as with one.
+
+    Returns:
+        pd.DataFrame: One row per window center with the depth and the columns '{prop}_mean' and
+        '{prop}_std' of each property.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in TEXTURE_METHODS:
+        raise ValueError(f"Unknown texture method '{method}', expected one of {sorted(TEXTURE_METHODS)}")
+
+    image = np.asarray(image)
+    depth = np.arange(image.shape[0]) if depth is None else np.asarray(depth)
+    half_win = window_size // 2
+    n_windows = max(image.shape[0] - window_size + 1, 0)
+
+    if workers > 1:
+        properties = tiled_glcm_properties(image, window_size, distances, angles, levels, method, workers)
+    else:
+        properties = TEXTURE_METHODS[method](image, window_size, distances, angles, levels)
+
+    features = {depth_column: depth[half_win:half_win + n_windows]}
+    for prop in TEXTURE_PROPERTIES:
+        values = properties[prop].reshape(n_windows, len(distances) * len(angles))
+        features[prop + '_mean'] = values.mean(axis=1)
+        features[prop + '_std'] = values.std(axis=1)
+
+    return pd.DataFrame(features)
+
+
+def iter_store_textures(
+    store: ImageLogStore,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256,
+    method: str = 'incremental',
+    depth_column: str = 'Depth',
+    value_range: Optional[Tuple[float, float]] = None,
+    block_windows: int = 4096,
+    quantization: str = 'min_max',
+    clip_percentiles: Optional[Tuple[float, float]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Extracts the texture features of an image log store, reading and normalizing one block of rows at a time.
+
+    Each block holds the rows of `block_windows` windows, so the memory used depends on the block size and
+    not on the length of the image.
+
+    Args:
+        store (ImageLogStore): The image log store.
+        window_size (int): Number of rows of each window.
+        distances (Sequence[int]): Pixel pair distances.
+        angles (Sequence[float]): Pixel pair angles, in radians.
+        levels (int): Number of gray levels.
+        method (str): Name of the method of `TEXTURE_METHODS`.
+        depth_column (str): Name of the depth column of the output.
+        value_range (Optional[Tuple[float, float]]): Amplitude range mapped to the gray levels. None scans
+            the store for its minimum and maximum (or its `clip_percentiles`). Amplitudes outside the
+            range go to the first or last level.
+        block_windows (int): Number of windows computed per block.
+        quantization (str): Mapping of the amplitudes to gray levels, among `QUANTIZATION_METHODS`. It is
+            computed once for the whole store (see `store_gray_level_mapping`), so every block uses the
+            same one.
+        clip_percentiles (Optional[Tuple[float, float]]): Percentiles of the amplitudes used as the range
+            when no `value_range` is given.
+
+    Yields:
+        pd.DataFrame: The features of each block of windows, in depth order.
+    """
+    mapping = store_gray_level_mapping(store, levels, quantization, clip_percentiles, value_range)
+    n_windows = max(len(store) - window_size + 1, 0)
+
+    for start, stop in texture_tiles(n_windows, -(-n_windows // block_windows)):
+        image = apply_gray_level_mapping(store.rows(start, stop + window_size - 1), mapping)
+        depth = store.depth[start:stop + window_size - 1]
+        yield extract_textures(image, depth, window_size, distances, angles, levels, method, depth_column)
+
+
+def extract_store_textures(
+    store: ImageLogStore,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256,
+    method: str = 'incremental',
+    depth_column: str = 'Depth',
+    value_range: Optional[Tuple[float, float]] = None,
+    block_windows: int = 4096,
+    quantization: str = 'min_max',
+    clip_percentiles: Optional[Tuple[float, float]] = None
+) -> pd.DataFrame:
+    """
+    Extracts the texture features of an image log store with `iter_store_textures`.
+
+    With the default 'min_max' quantization, the output is the same as `extract_textures` on the whole
+    image normalized with `normalize_gray_levels`.
+
+    Returns:
+        pd.DataFrame: Same output as `extract_textures`.
+    """
+    return pd.concat(list(iter_store_textures(store, window_size, distances, angles, levels, method, depth_column,
+                                              value_range, block_windows, quantization, clip_percentiles)),
+                     ignore_index=True)
+
+
+def bin_store_textures(
+    store: ImageLogStore,
+    step: float = 0.01,
+    window_size: int = 11,
+    distances: Sequence[int] = DEFAULT_DISTANCES,
+    angles: Sequence[float] = DEFAULT_ANGLES,
+    levels: int = 256,
+    method: str = 'incremental',
+    value_range: Optional[Tuple[float, float]] = None,
+    statistics: Sequence[str] = BIN_STATISTICS,
+    bin_column: str = 'TDEP',
+    block_windows: int = 4096,
+    quantization: str = 'min_max',
+    clip_percentiles: Optional[Tuple[float, float]] = None
+) -> pd.DataFrame:
+    """
+    Extracts the texture features of an image log store and aggregates them into depth bins of the log
+    resolution, as in resolution_preprocess_02.ipynb, without keeping the features of every window.
+
+    Each block of features is reduced by a `DepthBinAggregator` as soon as it is computed, so only the
+    bins are kept in memory.
+
+    Args:
+        step (float): Width of the depth bins, e.g. 0.01 m for the resolution of the logs.
+        statistics (Sequence[str]): Statistics of each bin, among `BIN_STATISTICS`.
+        bin_column (str): Name of the bin depth column of the output.
+        quantization (str): Mapping of the amplitudes to gray levels, see `iter_store_textures`.
+
+    Returns:
+        pd.DataFrame: One row per depth bin, with the columns '{feature}_{statistic}' of each feature of
+        `extract_textures`.
+    """
+    columns = [f"{prop}_{stat}" for prop in TEXTURE_PROPERTIES for stat in ('mean', 'std')]
+    features = iter_store_textures(store, window_size, distances, angles, levels, method, 'Depth', value_range,
+                                   block_windows, quantization, clip_percentiles)
+
+    bins = list(bin_depth_stream(features, columns, step, 'Depth', bin_column, statistics))
+    if not bins:
+        return DepthBinAggregator(columns, step, 'Depth', bin_column, statistics).flush()
+
+    return pd.concat(bins, ignore_index=True)
@@ -0,0 +1,381 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from utils.depth_binning import BIN_STATISTICS, bin_by_depth, depth_bin_keys
+from utils.image_store import ImageLogStore
+from utils.stage_cache import hash_params
+from utils.storage import load_frame, save_frame
+from utils.texture import (
+    DEFAULT_ANGLES, DEFAULT_DISTANCES, TEXTURE_PROPERTIES, apply_gray_level_mapping, extract_textures,
+    store_gray_level_mapping, texture_tiles
+)
+
+FEATURES_FILE = 'features.parquet'
+BINS_FILE = 'bins.parquet'
+PROVENANCE_FILE = 'provenance.json'
+
+# Parameters that follow the amplitudes of the image: a set that differs from the current one only by them
+# was computed from an older version of the image, see `TextureFeatureStore.prune`
+AMPLITUDE_PARAMS = ['value_range', 'edges']
+
+
+def block_hashes(store: ImageLogStore, block_rows: int = 4096) -> List[str]:
+    """
+    Hashes the rows and depths of an image log store in blocks, reading one block at a time.
+
+    Returns:
+        List[str]: Hex digest of each block of `block_rows` rows.
+    """
+    hashes = []
+    for _, depth, rows in store.iter_blocks(block_rows):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(depth).tobytes())
+        digest.update(np.ascontiguousarray(rows).tobytes())
+        hashes.append(digest.hexdigest())
+
+    return hashes
+
+
+def changed_window_ranges(
+    old_hashes: List[str],
+    new_hashes: List[str],
+    block_rows: int,
+    n_rows: int,
+    window_size: int
+) -> List[Tuple[int, int]]:
+    """
+    Finds the windows whose rows changed between two versions of an image, from the hashes of their blocks.
+
+    Blocks that are new, or whose hash changed, invalidate every window that has a row in them.
+
+    Returns:
+        List[Tuple[int, int]]: Sorted, non-overlapping ranges (first window, last window + 1) to compute.
+    """
+    n_windows = max(n_rows - window_size + 1, 0)
+    ranges = []
+
+    for block, block_hash in enumerate(new_hashes):
+        if block < len(old_hashes) and old_hashes[block] == block_hash:
+            continue
+
+        start = max(block * block_rows - window_size + 1, 0)
+        stop = min((block + 1) * block_rows, n_windows)
+        if start >= stop:
+            continue
+
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], stop))
+        else:
+            ranges.append((start, stop))
+
+    return ranges
+
+
+def _update_bins(
+    old_bins: Optional[pd.DataFrame],
+    features: pd.DataFrame,
+    changed_depths: np.ndarray,
+    binning: Dict[str, object],
+    depth_column: str
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Brings the depth bins of the features up to date, aggregating again only the bins of the changed depths.
+
+    Args:
+        old_bins (Optional[pd.DataFrame]): The stored bins, or None to aggregate every bin.
+        features (pd.DataFrame): All the features, in depth order.
+        changed_depths (np.ndarray): Depths of the windows computed again or removed, old and new.
+        binning (Dict[str, object]): The 'step', 'statistics' and 'bin_column' of the bins.
+        depth_column (str): Name of the depth column of the features.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: The bins, in the depth order of the features, and the number aggregated again.
+    """
+    step, statistics, bin_column = binning['step'], binning['statistics'], binning['bin_column']
+    columns = [column for column in features.columns if column != depth_column]
+
+    depth = features[depth_column].to_numpy(dtype=np.float64)
+    finite = np.isfinite(depth)
+    keys = np.full(len(depth), np.iinfo(np.int64).min)
+    keys[finite] = depth_bin_keys(depth[finite], step)
+
+    if old_bins is None:
+        rows = finite
+    else:
+        changed_depths = np.asarray(changed_depths, dtype=np.float64)
+        changed = np.unique(depth_bin_keys(changed_depths[np.isfinite(changed_depths)], step))
+        rows = finite & np.isin(keys, changed)
+        old_keys = depth_bin_keys(old_bins[bin_column].to_numpy(dtype=np.float64), step)
+        old_bins = old_bins[~np.isin(old_keys, changed)]
+
+    # Every row of a changed bin is aggregated, so each bin is complete
+    new_bins = bin_by_depth(features[rows], columns, step, depth_column, bin_column, statistics)
+    if old_bins is None or old_bins.empty:
+        return new_bins, len(new_bins)
+
+    bins = pd.concat([old_bins, new_bins], ignore_index=True)
+    descending = len(depth) > 1 and depth[finite][0] > depth[finite][-1]
+    bins = bins.sort_values(bin_column, ascending=not descending, kind='stable', ignore_index=True)
+    return bins, len(new_bins)
+
+
+class TextureFeatureStore:
+    """
+    Persistent texture features of image log stores, updated only where the image changed.
+
+    The features of each set of parameters (window size, gray levels, distances, angles, amplitude
+    range and quantization) are kept in their own directory, with a provenance file that records the parameters, the
+    image they were computed from and the hash of each block of its rows. Updating the features after
+    the image is appended to or partly rewritten computes only the windows that touch new or changed
+    blocks and merges them with the stored ones.
+
+    The features can also be kept aggregated into depth bins, as in resolution_preprocess_02.ipynb,
+    next to the features: only the bins with a computed or removed window are aggregated again. The
+    parameter sets left behind when the amplitude range of an image changes are removed (see `prune`).
+
+    Args:
+        path (str): Directory of the feature store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _directory(self, params: Dict[str, object]) -> str:
+        return os.path.join(self.path, hash_params(params))
+
+    def load(self, params: Dict[str, object]) -> Optional[pd.DataFrame]:
+        """
+        Loads the stored features computed with a set of parameters.
+
+        Returns:
+            Optional[pd.DataFrame]: The features, or None when none were computed with these parameters.
+        """
+        features_path = os.path.join(self._directory(params), FEATURES_FILE)
+        return load_frame(features_path) if os.path.exists(features_path) else None
+
+    def load_bins(self, params: Dict[str, object]) -> Optional[pd.DataFrame]:
+        """
+        Loads the stored depth bins of the features computed with a set of parameters, or None.
+        """
+        bins_path = os.path.join(self._directory(params), BINS_FILE)
+        return load_frame(bins_path) if os.path.exists(bins_path) else None
+
+    def provenance(self, params: Dict[str, object]) -> Optional[Dict[str, object]]:
+        """
+        Loads the provenance of the features computed with a set of parameters, or None.
+        """
+        provenance_path = os.path.join(self._directory(params), PROVENANCE_FILE)
+        if not os.path.exists(provenance_path):
+            return None
+
+        with open(provenance_path) as f:
+            return json.load(f)
+
+    def update(
+        self,
+        image: ImageLogStore,
+        window_size: int = 11,
+        distances: Sequence[int] = DEFAULT_DISTANCES,
+        angles: Sequence[float] = DEFAULT_ANGLES,
+        levels: int = 256,
+        value_range: Optional[Tuple[float, float]] = None,
+        method: str = 'incremental',
+        depth_column: str = 'Depth',
+        block_rows: int = 4096,
+        quantization: str = 'min_max',
+        clip_percentiles: Optional[Tuple[float, float]] = None,
+        bin_step: Optional[float] = None,
+        statistics: Sequence[str] = BIN_STATISTICS,
+        bin_column: str = 'TDEP',
+        prune: bool = True
+    ) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        """
+        Brings the features of an image up to date, computing only the missing or changed windows.
+
+        Args:
+            image (ImageLogStore): The image log store.
+            window_size (int): Number of rows of each window.
+            distances (Sequence[int]): Pixel pair distances.
+            angles (Sequence[float]): Pixel pair angles, in radians.
+            levels (int): Number of gray levels.
+            value_range (Optional[Tuple[float, float]]): Amplitude range mapped to the gray levels. None
+                uses the range of the image, so an append that widens it recomputes every window; pass
+                a fixed range to append cheaply. Amplitudes outside a fixed range are clipped to the first
+                or last level: the computed samples that were clipped are counted in the report, with a
+                warning, and the range must be widened (which recomputes every window) to keep them.
+            method (str): Name of the method of `TEXTURE_METHODS`. It does not change the features, so it
+                is not part of the provenance.
+            depth_column (str): Name of the depth column of the features.
+            block_rows (int): Number of rows per hashed block.
+            quantization (str): Mapping of the amplitudes to gray levels, among `QUANTIZATION_METHODS`.
+                The edges of 'equal_frequency' come from the whole image and are part of the provenance,
+                so an append that moves them recomputes every window.
+            clip_percentiles (Optional[Tuple[float, float]]): Percentiles of the amplitudes used as the
+                range when no `value_range` is given.
+            bin_step (Optional[float]): Width of the depth bins kept with the features (see `load_bins`),
+                e.g. 0.01 m. None keeps no bins. Bins of another step, statistics or column are aggregated
+                again from the features, without computing any window.
+            statistics (Sequence[str]): Statistics of each bin, among `BIN_STATISTICS`.
+            bin_column (str): Name of the bin depth column.
+            prune (bool): Whether to remove the parameter sets superseded by this one, see `prune`.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, int]]: All the features of the image, in depth order, and the
+            number of windows computed and reused, of samples of the computed rows 'clipped' to the
+            amplitude range, of 'bins' and of bins aggregated again ('binned'), and of parameter sets
+            'pruned'.
+        """
+        mapping = store_gray_level_mapping(image, levels, quantization, clip_percentiles, value_range,
+                                           block_rows=block_rows)
+        params = {
+            'window_size': window_size,
+            'distances': list(distances),
+            'angles': [float(angle) for angle in angles],
+            'levels': levels,
+            'value_range': mapping['value_range'],
+            'depth_column': depth_column,
+        }
+        # Left out for 'min_max', so the stores computed before the quantization was a parameter stay valid
+        if quantization != 'min_max':
+            params.update(quantization=quantization, edges=mapping['edges'])
+
+        # Stored features are reused only if they come from the same image, hashed with the same blocks
+        provenance = self.provenance(params)
+        old_features = self.load(params)
+        if (provenance is None or old_features is None or provenance['source'] != os.path.abspath(image.path)
+                or provenance['block_rows'] != block_rows):
+            provenance = None
+
+        old_hashes = provenance['block_hashes'] if provenance is not None else []
+        new_hashes = block_hashes(image, block_rows)
+        ranges = changed_window_ranges(old_hashes, new_hashes, block_rows, len(image), window_size)
+
+        n_windows = max(len(image) - window_size + 1, 0)
+        computed, clipped = [], 0
+        for start, stop in ranges:
+            range_features, range_clipped = self._compute(image, start, stop, params, method)
+            computed.append(range_features)
+            clipped += range_clipped
+
+        if clipped and value_range is not None:
+            print(f"Warning: {clipped} samples of {image.path} are outside the value range {params['value_range']} "
+                  f"and were clipped to the first or last gray level.")
+
+        # Windows outside the changed ranges keep their stored features
+        keep = np.ones(n_windows, dtype=bool)
+        for start, stop in ranges:
+            keep[start:stop] = False
+        kept = np.flatnonzero(keep)
+
+        parts = [(start, features) for (start, _), features in zip(ranges, computed)]
+        if len(kept):
+            parts += [(int(run[0]), old_features.iloc[run].reset_index(drop=True))
+                      for run in np.split(kept, np.flatnonzero(np.diff(kept) > 1) + 1)]
+
+        if parts:
+            features = pd.concat([part for _, part in sorted(parts, key=lambda part: part[0])], ignore_index=True)
+        else:
+            columns = [depth_column] + [f"{prop}_{stat}" for prop in TEXTURE_PROPERTIES for stat in ('mean', 'std')]
+            features = pd.DataFrame(columns=columns, dtype=np.float64)
+
+        directory = self._directory(params)
+        save_frame(features, os.path.join(directory, FEATURES_FILE), 'parquet')
+
+        binning, n_bins, n_binned = None, 0, 0
+        if bin_step is not None:
+            binning = {'step': bin_step, 'statistics': list(statistics), 'bin_column': bin_column}
+            old_bins = self.load_bins(params) if provenance is not None and provenance.get('binning') == binning else None
+
+            # The bins of the windows computed again, before and after, and of the stored windows past the
+            # end of the image
+            changed_depths = [features[depth_column].to_numpy(dtype=np.float64)[~keep]]
+            if old_bins is not None:
+                old_depth = old_features[depth_column].to_numpy(dtype=np.float64)
+                changed_depths += [old_depth[:n_windows][~keep[:len(old_depth)]], old_depth[n_windows:]]
+
+            bins, n_binned = _update_bins(old_bins, features, np.concatenate(changed_depths), binning, depth_column)
+            save_frame(bins, os.path.join(directory, BINS_FILE), 'parquet')
+            n_bins = len(bins)
+        elif os.path.exists(os.path.join(directory, BINS_FILE)):
+            # Bins that are no longer updated would not match the features
+            os.remove(os.path.join(directory, BINS_FILE))
+
+        with open(os.path.join(directory, PROVENANCE_FILE), 'w') as f:
+            json.dump(dict(params, source=os.path.abspath(image.path), n_rows=len(image), block_rows=block_rows,
+                           block_hashes=new_hashes, binning=binning), f, indent=2)
+
+        pruned = self.prune(params) if prune else []
+
+        n_computed = sum(stop - start for start, stop in ranges)
+        return features, {'windows': n_windows, 'computed': n_computed, 'reused': n_windows - n_computed,
+                          'clipped': clipped, 'bins': n_bins, 'binned': n_binned, 'pruned': len(pruned)}
+
+    def prune(self, params: Dict[str, object]) -> List[str]:
+        """
+        Removes the parameter sets superseded by a set of parameters: those computed from the same image
+        with the same parameters but for the ones that follow its amplitudes (`AMPLITUDE_PARAMS`), as left
+        behind when an update changes the amplitude range.
+
+        Returns:
+            List[str]: The directories removed.
+        """
+        current = self.provenance(params)
+        if current is None:
+            return []
+
+        # The quantization is left out of the parameters of 'min_max', so it is compared even when absent
+        names = (set(params) | {'quantization'}) - set(AMPLITUDE_PARAMS) | {'source'}
+
+        def identity(provenance):
+            return {name: provenance.get(name) for name in names}
+
+        keep = self._directory(params)
+        removed = []
+        for name in sorted(os.listdir(self.path)):
+            directory = os.path.join(self.path, name)
+            provenance_path = os.path.join(directory, PROVENANCE_FILE)
+            if directory == keep or not os.path.exists(provenance_path):
+                continue
+
+            with open(provenance_path) as f:
+                provenance = json.load(f)
+            if identity(provenance) == identity(current):
+                shutil.rmtree(directory)
+                removed.append(directory)
+
+        return removed
+
+    @staticmethod
+    def _compute(
+        image: ImageLogStore,
+        start: int,
+        stop: int,
+        params: Dict[str, object],
+        method: str,
+        block_windows: int = 4096
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Computes the features of the windows start..stop - 1, one block of windows at a time, and counts
+        the samples of their rows outside the amplitude range.
+        """
+        window_size = params['window_size']
+        mapping = {'quantization': params.get('quantization', 'min_max'), 'levels': params['levels'],
+                   'value_range': params['value_range'], 'edges': params.get('edges')}
+        low, high = params['value_range']
+        textures, clipped = [], 0
+
+        for tile_start, tile_stop in texture_tiles(stop - start, -(-(stop - start) // block_windows)):
+            first, last = start + tile_start, start + tile_stop + window_size - 1
+            rows = image.rows(first, last)
+            gray = apply_gray_level_mapping(rows, mapping)
+            # The rows shared with the next block are counted with it
+            counted = rows if tile_stop == stop - start else rows[:tile_stop - tile_start]
+            clipped += int(np.count_nonzero((counted < low) | (counted > high)))
+            textures.append(extract_textures(gray, image.depth[first:last], window_size, params['distances'],
+                                             params['angles'], params['levels'], method, params['depth_column']))
+
+        return pd.concat(textures, ignore_index=True), clipped
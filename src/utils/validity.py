@@ -0,0 +1,274 @@
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+class ValidityMask:
+    """
+    Per-curve validity bitmasks of a frame: one packed bit per row and curve, set where the curve is
+    not NaN and the depth is finite.
+
+    The masks are built once, when the frame is loaded, and are then combined with bitwise operations
+    on the packed bytes (8 rows at a time), so subsetting a frame by curve and dropping its NaN rows
+    needs no temporary copy of the frame. The mask describes the frame at the time it was built: a
+    frame changed in place afterwards (e.g. by `remove_nan_values`) needs a new one, which `matches`
+    detects.
+
+    Args:
+        columns (List[str]): The curves, in the order of the rows of `bits`.
+        bits (np.ndarray): Packed validity of each curve (np.packbits of a boolean array per curve),
+            already combined with the validity of the depth.
+        depth_bits (np.ndarray): Packed validity of the depth.
+        n_rows (int): Number of rows of the frame.
+        sources (Optional[Dict[str, pd.Series]]): The columns of the frame the mask was built from,
+            see `matches`. None only checks the rows and columns of the frame.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        bits: np.ndarray,
+        depth_bits: np.ndarray,
+        n_rows: int,
+        sources: Optional[Dict[str, pd.Series]] = None
+    ):
+        self.columns = list(columns)
+        self.bits = bits
+        self.depth_bits = depth_bits
+        self.n_rows = n_rows
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        # Keeping the columns makes copy-on-write copy them before any change in place, so a changed
+        # column no longer has the data of its fingerprint
+        self._sources = sources
+        self._fingerprints = {column: _fingerprint(source) for column, source in sources.items()} \
+            if sources is not None else None
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        curves: Optional[List[str]] = None,
+        depth_column: str = 'TDEP'
+    ) -> 'ValidityMask':
+        """
+        Builds the masks of a frame in one pass over its columns.
+
+        Args:
+            df (pd.DataFrame): The frame.
+            curves (Optional[List[str]]): Curves to mask. Curves missing from the frame are left out.
+                None masks every numeric column but the depth.
+            depth_column (str): Name of the depth column. Rows without a finite depth are invalid in
+                every curve; a frame without the depth column only checks its curves.
+
+        Returns:
+            ValidityMask: The masks.
+        """
+        if curves is None:
+            curves = [col for col in df.columns if col != depth_column and pd.api.types.is_numeric_dtype(df[col])]
+        else:
+            curves = [curve for curve in curves if curve in df.columns and curve != depth_column]
+
+        sources = {}
+        if depth_column in df.columns:
+            sources[depth_column] = df[depth_column]
+            depth_valid = np.isfinite(sources[depth_column].to_numpy(dtype=np.float64))
+        else:
+            depth_valid = np.ones(len(df), dtype=bool)
+        depth_bits = np.packbits(depth_valid)
+
+        bits = np.empty((len(curves), len(depth_bits)), dtype=np.uint8)
+        for i, curve in enumerate(curves):
+            column = sources[curve] = df[curve]
+            if pd.api.types.is_float_dtype(column.dtype) and isinstance(column.dtype, np.dtype):
+                valid = ~np.isnan(column.to_numpy())
+            else:
+                # notna is the NaN check of dropna, also for the non-float and nullable columns
+                valid = column.notna().to_numpy()
+            bits[i] = np.packbits(valid) & depth_bits
+
+        return cls(curves, bits, depth_bits, len(df), sources)
+
+    def __contains__(self, curve: str) -> bool:
+        return curve in self._positions
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __repr__(self) -> str:
+        return f"ValidityMask(rows={self.n_rows}, curves={self.columns})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes + self.depth_bits.nbytes
+
+    def valid(self, curves: Optional[List[str]] = None, how: str = 'all') -> np.ndarray:
+        """
+        Gets the rows where the curves are valid.
+
+        Args:
+            curves (Optional[List[str]]): Curves to check. Curves not in the mask are ignored, and with no
+                curve left only the depth is checked. None checks every curve of the mask.
+            how (str): 'all' keeps the rows where every curve is valid (as `dropna` on the curves), 'any'
+                the rows where at least one is.
+
+        Returns:
+            np.ndarray: Boolean array with one value per row of the frame.
+
+        Raises:
+            ValueError: If `how` is unknown.
+        """
+        if how not in ('all', 'any'):
+            raise ValueError(f"Expected 'all' or 'any', but got '{how}'")
+
+        positions = [self._positions[curve] for curve in (self.columns if curves is None else curves)
+                     if curve in self._positions]
+        if not positions:
+            packed = self.depth_bits
+        elif how == 'all':
+            packed = np.bitwise_and.reduce(self.bits[positions], axis=0)
+        else:
+            packed = np.bitwise_or.reduce(self.bits[positions], axis=0)
+
+        return np.unpackbits(packed, count=self.n_rows).view(bool)
+
+    def counts(self) -> pd.Series:
+        """
+        Gets the number of valid rows of each curve.
+        """
+        counts = np.unpackbits(self.bits, axis=1, count=self.n_rows).sum(axis=1) if len(self.columns) else []
+        return pd.Series(counts, index=self.columns, dtype=np.int64)
+
+    def matches(self, df: pd.DataFrame, curves: Optional[List[str]] = None) -> bool:
+        """
+        Checks whether the mask can still describe a frame: same number of rows, every masked curve present
+        and, for a mask built by `from_frame`, the same data in the depth and the curves. A column replaced
+        or changed in place since the mask was built has other data, found by comparing the address (or
+        the array object) of the column, without reading its values.
+
+        Args:
+            df (pd.DataFrame): The frame.
+            curves (Optional[List[str]]): Curves whose data is checked, besides the depth. None checks
+                every masked curve.
+        """
+        if len(df) != self.n_rows or any(curve not in df.columns for curve in self.columns):
+            return False
+        if self._fingerprints is None:
+            return True
+
+        checked = [column for column in self._fingerprints if column not in self._positions]
+        checked += [curve for curve in (self.columns if curves is None else curves) if curve in self._fingerprints]
+        return all(column in df.columns and _fingerprint(df[column]) == self._fingerprints[column]
+                   for column in checked)
+
+
+def _fingerprint(column: pd.Series) -> int:
+    """
+    Identifies the data of a column: the address of the values of a NumPy column, the array object of an
+    extension column.
+    """
+    if isinstance(column.dtype, np.dtype):
+        return column.to_numpy().__array_interface__['data'][0]
+    return id(column.array)
+
+
+def valid_subset(
+    df: pd.DataFrame,
+    curves: List[str],
+    mask: Optional[ValidityMask] = None,
+    how: str = 'all',
+    depth_column: str = 'TDEP'
+) -> pd.DataFrame:
+    """
+    Subsets a frame to its depth and curves and drops the rows where the curves are not valid, as
+    `create_df_subset` followed by `remove_nan_values`, with a single gather of the kept columns.
+
+    When every row is valid, the subset is a column selection, which copy-on-write does not copy.
+
+    Args:
+        df (pd.DataFrame): The frame.
+        curves (List[str]): Curves to keep. Curves missing from the frame are left out.
+        mask (Optional[ValidityMask]): Masks of the frame. None (or a mask that no longer matches the
+            frame) builds them for the curves.
+        how (str): 'all' or 'any', see `ValidityMask.valid`.
+        depth_column (str): Name of the depth column, always kept.
+
+    Returns:
+        pd.DataFrame: The subset, with a default index.
+    """
+    columns = [depth_column] + [curve for curve in curves if curve in df.columns and curve != depth_column]
+    if mask is None or any(curve not in mask for curve in columns[1:]) or not mask.matches(df, columns[1:]):
+        mask = ValidityMask.from_frame(df, columns[1:], depth_column)
+
+    valid = mask.valid(columns[1:], how)
+    if valid.all():
+        return df[columns].reset_index(drop=True)
+
+    return df[columns].take(np.flatnonzero(valid)).reset_index(drop=True)
+
+
+def valid_frames(
+    well_df_dict: Dict[str, Dict[str, Dict[str, pd.DataFrame]]],
+    curves: List[str],
+    masks: Optional[Dict[str, Dict[str, Dict[str, ValidityMask]]]] = None,
+    how: str = 'all',
+    depth_column: str = 'TDEP'
+) -> Dict[str, Dict[str, Dict[str, pd.DataFrame]]]:
+    """
+    Applies `valid_subset` to every frame of a well/logical_file/frame dictionary (or `FrameCatalog`),
+    leaving the frames unchanged.
+
+    Args:
+        well_df_dict (Dict[str, Dict[str, Dict[str, pd.DataFrame]]]): The frames.
+        curves (List[str]): Curves to keep.
+        masks (Optional[Dict[str, Dict[str, Dict[str, ValidityMask]]]]): Masks of the frames, with the
+            same structure, e.g. from `frame_masks`. Frames without one get it built.
+        how (str): 'all' or 'any', see `ValidityMask.valid`.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, pd.DataFrame]]]: The subsets, with the same structure.
+    """
+    masks = masks or {}
+    subsets = {}
+
+    for well, w_dict in well_df_dict.items():
+        subsets[well] = {}
+        for logical_file, lf_dict in w_dict.items():
+            subsets[well][logical_file] = {}
+            for frame, df in lf_dict.items():
+                mask = masks.get(well, {}).get(logical_file, {}).get(frame)
+                try:
+                    subsets[well][logical_file][frame] = valid_subset(df, curves, mask, how, depth_column)
+                except Exception as e:
+                    print(f"Exception with well={well}, logical_file={logical_file}, frame={frame}: {e}")
+
+    return subsets
+
+
+def frame_masks(
+    well_df_dict: Dict[str, Dict[str, Dict[str, pd.DataFrame]]],
+    curves: Optional[List[str]] = None,
+    depth_column: str = 'TDEP'
+) -> Dict[str, Dict[str, Dict[str, ValidityMask]]]:
+    """
+    Builds the masks of every frame of a well/logical_file/frame dictionary once, to be reused by each
+    curve request.
+
+    Args:
+        well_df_dict (Dict[str, Dict[str, Dict[str, pd.DataFrame]]]): The frames.
+        curves (Optional[List[str]]): Curves to mask, see `ValidityMask.from_frame`.
+        depth_column (str): Name of the depth column.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, ValidityMask]]]: The masks, with the same structure.
+    """
+    return {
+        well: {
+            logical_file: {
+                frame: ValidityMask.from_frame(df, curves, depth_column)
+                for frame, df in lf_dict.items()
+            }
+            for logical_file, lf_dict in w_dict.items()
+        }
+        for well, w_dict in well_df_dict.items()
+    }
@@ -0,0 +1,111 @@
+from functools import partial
+from typing import Dict, List, Optional
+import glob
+import os
+import pandas as pd
+from utils.depth_keys import merge_sorted_frames
+from utils.dlis_ingestion import map_isolated
+from utils.storage import load_frame
+
+
+def spliced_curve_path(base_path: str, curve: str, well: str) -> str:
+    """
+    Builds the path of the spliced log of a curve, as written by splice_logs.py: {base_path}/{curve}/{well}.csv.
+    """
+    return os.path.join(base_path, curve, f"{well}.csv")
+
+
+def find_spliced_wells(base_path: str, curves: List[str], require_all: bool = True) -> List[str]:
+    """
+    Finds the wells with a spliced log of the curves.
+
+    Args:
+        base_path (str): Directory of the spliced logs, with one subdirectory per curve.
+        curves (List[str]): Curves to look for.
+        require_all (bool): Keep only the wells with every curve. When False, wells with any of them are kept.
+
+    Returns:
+        List[str]: Sorted well names.
+    """
+    wells_per_curve = [
+        {os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(base_path, curve, '*.csv'))}
+        for curve in curves
+    ]
+    if not wells_per_curve:
+        return []
+
+    wells = set.intersection(*wells_per_curve) if require_all else set.union(*wells_per_curve)
+    return sorted(wells)
+
+
+def unify_well(
+    well: str,
+    curves: List[str],
+    base_path: str = os.path.join('..', 'data', 'dlis_spliced'),
+    how: str = 'inner',
+    tolerance: Optional[float] = None
+) -> pd.DataFrame:
+    """
+    Joins the spliced logs of several curves of a well into one frame, as the chained merges of
+    unifies_dfs.ipynb, with a single N-way merge on the integer depth keys.
+
+    Args:
+        well (str): Name of the well.
+        curves (List[str]): Curves to join, e.g. ['GR', 'DT', 'RHOB'].
+        base_path (str): Directory of the spliced logs.
+        how (str): 'inner', 'outer' or 'asof', see `merge_sorted_frames`. With 'asof' the depths are those
+            of the first curve.
+        tolerance (Optional[float]): Largest depth distance, in metres, matched by 'asof'.
+
+    Returns:
+        pd.DataFrame: TDEP, DEPTH_KEY and one column per curve. With 'outer', a curve missing for the
+        well is a column of NaN. A log with repeated depths gives its first sample at each of them.
+    """
+    frames = []
+    for curve in curves:
+        path = spliced_curve_path(base_path, curve, well)
+        if how == 'outer' and not os.path.exists(path):
+            frames.append(pd.DataFrame({'TDEP': pd.Series(dtype='float64'), curve: pd.Series(dtype='float64')}))
+            continue
+        frames.append(load_frame(path))
+
+    return merge_sorted_frames(frames, how, tolerance)
+
+
+def unify_wells(
+    curves: List[str],
+    base_path: str = os.path.join('..', 'data', 'dlis_spliced'),
+    wells: Optional[List[str]] = None,
+    how: str = 'inner',
+    tolerance: Optional[float] = None,
+    workers: int = 1
+) -> Dict[str, pd.DataFrame]:
+    """
+    Runs `unify_well` for every well, optionally in a process pool.
+
+    Args:
+        curves (List[str]): Curves to join.
+        base_path (str): Directory of the spliced logs.
+        wells (Optional[List[str]]): Wells to unify. None uses every well with the curves: with every
+            one of them for 'inner' and 'asof', with any of them for 'outer'.
+        how (str): 'inner', 'outer' or 'asof'.
+        tolerance (Optional[float]): Largest depth distance, in metres, matched by 'asof'.
+        workers (int): Number of worker processes.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The unified frame of each well. Wells that fail are reported and left out.
+    """
+    if wells is None:
+        wells = find_spliced_wells(base_path, curves, require_all=how != 'outer')
+
+    results = map_isolated(partial(unify_well, curves=curves, base_path=base_path, how=how, tolerance=tolerance),
+                           wells, workers)
+
+    unified = {}
+    for well, result in zip(wells, results):
+        if isinstance(result, Exception):
+            print(f"Error when unifying {well}: {result}")
+            continue
+        unified[well] = result
+
+    return unified